@@ -1,13 +1,24 @@
-from tools.stockretriever import get_historical_info
-from agents.agent import Agent
-import requests
-from datetime import datetime, timedelta
-
-NEWS_API_KEY = 'YourNewsAPIKey'
-
-class MarketResearchAgent(Agent):
-    def __init__(self):
-        super().__init__()
+from tools.price_store import PriceStore
+from tools.clock import system_clock
+from tools.news_fetcher import NewsFetcher
+from agents.agent import AsyncAgent
+from tools import tracing
+import asyncio
+from datetime import timedelta
+
+class MarketResearchAgent(AsyncAgent):
+    def __init__(self, price_store=None, client=None, cache=None, news_fetcher=None, clock=None):
+        """
+        :param price_store: PriceStore serving price history from the local database. One is created on the
+                            project database if not given.
+        :param news_fetcher: Callable(search_term) -> news text. Defaults to a tools.news_fetcher.NewsFetcher;
+                             fetchers that also provide fetch_many(search_terms) get all terms in one batch.
+        :param clock: Clock deciding what "today" is for price history (system clock by default).
+        """
+        super().__init__(client, cache)
+        self.price_store = price_store or PriceStore()
+        self.news_fetcher = news_fetcher or NewsFetcher()
+        self.clock = clock or system_clock
 
     def fetch_market_information(self, questions):
         """
@@ -30,66 +41,58 @@ class MarketResearchAgent(Agent):
 
         # Split the search strings into a list (assuming one search string per line or comma-separated)
         search_terms = search_strings.split(",") if ',' in search_strings else search_strings.split("\n")
+        search_terms = [term for term in search_terms if term.strip()]
+
+        # Fetch the news for every term, then summarize them all at once; summaries come back in term order
+        async def research_all():
+            news = await self._fetch_news(search_terms)
+            return await asyncio.gather(*(self._summarize_news(term, market_news)
+                                          for term, market_news in zip(search_terms, news)))
 
-        # Summarize the news for each search term
-        compiled_summary = []
-        for search_term in search_terms:
-            market_news = self.fetch_news_from_api(search_term)
-            summary_instruction = """
-                    You are a financial expert. Summarize the following news articles and information:
-                    """
-            summarized_market_info = self.call_openai_api(summary_instruction, market_news)
-            compiled_summary.append(f"Results for '{search_term}':\n{summarized_market_info}\n")
+        compiled_summary = self.run_async(research_all)
 
         # Return the compiled summary of all search results
         return "\n".join(compiled_summary)
 
-    def fetch_news_from_api(self, search_strings):
-
+    async def _fetch_news(self, search_terms):
+        """
+        :return: News text for each search term, in order.
         """
-        Fetches news articles from an external API based on search strings and summarizes the results.
+        # News requests are blocking, so they run on worker threads
+        fetch_many = getattr(self.news_fetcher, 'fetch_many', None)
+        if fetch_many is not None:
+            # One batch, so an article found for several terms is only summarized once
+            with tracing.span('news', 'fetch_many', terms=len(search_terms)):
+                return await asyncio.to_thread(fetch_many, search_terms)
+
+        async def fetch(search_term):
+            with tracing.span('news', 'search_term', term=search_term.strip()):
+                return await asyncio.to_thread(self.news_fetcher, search_term)
+
+        return await asyncio.gather(*(fetch(term) for term in search_terms))
 
-        :param search_strings: Search terms generated based on Buffet's questions.
-        :return: Summarized news information as a string.
+    async def _summarize_news(self, search_term, market_news):
         """
-        api_key = NEWS_API_KEY
-        base_url = "https://newsapi.org/v2/everything"
-
-        summarized_news = []
-
-        # Iterate over each search string and fetch relevant news
-        for search_term in search_strings.split(","):
-            params = {
-                'q': search_term + " public traded company",
-                'apiKey': api_key,
-                'language': 'en',
-                'sortBy': 'relevancy',
-                'pageSize': 5  # Fetch top 5 articles for each search term
-            }
-
-            try:
-                response = requests.get(base_url, params=params)
-                response.raise_for_status()  # Raise error for bad responses
-                articles = response.json().get('articles', [])
-
-                # Summarize fetched articles
-                if articles:
-                    for article in articles:
-                        summary = f"Title: {article['title']}\nDescription: {article['description']}\nURL: {article['url']}\n"
-                        summarized_news.append(summary)
-                else:
-                    summarized_news.append(f"No relevant articles found for {search_term}.")
-
-            except Exception as e:
-                summarized_news.append(f"Error fetching news for {search_term}: {e}")
-
-        # Return summarized news as a single string
-        return "\n\n".join(summarized_news)
+        Summarizes the news fetched for one search term.
+        """
+        summary_instruction = """
+                You are a financial expert. Summarize the following news articles and information:
+                """
+        summarized_market_info = await self.acall_openai_api(summary_instruction, market_news)
+        return f"Results for '{search_term}':\n{summarized_market_info}\n"
 
     def get_stock_price_history(self, stock_trend_request):
         """
         Retrieves stock price history for specific tickers.
         """
+        return self.fetch_price_history(self.extract_tickers(stock_trend_request))
+
+    def extract_tickers(self, stock_trend_request):
+        """
+        Picks the ticker symbols out of Buffett's request for price trends.
+
+        :return: Sorted tuple of unique symbols, so two requests naming the same stocks give the same value.
+        """
         # Instruction to retrieve stock price history
         trend_instruction = """
         Parse the input information and output only ticket number in the text, seperated by comma.
@@ -97,13 +100,18 @@ class MarketResearchAgent(Agent):
 
         tickers = self.call_openai_api(trend_instruction, stock_trend_request)
         print(f"Those are the stocks Warren Buffett recommends her to look at: {tickers}")
+        return tuple(sorted({ticker.strip() for ticker in tickers.split(",") if ticker.strip()}))
 
-        # Call DBManager or external API to get historical price data
+    def fetch_price_history(self, tickers):
+        """
+        :param tickers: Symbols to retrieve, e.g. from extract_tickers.
+        :return: Dictionary of {ticker: price history of the last 120 days}.
+        """
+        # Served from stock_data.db; only dates missing locally are fetched from the network
         price_data = {}
-        for ticker in tickers.split(","):
-            end_date = datetime.now()
+        for ticker in tickers:
+            end_date = self.clock.now()
             start_date = end_date - timedelta(days=120)
-            # Assuming start_date and end_date are provided elsewhere or within the prompt
-            price_data[ticker] = get_historical_info(ticker.strip(), start_date, end_date)
+            price_data[ticker] = self.price_store.get_history(ticker, start_date, end_date)
 
-        return price_data
+        return price_data
\ No newline at end of file
@@ -1,27 +1,250 @@
-from openai import OpenAI
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import Future
+from openai import OpenAI, AsyncOpenAI
+from tools import tracing
+from tools.features import estimate_tokens
 
 API_KEY = "Your_OpenAI_API_Key"
+MODEL = "gpt-4o"
+MAX_CONCURRENT_CALLS = 16
+# (async client or None, semaphore) of the run_async call the current task belongs to. Kept per context, not
+# on the agent, so overlapping run_async calls on one agent (e.g. from two meeting rounds) stay apart
+_async_run = contextvars.ContextVar('async_run', default=(None, None))
 
 class Agent:
-    def __init__(self):
-        self.client = OpenAI(api_key=API_KEY)
+    def __init__(self, client=None, cache=None):
+        """
+        :param client: OpenAI-compatible client. Defaults to an OpenAI client using API_KEY; pass one built with
+                       a different base_url to talk to a local completion server.
+        :param cache: Optional ResponseCache. Responses are only cached when one is given (opt-in).
+        """
+        self.client = client or OpenAI(api_key=API_KEY)
+        self.model = MODEL
+        self.cache = cache
+        self.cache_enabled = cache is not None
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def enable_cache(self, cache=None):
+        """
+        Turns response caching on for this agent, optionally attaching a new cache.
+        """
+        if cache is not None:
+            self.cache = cache
+        if self.cache is None:
+            raise ValueError("No response cache attached to this agent.")
+        self.cache_enabled = True
+
+    def disable_cache(self):
+        self.cache_enabled = False
+
+    def _cache_lookup(self, instruction, prompt):
+        """
+        :return: (cache key or None when caching is off, cached response or None)
+        """
+        if not self.cache_enabled:
+            return None, None
+        cache_key = self.cache.make_key(self.model, instruction, prompt)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            self.cache_hits += 1
+        else:
+            self.cache_misses += 1
+        return cache_key, cached
+
+    def _cache_store(self, cache_key, response):
+        if cache_key is not None and response is not None:
+            self.cache.put(cache_key, response)
+
+    def _trace_call(self):
+        return tracing.span('llm', self.model, agent=type(self).__name__, model=self.model)
+
+    @staticmethod
+    def _record_usage(span, completion, instruction, prompt, response):
+        """
+        Records token counts on a model call's span, estimated from the text when the client reports no usage.
+        """
+        usage = getattr(completion, 'usage', None)
+        if usage is not None:
+            span.set(prompt_tokens=usage.prompt_tokens, completion_tokens=usage.completion_tokens)
+        else:
+            span.set(prompt_tokens=estimate_tokens(instruction) + estimate_tokens(prompt),
+                     completion_tokens=estimate_tokens(response or ''), tokens_estimated=True)
 
     def call_openai_api(self, instruction, prompt):
         """
         This function calls the OpenAI API to generate a response based on the given instruction and prompt.
         """
-        completion = self.client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": instruction},
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ]
-        )
+        with self._trace_call() as span:
+            cache_key, cached = self._cache_lookup(instruction, prompt)
+            if cached is not None:
+                span.set(cached=True)
+                return cached
+
+            completion = self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": instruction},
+                    {
+                        "role": "user",
+                        "content": prompt
+                    }
+                ]
+            )
 
-        response = completion.choices[0].message.content
+            response = completion.choices[0].message.content
+            self._record_usage(span, completion, instruction, prompt, response)
         # print(response)
+        self._cache_store(cache_key, response)
         # Extract the content correctly from the response
-        return response
\ No newline at end of file
+        return response
+
+    def stream_openai_api(self, instruction, prompt, decide):
+        """
+        Streams a completion and hands the text received so far to `decide` after every chunk. Returns as soon
+        as `decide` returns something other than None, while the rest of the completion is read on a
+        background thread.
+
+        :param decide: Callable(partial response text) -> decision or None. Called once more with the full
+                       response if it never decided on a prefix.
+        :return: (decision, concurrent.futures.Future resolving to the full response)
+        """
+        cache_key, cached = self._cache_lookup(instruction, prompt)
+        if cached is not None:
+            full_response = Future()
+            full_response.set_result(cached)
+            return decide(cached), full_response
+
+        decision = Future()
+        full_response = Future()
+
+        def consume():
+            try:
+                response = self._consume_stream(instruction, prompt, decide, decision)
+            except Exception as e:
+                for future in (decision, full_response):
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            if not decision.done():
+                decision.set_result(decide(response))
+            self._cache_store(cache_key, response)
+            full_response.set_result(response)
+
+        # The reader runs in the caller's context, so its span nests under the caller's open span
+        threading.Thread(target=contextvars.copy_context().run, args=(consume,), daemon=True).start()
+        return decision.result(), full_response
+
+    def _consume_stream(self, instruction, prompt, decide, decision):
+        with self._trace_call() as span:
+            started = time.perf_counter()
+            stream = self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": instruction},
+                    {"role": "user", "content": prompt}
+                ],
+                stream=True
+            )
+            parts = []
+            for chunk in stream:
+                content = chunk.choices[0].delta.content if chunk.choices else None
+                if not content:
+                    continue
+                parts.append(content)
+                if not decision.done():
+                    value = decide("".join(parts))
+                    if value is not None:
+                        span.set(decided_ms=(time.perf_counter() - started) * 1000)
+                        decision.set_result(value)
+            response = "".join(parts)
+            # Streams report no usage unless asked to, so tokens are estimated
+            self._record_usage(span, None, instruction, prompt, response)
+            span.set(stream=True)
+        return response
+
+
+class AsyncAgent(Agent):
+    """
+    Agent that can fan out many model calls at once. Coroutines run inside run_async, which owns the event
+    loop, the async client and a semaphore bounding how many requests are in flight.
+    """
+
+    def __init__(self, client=None, cache=None, async_client=None, max_concurrency=MAX_CONCURRENT_CALLS):
+        """
+        :param async_client: Optional AsyncOpenAI-compatible client. By default a fresh one is built for each
+                             run_async call from the sync client's api_key and base_url, since async HTTP
+                             connections cannot outlive the event loop that opened them. Sync clients that
+                             are not OpenAI instances (local stand-ins) are driven through worker threads.
+        :param max_concurrency: Maximum number of model requests in flight at once.
+        """
+        super().__init__(client, cache)
+        self.async_client = async_client
+        self.max_concurrency = max_concurrency
+
+    async def acall_openai_api(self, instruction, prompt):
+        """
+        Async counterpart of call_openai_api. Must be awaited inside run_async.
+        """
+        with self._trace_call() as span:
+            cache_key, cached = self._cache_lookup(instruction, prompt)
+            if cached is not None:
+                span.set(cached=True)
+                return cached
+
+            messages = [
+                {"role": "system", "content": instruction},
+                {"role": "user", "content": prompt}
+            ]
+            active_client, semaphore = _async_run.get()
+            queued = time.perf_counter()
+            async with semaphore:
+                # Waiting for a free slot is part of the span's latency, so it is recorded separately
+                span.set(queued_ms=(time.perf_counter() - queued) * 1000)
+                if active_client is None:
+                    completion = await asyncio.to_thread(self.client.chat.completions.create,
+                                                         model=self.model, messages=messages)
+                else:
+                    completion = await active_client.chat.completions.create(model=self.model, messages=messages)
+
+            response = completion.choices[0].message.content
+            self._record_usage(span, completion, instruction, prompt, response)
+        self._cache_store(cache_key, response)
+        return response
+
+    def run_async(self, coroutine_function, *args):
+        """
+        Runs `coroutine_function(*args)` to completion from synchronous code and returns its result.
+        """
+        return asyncio.run(self._run(coroutine_function, *args))
+
+    async def _run(self, coroutine_function, *args):
+        owned = self.async_client is None and isinstance(self.client, OpenAI)
+        if owned:
+            active_client = AsyncOpenAI(api_key=self.client.api_key, base_url=self.client.base_url)
+        else:
+            active_client = self.async_client
+        # Tasks the coroutine starts inherit this context, and with it this run's client and semaphore
+        token = _async_run.set((active_client, asyncio.Semaphore(self.max_concurrency)))
+        try:
+            return await coroutine_function(*args)
+        finally:
+            _async_run.reset(token)
+            if owned:
+                await active_client.close()
+
+    def call_openai_api_many(self, requests):
+        """
+        Sends every (instruction, prompt) pair concurrently.
+
+        :param requests: Iterable of (instruction, prompt) pairs.
+        :return: List of responses in the same order as `requests`.
+        """
+        async def gather():
+            return await asyncio.gather(*(self.acall_openai_api(instruction, prompt)
+                                          for instruction, prompt in requests))
+
+        return self.run_async(gather)
\ No newline at end of file
@@ -1,20 +1,26 @@
 import numpy as np
 import pandas as pd
-from agents.agent import Agent
+from agents.agent import AsyncAgent
+from tools.features import DEFAULT_TOKEN_BUDGET, summarize_history
 
 
-class AnalystAgent(Agent):
-    def __init__(self):
-        super().__init__()
+class AnalystAgent(AsyncAgent):
+    def __init__(self, client=None, cache=None, token_budget=DEFAULT_TOKEN_BUDGET):
+        """
+        :param token_budget: Approximate number of prompt tokens spent on each ticker's price summary.
+        """
+        super().__init__(client, cache)
+        self.token_budget = token_budget
 
     def analyze_stock_data(self, price_data):
         """
         Analyzes stock price history and generates a report with quantitative analysis and predictions.
 
-        :param price_data: Dictionary containing stock price history for multiple tickers.
+        :param price_data: Dictionary containing stock price history for multiple tickers, either as lists of
+                           per-day dictionaries or as columnar dictionaries of arrays.
         :return: An analysis report with predictions and suggestions.
         """
-        analysis_report = []
+        analysis_prompts = []
 
         for ticker, data in price_data.items():
             analysis_prompt = f"""
@@ -22,12 +28,14 @@ class AnalystAgent(Agent):
             and financial engineering. Analyze the historical price data for {ticker}, and create 
             an analysis report. Include trends, statistical insights, and make a prediction for the next quarter.
 
-            Historical Data (Sample):
-            {data}
+            Price History Summary:
+            {summarize_history(data, self.token_budget)}
             """
 
-            # Call OpenAI API to generate the analysis report for each ticker
-            report = self.call_openai_api("Financial analysis expert", analysis_prompt)
-            analysis_report.append(f"Analysis Report for {ticker}:\n{report}\n")
+            analysis_prompts.append(("Financial analysis expert", analysis_prompt))
+
+        # Call OpenAI API for every ticker at once; reports come back in ticker order
+        reports = self.call_openai_api_many(analysis_prompts)
+        analysis_report = [f"Analysis Report for {ticker}:\n{report}\n" for ticker, report in zip(price_data, reports)]
 
         return "\n".join(analysis_report)
\ No newline at end of file
@@ -1,9 +1,13 @@
 from agents.agent import Agent
 import re
 
+# The score is the first number of the response. A number is only taken once a non-digit follows it, so a
+# streamed "9" is never read as the final score before the "5" of "95" arrives.
+SCORE_PATTERN = re.compile(r'\b(\d{1,3})\b(?=\D)')
+
 class CEOAgent(Agent):
-    def __init__(self):
-        super().__init__()
+    def __init__(self, client=None, cache=None):
+        super().__init__(client, cache)
 
     def review_and_assign_tasks(self, performance_report):
         """
@@ -35,13 +39,15 @@ class CEOAgent(Agent):
         # Return the generated tasks
         return tasks
 
-    def evaluate_recommendations(self, recommendations, performance_review):
+    def evaluate_recommendations(self, recommendations, performance_review, stream=False):
         """
         Evaluate Buffet's recommendation by using the OpenAI API to simulate the CEO's thought process.
         The evaluation is based on a detailed rubric and will return 'approve' or 'revise' depending on the score.
 
         :param recommendations: Buffet's recommendations for buy/sell/hold decisions.
-        :return: 'approve' or 'revise' based on the evaluation score.
+        :param stream: Decide as soon as the score has been streamed, instead of after the full explanation.
+        :return: ('approve' or 'revise', evaluation text). With stream=True the evaluation is a
+                 concurrent.futures.Future that resolves once the rest of the explanation has arrived.
         """
         # System instruction for OpenAI
         rubric_prompt = f"""
@@ -71,20 +77,39 @@ class CEOAgent(Agent):
         Provide detailed reasoning for each score category, including specific references to the recommended stocks.
         """
 
+        if stream:
+            # The explanation keeps streaming in the background for the meeting notes
+            decision, evaluation = self.stream_openai_api(
+                rubric_prompt, recommendations, lambda partial: self._decide(partial, complete=False))
+            if decision is None:
+                # Only reached when the response ends right after the score, or has none
+                decision = self._decide(evaluation.result())
+            return decision, evaluation
+
         # Call OpenAI API to evaluate the recommendation based on the rubric
         evaluation = self.call_openai_api(rubric_prompt, recommendations)
+        return self._decide(evaluation), evaluation
 
+    @staticmethod
+    def _decide(evaluation, complete=True):
+        """
+        :param evaluation: Evaluation text, or only its beginning while it is being streamed.
+        :param complete: Whether `evaluation` is the whole response.
+        :return: 'approve' or 'revise', or None while the score has not arrived yet.
+        """
         # Extract score and approval decision from the API's response
-        score_match = re.search(r'\b\d{1,3}\b', evaluation)
+        score_match = SCORE_PATTERN.search(evaluation + "\n" if complete else evaluation)
         if score_match:
-            score = int(score_match.group(0))
-        else:
+            score = int(score_match.group(1))
+        elif complete:
             raise ValueError("No score found in the evaluation response.")
+        else:
+            return None
 
         # Decision-making based on the score
         if score > 88:
             print(f"Recommendation approved with a score of {score}")
-            return 'approve', evaluation
+            return 'approve'
         else:
             print(f"Recommendation requires revision with a score of {score}")
-            return 'revise', evaluation
\ No newline at end of file
+            return 'revise'
\ No newline at end of file
@@ -0,0 +1,137 @@
+"""
+In-process stand-ins for the OpenAI client. They expose the same `client.chat.completions.create(...)`
+surface the agents use, so an Agent can run on scripted, recorded or replayed responses without a network.
+"""
+import json
+import os
+import threading
+from types import SimpleNamespace
+
+from agents.response_cache import ResponseCache
+
+
+def _split_messages(messages):
+    instruction = next((m['content'] for m in messages if m['role'] == 'system'), '')
+    prompt = next((m['content'] for m in messages if m['role'] == 'user'), '')
+    return instruction, prompt
+
+
+def _completion(model, content):
+    return SimpleNamespace(
+        model=model,
+        choices=[SimpleNamespace(index=0, finish_reason='stop',
+                                 message=SimpleNamespace(role='assistant', content=content))],
+        usage=None
+    )
+
+
+def _stream(model, content, chunk_words=4):
+    """
+    Splits `content` into chat.completion.chunk-like objects of a few words each, as a streaming request
+    (stream=True) returns them.
+    """
+    words = content.split(' ')
+    for i in range(0, len(words), chunk_words):
+        piece = ' '.join(words[i:i + chunk_words])
+        if i + chunk_words < len(words):
+            piece += ' '
+        yield SimpleNamespace(model=model, choices=[SimpleNamespace(
+            index=0, finish_reason=None, delta=SimpleNamespace(role='assistant', content=piece))])
+
+
+def _respond(model, content, kwargs):
+    return _stream(model, content) if kwargs.get('stream') else _completion(model, content)
+
+
+class _Completions:
+    def __init__(self, create):
+        self.create = create
+
+
+class StubCompletionClient:
+    """
+    Answers every request with `responder(instruction, prompt)`.
+    """
+
+    def __init__(self, responder):
+        self.responder = responder
+        self.chat = SimpleNamespace(completions=_Completions(self._create))
+
+    def _create(self, model, messages, **kwargs):
+        instruction, prompt = _split_messages(messages)
+        return _respond(model, self.responder(instruction, prompt), kwargs)
+
+
+class RecordingCompletionClient:
+    """
+    Wraps a real client and appends every exchange to a JSONL file that ReplayCompletionClient can serve.
+    """
+
+    def __init__(self, client, path):
+        self.client = client
+        self.path = path
+        self.lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.chat = SimpleNamespace(completions=_Completions(self._create))
+
+    def _create(self, model, messages, **kwargs):
+        completion = self.client.chat.completions.create(model=model, messages=messages, **kwargs)
+        if kwargs.get('stream'):
+            return self._record_stream(model, messages, completion)
+        self._record(model, messages, completion.choices[0].message.content)
+        return completion
+
+    def _record_stream(self, model, messages, stream):
+        # Passes chunks through as they arrive and records the text once the stream is complete
+        parts = []
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                parts.append(chunk.choices[0].delta.content)
+            yield chunk
+        self._record(model, messages, "".join(parts))
+
+    def _record(self, model, messages, response):
+        instruction, prompt = _split_messages(messages)
+        record = {
+            'key': ResponseCache.make_key(model, instruction, prompt),
+            'model': model,
+            'instruction': instruction,
+            'prompt': prompt,
+            'response': response
+        }
+        with self.lock, open(self.path, 'a', encoding='utf-8') as file:
+            file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+class ReplayCompletionClient:
+    """
+    Serves responses recorded by RecordingCompletionClient, matched on (model, instruction, prompt).
+    """
+
+    def __init__(self, path, fallback=None):
+        """
+        :param path: JSONL file written by RecordingCompletionClient.
+        :param fallback: Optional responder(instruction, prompt) used for requests that were never recorded.
+                         Without one, unrecorded requests raise KeyError.
+        """
+        self.responses = {}
+        with open(path, encoding='utf-8') as file:
+            for line in file:
+                if line.strip():
+                    record = json.loads(line)
+                    self.responses[record['key']] = record['response']
+        self.fallback = fallback
+        self.misses = 0
+        self.chat = SimpleNamespace(completions=_Completions(self._create))
+
+    def _create(self, model, messages, **kwargs):
+        instruction, prompt = _split_messages(messages)
+        key = ResponseCache.make_key(model, instruction, prompt)
+        if key in self.responses:
+            return _respond(model, self.responses[key], kwargs)
+        self.misses += 1
+        if self.fallback is None:
+            raise KeyError(f"No recorded response for request {key}.")
+        return _respond(model, self.fallback(instruction, prompt), kwargs)
\ No newline at end of file
@@ -1,21 +1,35 @@
 from agents.agent import Agent
-from tools.stockretriever import get_current_info
+from agents.recommendation_parser import RecommendationParser
+from tools.quote_service import default_quote_service
 from models.portfolio import Portfolio
 import re
 
 
 class OperatorAgent(Agent):
-    def __init__(self, portfolio):
-        super().__init__()
+    def __init__(self, portfolio, client=None, cache=None, parser=None):
+        """
+        :param parser: RecommendationParser tried before the model; one on the stock database by default.
+        """
+        super().__init__(client, cache)
         self.portfolio = portfolio
+        self.parser = parser or RecommendationParser()
+        # Share the portfolio's quote snapshot so execution prices match the morning report
+        self.quote_service = getattr(portfolio, 'quote_service', None) or default_quote_service
 
     def parse_recommendation(self, recommendation_text):
         """
-        Parses the recommendation text into a triplet of (ticker symbol, quantity, buy/sell action).
+        Parses the recommendation text into a triplet of (ticker symbol, quantity, buy/sell action), locally
+        when it ends with the triplets Buffett is asked for, and with the model otherwise.
 
         :param recommendation_text: The text containing the recommendation, e.g., "Buy 100 shares of AAPL"
         :return: A list of parsed recommendations [(symbol, volume, action)]
         """
+        # Buffett is asked to end with these triplets, so most recommendations need no model call
+        parsed_recommendations = self.parser.parse(recommendation_text)
+        if parsed_recommendations is not None:
+            print(f"{parsed_recommendations} (parsed locally, hit rate {self.parser.hit_rate():.0%})")
+            return parsed_recommendations
+
         prompt = f"""
                 You are an investment operator. You will be given a text containing stock recommendations in natural language.
                 Your job is to extract the following details in the exact format:
@@ -36,7 +50,7 @@ class OperatorAgent(Agent):
         matches = re.findall(pattern, response)
 
         # Convert matches into a list of tuples (symbol, quantity, action)
-        parsed_recommendations = [(match[0], int(match[1]), match[2]) for match in matches]
+        parsed_recommendations = self.parser.validate([(match[0], int(match[1]), match[2]) for match in matches])
         print(parsed_recommendations)
 
         return parsed_recommendations
@@ -47,8 +61,13 @@ class OperatorAgent(Agent):
 
         :param parsed_recommendations: A list of parsed recommendations [(symbol, volume, action)]
         """
+        # Price every order from one batched snapshot instead of one request per order
+        prices = self.quote_service.get_quotes(symbol for symbol, _, _ in parsed_recommendations)
         for symbol, quantity, action in parsed_recommendations:
-            current_price = self.get_current_price(symbol)
+            current_price = prices.get(symbol)
+            if current_price is None:
+                print(f"Failed to execute {action} for {symbol}: no current price available")
+                continue
             if action == 'buy':
                 try:
                     self.portfolio.buy_stock(symbol, quantity, current_price)
@@ -64,10 +83,10 @@ class OperatorAgent(Agent):
 
     def get_current_price(self, symbol):
         """
-        Retrieves the current stock price using the stockretriever's functionality.
-        This function could be replaced with a real API call or a mock for testing.
+        Retrieves the current stock price from the shared quote snapshot.
+        The quote service could be replaced with a local one for testing.
 
         :param symbol: The stock ticker symbol.
-        :return: The current price of the stock.
+        :return: The current price of the stock, or None when it is unavailable.
         """
-        return get_current_info([symbol])[0]['currentPrice']
\ No newline at end of file
+        return self.quote_service.get_quote(symbol)
\ No newline at end of file
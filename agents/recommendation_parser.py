@@ -0,0 +1,122 @@
+import os
+import re
+import sqlite3
+import threading
+
+from database.db_manager import DATABASE_PATH
+
+# (TICKER, quantity, action), the format make_final_decision asks Buffett to end his recommendation with.
+# Tolerates a leading $, thousands separators, a trailing "shares" and any letter case
+TRIPLET_PATTERN = re.compile(r'\(\s*\$?([A-Za-z][A-Za-z0-9.\-]{0,9})\s*,\s*(\d{1,3}(?:,\d{3})+|\d+)\s*'
+                             r'(?:shares?\s*)?,\s*(buy|sell|hold)\s*\)', re.IGNORECASE)
+# Any parenthesized group naming a trade, to tell whether the triplets above are all Buffett wrote
+CANDIDATE_PATTERN = re.compile(r'\([^()]*\b(?:buy|sell)\b[^()]*\)', re.IGNORECASE)
+
+
+class RecommendationParser:
+    """
+    Extracts (symbol, quantity, action) triplets from Buffett's final recommendation without a model call.
+    Symbols are checked against the stocks table. parse returns None whenever the text does not read
+    unambiguously, so the caller can fall back to the model; hits and misses are counted for hit_rate.
+    """
+
+    def __init__(self, database_path=DATABASE_PATH, symbols=None):
+        """
+        :param database_path: Stock database whose stocks table lists the valid symbols.
+        :param symbols: Iterable of valid symbols, used instead of the stocks table. When neither gives any
+                        symbol, every well-formed ticker is accepted, with a warning.
+        """
+        self.database_path = database_path
+        self.symbols = frozenset(symbol.upper() for symbol in symbols) if symbols is not None else None
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _symbol_table(self):
+        with self.lock:
+            if self.symbols is None:
+                self.symbols = frozenset()
+                # Opened read-only, so a missing database is not created empty
+                if os.path.exists(self.database_path):
+                    conn = sqlite3.connect(f"file:{self.database_path}?mode=ro", uri=True)
+                    try:
+                        self.symbols = frozenset(row[0].upper() for row in conn.execute('SELECT symbol FROM stocks'))
+                    except sqlite3.OperationalError:
+                        pass
+                    finally:
+                        conn.close()
+                if not self.symbols:
+                    print(f"Warning: no symbols listed in the stocks table of {self.database_path}; "
+                          f"recommended symbols are not validated.")
+            return self.symbols
+
+    def _resolve(self, ticker):
+        """
+        :return: The symbol as listed in the symbol table (BRK.B may be listed as BRK-B), or None if unknown.
+        """
+        ticker = ticker.upper()
+        symbols = self._symbol_table()
+        if not symbols:
+            return ticker
+        for candidate in (ticker, ticker.replace('.', '-'), ticker.replace('-', '.')):
+            if candidate in symbols:
+                return candidate
+        return None
+
+    def _parse(self, recommendation_text):
+        text = recommendation_text.replace('*', '').replace('`', '')
+        matches = TRIPLET_PATTERN.findall(text)
+        trades = [match for match in matches if match[2].lower() != 'hold']
+        # Nothing to read, or a trade written in some other form the grammar does not cover
+        if not trades or len(CANDIDATE_PATTERN.findall(text)) != len(trades):
+            return None
+
+        orders = {}
+        for ticker, quantity, action in trades:
+            symbol = self._resolve(ticker)
+            if symbol is None:
+                return None
+            order = (int(quantity.replace(',', '')), action.lower())
+            # The same order repeated (e.g. in the reasoning and in the summary) is placed once; two different
+            # orders for one symbol are ambiguous
+            if orders.setdefault(symbol, order) != order:
+                return None
+        return [(symbol, quantity, action) for symbol, (quantity, action) in orders.items() if quantity > 0]
+
+    def validate(self, recommendations):
+        """
+        Keeps the recommendations whose symbol is in the symbol table, e.g. those the model extracted when
+        parse could not.
+
+        :param recommendations: List of (symbol, quantity, action).
+        :return: The valid ones, with symbols as listed in the table.
+        """
+        valid = []
+        for ticker, quantity, action in recommendations:
+            symbol = self._resolve(ticker)
+            if symbol is None:
+                print(f"Skipping {action} of {quantity} {ticker}: not a listed symbol")
+            else:
+                valid.append((symbol, quantity, action))
+        return valid
+
+    def parse(self, recommendation_text):
+        """
+        :param recommendation_text: Buffett's final recommendation.
+        :return: List of (symbol, quantity, action) with action 'buy' or 'sell', or None when the text has to
+                 be parsed by the model instead.
+        """
+        parsed = self._parse(recommendation_text)
+        with self.lock:
+            if parsed is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return parsed
+
+    def hit_rate(self):
+        """
+        :return: Share of recommendations parsed without the model so far.
+        """
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
\ No newline at end of file
@@ -0,0 +1,85 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_PATH = os.path.join(BASE_DIR, 'cache', 'llm_responses.db')
+
+
+class ResponseCache:
+    """
+    Persistent, content-addressed cache of model completions. Entries are keyed by a hash of
+    (model, system instruction, prompt), expire after a TTL, and the least recently used entries are
+    evicted once the cache holds more than `max_entries`.
+    """
+
+    def __init__(self, path=CACHE_PATH, ttl_seconds=24 * 3600, max_entries=10000):
+        """
+        :param path: SQLite file holding the cache. Its directory is created if missing.
+        :param ttl_seconds: Age after which an entry is treated as missing. None disables expiry.
+        :param max_entries: Maximum number of entries kept on disk.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self.conn:
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    response TEXT,
+                    created_at REAL,
+                    last_access REAL
+                )
+            ''')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses (last_access)')
+
+    @staticmethod
+    def make_key(model, instruction, prompt):
+        payload = json.dumps([model, instruction, prompt], ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """
+        :return: The cached response, or None when the key is missing or expired.
+        """
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute('SELECT response, created_at FROM responses WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            response, created_at = row
+            with self.conn:
+                if self.ttl_seconds is not None and now - created_at > self.ttl_seconds:
+                    self.conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+                    return None
+                self.conn.execute('UPDATE responses SET last_access = ? WHERE key = ?', (now, key))
+            return response
+
+    def put(self, key, response):
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)', (key, response, now, now))
+            # Keep the newest max_entries by last access and drop the rest
+            self.conn.execute('''
+                DELETE FROM responses WHERE key IN (
+                    SELECT key FROM responses ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                )
+            ''', (self.max_entries,))
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+
+    def clear(self):
+        with self.lock, self.conn:
+            self.conn.execute('DELETE FROM responses')
+
+    def close(self):
+        self.conn.close()
\ No newline at end of file
@@ -2,8 +2,8 @@ from agents.agent import Agent
 
 
 class SecretaryAgent(Agent):
-    def __init__(self):
-        super().__init__()
+    def __init__(self, client=None, cache=None):
+        super().__init__(client, cache)
 
     def generate_meeting_notes(self, original_tasks, market_questions, market_info, stock_trend_request,
                                analysis_report, previous_recommendation, ceo_feedback):
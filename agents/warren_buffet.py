@@ -1,4 +1,5 @@
 from agents.agent import Agent
+from tools.features import DEFAULT_TOKEN_BUDGET, summarize_history
 
 
 BUFFET_PHILOSOPHY = """
@@ -10,8 +11,15 @@ BUFFET_PHILOSOPHY = """
         """
 
 class WarrenBuffetAgent(Agent):
-    def __init__(self):
-        super().__init__()
+    def __init__(self, client=None, cache=None, philosophy=BUFFET_PHILOSOPHY, token_budget=DEFAULT_TOKEN_BUDGET):
+        """
+        :param philosophy: System instruction describing the investor Buffett plays, e.g. to run a strategy
+                           variant with a different style.
+        :param token_budget: Approximate number of prompt tokens spent on each ticker's price summary.
+        """
+        super().__init__(client, cache)
+        self.philosophy = philosophy
+        self.token_budget = token_budget
 
     def raise_market_questions(self, tasks):
         """
@@ -25,20 +33,18 @@ class WarrenBuffetAgent(Agent):
                 Based on these tasks, use your knowledge, think carefully and raise some questions about the specific markets.
                 What are some markets you would like to know more about companies in it?
                 """
-        questions_for_research = self.call_openai_api(BUFFET_PHILOSOPHY, task_prompt)
+        questions_for_research = self.call_openai_api(self.philosophy, task_prompt)
         return questions_for_research
 
-    def decide_stocks_for_trend_analysis(self, market_info):
+    def decide_stocks_for_trend_analysis(self, market_info, shortlist=None, revision=None):
         """
         Based on market information, Buffet decides which stock symbols to investigate further.
+
+        :param market_info: Market research gathered for Buffett's questions.
+        :param shortlist: Optional ranked table of candidates from the fundamental screener
+                          (see database.screener.format_shortlist) to choose from instead of guessing tickers.
+        :param revision: The CEO's feedback on the previous recommendation, when it is being revised.
         """
-        buffet_philosophy = """
-                You are Warren Buffet, a legendary investor who follows a value-investing philosophy. 
-                You focus on buying companies that are undervalued, with strong fundamentals and a long-term outlook.
-                You prefer quality businesses with a strong competitive moat, consistent earnings, and low debt. 
-                You avoid short-term market volatility and prioritize patience and discipline in all investment decisions.
-                Your goal is to identify opportunities that align with your value investing principles.
-                """
         analysis_prompt = f"""
                 Based on the following market information:
                 {market_info}
@@ -46,13 +52,30 @@ class WarrenBuffetAgent(Agent):
                 Which stock symbols (tickers) do you want to investigate further? 
                 Provide a rationale for each ticker and ask for price trends.
                 """
-        stock_trend_request = self.call_openai_api(BUFFET_PHILOSOPHY, analysis_prompt)
+        if shortlist:
+            analysis_prompt += f"""
+                These companies passed your fundamental screen, ranked best first.
+                Prefer tickers from this shortlist:
+                {shortlist}
+                """
+        if revision:
+            analysis_prompt += f"""
+                {revision}
+                Keep the same tickers unless the feedback asks for a different stock choice.
+                """
+        stock_trend_request = self.call_openai_api(self.philosophy, analysis_prompt)
         return stock_trend_request
 
-    def make_final_decision(self, performance_review, market_question, price_trends, stock_question, market_info):
+    def make_final_decision(self, performance_review, market_question, price_trends, stock_question, market_info,
+                            revision=None):
         """
         Buffet makes a final decision based on the stock trend analysis and market information.
+
+        :param price_trends: Dictionary of {ticker: price history}, as returned by fetch_price_history.
+        :param revision: The CEO's feedback on the previous recommendation, when it is being revised.
         """
+        stock_trends = "\n\n".join(f"{ticker}:\n{summarize_history(history, self.token_budget)}"
+                                   for ticker, history in price_trends.items())
         final_decision_prompt = f"""
                 Based on your thought flow:
                 
@@ -69,7 +92,7 @@ class WarrenBuffetAgent(Agent):
                 {stock_question}
 
                 4, obtained the stock trend
-                {price_trends}
+                {stock_trends}
 
                 Make a final recommendation on whether to buy, sell, or hold for each stock. 
                 Be very specific about what stock ticket you want to buy or sell, and how much will you buy or sell.
@@ -78,6 +101,10 @@ class WarrenBuffetAgent(Agent):
                 At the end of your recommendation, you should provide your recommended actions like a triplet:
                 (TICKER, quantity, sell/buy)
                 """
-        final_recommendation = self.call_openai_api(BUFFET_PHILOSOPHY, final_decision_prompt)
+        if revision:
+            final_decision_prompt += f"""
+                {revision}
+                """
+        final_recommendation = self.call_openai_api(self.philosophy, final_decision_prompt)
 
         return final_recommendation
\ No newline at end of file
@@ -0,0 +1,50 @@
+"""
+Compares AnalystAgent's concurrent per-ticker fan-out with sending the same prompts one at a time,
+against FakeCompletionServer.
+
+    python benchmarks/bench_agent_fanout.py --tickers 10 --latency 1.0
+"""
+import argparse
+import os
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openai import OpenAI
+
+from agents.analyst import AnalystAgent
+from benchmarks.fakes import FakeCompletionServer, FakeStockRetriever
+
+
+def run(tickers, latency):
+    source = FakeStockRetriever()
+    price_data = {f"T{i:03d}": source.get_historical_info(f"T{i:03d}", '2024-06-01', '2024-10-01', columnar=True)
+                  for i in range(tickers)}
+
+    with FakeCompletionServer(latency=latency) as server:
+        analyst = AnalystAgent(OpenAI(api_key='fake', base_url=server.base_url))
+
+        started = time.perf_counter()
+        for ticker, data in price_data.items():
+            analyst.call_openai_api("Financial analysis expert", f"{ticker} {data['Close'][-1]}")
+        sequential = time.perf_counter() - started
+
+        started = time.perf_counter()
+        report = analyst.analyze_stock_data(price_data)
+        concurrent = time.perf_counter() - started
+
+    # Reports must keep the input ticker order
+    positions = [report.index(f"Analysis Report for {ticker}:") for ticker in price_data]
+    assert positions == sorted(positions)
+
+    print(f"{tickers} tickers, {latency:.2f}s per call")
+    print(f"Sequential: {sequential:.2f}s")
+    print(f"Fan-out:    {concurrent:.2f}s ({sequential / concurrent:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tickers', type=int, default=10)
+    parser.add_argument('--latency', type=float, default=0.5)
+    args = parser.parse_args()
+    run(args.tickers, args.latency)
\ No newline at end of file
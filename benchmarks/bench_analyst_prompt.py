@@ -0,0 +1,82 @@
+"""
+Prompt size and call latency of AnalystAgent with the full price table in the prompt (before) versus the
+NumPy feature summary under a token budget (after), against FakeCompletionServer with a per-token cost.
+
+    python benchmarks/bench_analyst_prompt.py --tickers 10 --days 120 --token-budget 300
+"""
+import argparse
+import datetime
+import os
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openai import OpenAI
+
+from agents.analyst import AnalystAgent
+from benchmarks.fakes import FakeCompletionServer, FakeStockRetriever
+from tools.features import estimate_tokens, summarize_history
+from tools.stockretriever import format_history
+
+INSTRUCTION = "Financial analysis expert"
+
+
+def prompt_for(ticker, history_text):
+    # Same wording as AnalystAgent.analyze_stock_data, with the history rendering swapped in
+    return f"""
+            You are a financial analyst specializing in quantitative finance, financial modeling,
+            and financial engineering. Analyze the historical price data for {ticker}, and create
+            an analysis report. Include trends, statistical insights, and make a prediction for the next quarter.
+
+            Historical Data (Sample):
+            {history_text}
+            """
+
+
+def run(tickers, days, token_budget, latency, latency_per_token):
+    source = FakeStockRetriever()
+    end = datetime.date(2024, 10, 1)
+    # Calendar days covering the requested number of trading days
+    start = end - datetime.timedelta(days=days * 7 // 5)
+    symbols = [f"T{i:03d}" for i in range(tickers)]
+    columnar = {s: source.get_historical_info(s, start.isoformat(), end.isoformat(), columnar=True) for s in symbols}
+    records = {s: source.get_historical_info(s, start.isoformat(), end.isoformat()) for s in symbols}
+
+    started = time.perf_counter()
+    summaries = {s: summarize_history(history, token_budget) for s, history in columnar.items()}
+    feature_time = time.perf_counter() - started
+
+    variants = [
+        ('list of dicts', [prompt_for(s, records[s]) for s in symbols]),
+        ('CSV table', [prompt_for(s, format_history(columnar[s])) for s in symbols]),
+        (f'features ({token_budget})', [prompt_for(s, summaries[s]) for s in symbols]),
+    ]
+
+    print(f"{tickers} tickers x {len(columnar[symbols[0]]['Close'])} trading days, "
+          f"{latency:.2f}s + {latency_per_token * 1000:.2f}ms per prompt token per call")
+    print(f"Feature stage: {feature_time * 1000:.1f}ms for all tickers")
+    print(f"{'prompt':<18} {'tokens/ticker':>14} {'total tokens':>13} {'fan-out latency':>16}")
+    with FakeCompletionServer(latency=latency, latency_per_token=latency_per_token) as server:
+        analyst = AnalystAgent(OpenAI(api_key='fake', base_url=server.base_url), token_budget=token_budget)
+        for name, prompts in variants:
+            tokens = sum(estimate_tokens(p) for p in prompts)
+            started = time.perf_counter()
+            analyst.call_openai_api_many([(INSTRUCTION, p) for p in prompts])
+            elapsed = time.perf_counter() - started
+            print(f"{name:<18} {tokens // tickers:>14,} {tokens:>13,} {elapsed:>15.2f}s")
+
+        # The agent itself, end to end
+        started = time.perf_counter()
+        analyst.analyze_stock_data(columnar)
+        print(f"analyze_stock_data: {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tickers', type=int, default=10)
+    parser.add_argument('--days', type=int, default=120)
+    parser.add_argument('--token-budget', type=int, default=300)
+    parser.add_argument('--latency', type=float, default=0.2)
+    parser.add_argument('--latency-per-token', type=float, default=0.0002)
+    args = parser.parse_args()
+    run(args.tickers, args.days, args.token_budget, args.latency, args.latency_per_token)
\ No newline at end of file
@@ -0,0 +1,65 @@
+"""
+CEO scoring with and without streaming against FakeCompletionServer, which generates the evaluation one word
+at a time. The blocking call decides after the whole rubric explanation; the streaming one decides once the
+score on the first line has arrived, and the explanation finishes in the background.
+
+    python benchmarks/bench_ceo_streaming.py --evaluations 5 --explanation-words 300 --per-word 0.005
+"""
+import argparse
+import contextlib
+import os
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from openai import OpenAI
+
+from agents.ceo import CEOAgent
+from benchmarks.fakes import FakeCompletionServer
+
+RECOMMENDATION = "(AAPL, 10, buy)\n(MSFT, 5, buy)"
+
+
+def evaluation_responder(explanation_words):
+    def respond(instruction, prompt):
+        explanation = " ".join(f"reason{i}" for i in range(explanation_words))
+        return f"93\nAlignment with long-term strategy: {explanation}"
+    return respond
+
+
+def run(evaluations, explanation_words, latency, per_word):
+    with FakeCompletionServer(evaluation_responder(explanation_words), latency=latency,
+                              latency_per_output_token=per_word) as server:
+        ceo = CEOAgent(OpenAI(api_key='fake', base_url=server.base_url))
+        results = {}
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            for stream in (False, True):
+                decided = []
+                completed = []
+                for i in range(evaluations):
+                    started = time.perf_counter()
+                    decision, evaluation = ceo.evaluate_recommendations(f"{RECOMMENDATION}\n#{i}", "review",
+                                                                        stream=stream)
+                    decided.append(time.perf_counter() - started)
+                    text = evaluation.result() if stream else evaluation
+                    completed.append(time.perf_counter() - started)
+                    assert decision == 'approve' and text.endswith(f"reason{explanation_words - 1}")
+                results['streaming' if stream else 'blocking'] = (np.median(decided), np.median(completed))
+
+    print(f"{evaluations} evaluations of {explanation_words} explanation words, {latency * 1000:.0f} ms to first "
+          f"token, {per_word * 1000:.1f} ms per word")
+    print(f"{'Mode':<10} {'Decision p50':>13} {'Full text p50':>14}")
+    for mode, (decided, completed) in results.items():
+        print(f"{mode:<10} {decided:>12.3f}s {completed:>13.3f}s")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--evaluations', type=int, default=5)
+    parser.add_argument('--explanation-words', type=int, default=300)
+    parser.add_argument('--latency', type=float, default=0.2, help="Seconds before the first word")
+    parser.add_argument('--per-word', type=float, default=0.005, help="Seconds per generated word")
+    args = parser.parse_args()
+    run(args.evaluations, args.explanation_words, args.latency, args.per_word)
\ No newline at end of file
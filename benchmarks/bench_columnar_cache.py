@@ -0,0 +1,128 @@
+"""
+Loading daily closes for the whole universe: a pandas read + pivot of daily_data against the memory-mapped
+export of database.columnar_cache. Also times the full export, the incremental refresh after new days are
+inserted, and a second process mapping the same files (served from the shared page cache).
+
+    python benchmarks/bench_columnar_cache.py --symbols 2000 --days 1260 --new-days 1
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from database.columnar_cache import ColumnarCache
+from database.db_manager import DatabaseManager, DAILY_DATA_INSERT_SQL, connect, from_day, to_day
+
+# Run in a child process: map the export and sum every close
+CHILD_SCRIPT = '''
+import sys, time
+sys.path.append({root!r})
+from database.columnar_cache import ColumnarCache
+imported = time.perf_counter()
+closes = ColumnarCache({database!r}).load()['close']
+mapped = time.perf_counter()
+import numpy as np
+np.nansum(closes)
+print(mapped - imported, time.perf_counter() - mapped)
+'''
+
+
+def daily_rows(days, symbols, rng):
+    for day in days:
+        date = from_day(day)
+        closes = (100 + rng.normal(0, 1, len(symbols))).tolist()
+        volumes = rng.integers(10 ** 5, 10 ** 7, len(symbols)).tolist()
+        for symbol, close, volume in zip(symbols, closes, volumes):
+            yield date, symbol, close, close, close, close, volume
+
+
+def build(path, symbol_count, day_count, seed=7):
+    rng = np.random.default_rng(seed)
+    symbols = [f"S{i:05d}" for i in range(symbol_count)]
+    # Weekdays only, ending on a fixed date
+    days = np.arange(to_day('2024-12-31') - day_count * 7 // 5 - 7, to_day('2024-12-31') + 1)
+    days = days[((days + 3) % 7) < 5][-day_count:].tolist()
+
+    manager = DatabaseManager(path)
+    manager.create_price_tables()
+    manager.close()
+    conn = connect(path)
+    with conn:
+        conn.executemany(DAILY_DATA_INSERT_SQL, daily_rows(days, symbols, rng))
+    conn.close()
+    return symbols, days, rng
+
+
+def sqlite_closes(path):
+    conn = connect(path)
+    frame = pd.read_sql_query('SELECT day, symbol, close FROM daily_data', conn)
+    conn.close()
+    return frame.pivot(index='day', columns='symbol', values='close').sort_index().to_numpy()
+
+
+def run(symbol_count, day_count, new_days, seed=7):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'prices.db')
+        symbols, days, rng = build(path, symbol_count, day_count, seed)
+        cache = ColumnarCache(path)
+
+        started = time.perf_counter()
+        cache.export()
+        export = time.perf_counter() - started
+
+        # Append new weekdays, then bring the export up to date
+        appended = []
+        day = days[-1]
+        while len(appended) < new_days:
+            day += 1
+            if (day + 3) % 7 < 5:
+                appended.append(day)
+        conn = connect(path)
+        with conn:
+            conn.executemany(DAILY_DATA_INSERT_SQL, daily_rows(appended, symbols, rng))
+        conn.close()
+        started = time.perf_counter()
+        cache.refresh()
+        refresh = time.perf_counter() - started
+
+        started = time.perf_counter()
+        expected = sqlite_closes(path)
+        sqlite_load = time.perf_counter() - started
+
+        started = time.perf_counter()
+        closes = cache.load()['close']
+        mapped = time.perf_counter() - started
+        np.nansum(closes)
+        first_scan = time.perf_counter() - started
+        assert np.array_equal(closes, expected, equal_nan=True)
+
+        child = subprocess.run([sys.executable, '-c', CHILD_SCRIPT.format(
+            root=os.path.dirname(os.path.dirname(os.path.abspath(__file__))), database=path)],
+            capture_output=True, text=True, check=True)
+        child_map, child_scan = (float(value) for value in child.stdout.split())
+        size = sum(os.path.getsize(os.path.join(cache.cache_dir, name)) for name in os.listdir(cache.cache_dir))
+
+    print(f"{symbol_count} symbols x {day_count + new_days} days; export {size / 2 ** 20:.0f} MB on disk")
+    print(f"Full export:                      {export:.2f}s")
+    print(f"Refresh after {new_days} new day(s):         {refresh * 1000:.1f} ms")
+    print(f"SQLite read + pivot of closes:    {sqlite_load * 1000:.1f} ms")
+    print(f"Map closes (zero copy):           {mapped * 1000:.3f} ms")
+    print(f"Map + first full scan:            {first_scan * 1000:.1f} ms")
+    print(f"Other process, map / full scan:   {child_map * 1000:.3f} ms / {child_scan * 1000:.1f} ms")
+    return {'export': export, 'refresh': refresh, 'sqlite': sqlite_load, 'mapped': mapped,
+            'first_scan': first_scan, 'child_map': child_map, 'child_scan': child_scan}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--symbols', type=int, default=2000)
+    parser.add_argument('--days', type=int, default=1260)
+    parser.add_argument('--new-days', type=int, default=1)
+    args = parser.parse_args()
+    run(args.symbols, args.days, args.new_days)
\ No newline at end of file
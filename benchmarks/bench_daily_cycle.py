@@ -0,0 +1,123 @@
+"""
+End-to-end OfficeSimulation.run_daily_cycle with every network service replaced by a local fake: the agents
+talk to FakeCompletionServer over HTTP, prices come from FakeStockRetriever through PriceStore and
+QuoteService, and news from FakeNewsFetcher. Each fake sleeps a configurable latency, so the numbers show
+how the cycle overlaps (or serializes) its waits. Stage latencies come from a tools.tracing.Tracer.
+
+    python benchmarks/bench_daily_cycle.py --cycles 5 --llm-latency 0.2 --data-latency 0.05
+"""
+import argparse
+import contextlib
+import hashlib
+import os
+import re
+import sys
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from openai import OpenAI
+
+from agents.recommendation_parser import RecommendationParser
+from database.db_manager import DatabaseManager
+from models.portfolio import Portfolio
+from office.office_simulation import OfficeSimulation
+from tools.price_store import PriceStore
+from tools.quote_service import QuoteService
+from tools.tracing import Tracer, summarize
+from benchmarks.fakes import FakeCompletionServer, FakeNewsFetcher, FakeStockRetriever
+
+TRIPLET_PATTERN = re.compile(r'\((\w+),\s*(\d+),\s*(buy|sell)\)')
+SYMBOLS = ('AAPL', 'MSFT', 'GOOGL', 'AMZN', 'NVDA', 'META', 'TSLA', 'AVGO', 'COST', 'PEP')
+
+
+def cycle_responder(symbols, filler_words=120, revise=False):
+    """
+    Answers each agent's prompt with just enough structure for the cycle to run through one round: Buffett
+    asks about and buys `symbols`, and the CEO approves. Free-text answers are `filler_words` long.
+
+    :param revise: The CEO asks for one revision first, and Buffett halves his quantities in reply.
+    """
+    def respond(instruction, prompt):
+        if "Which stock symbols (tickers)" in prompt:
+            return "I want price trends for " + ", ".join(symbols) + "."
+        if "output only ticket number" in instruction:
+            return ", ".join(symbols)
+        if "Make a final recommendation" in prompt:
+            quantity = 5 if "CEO's Feedback" in prompt else 10
+            return "\n".join(f"({symbol}, {quantity}, buy)" for symbol in symbols)
+        if "score the recommendation" in instruction:
+            if revise and ", 10, buy)" in prompt:
+                return "70\nThe positions are too large; halve them."
+            return "95\nThe recommendation is approved."
+        if instruction == "Parse stock recommendation":
+            return "\n".join(f"({symbol}, {quantity}, {action})"
+                             for symbol, quantity, action in TRIPLET_PATTERN.findall(prompt))
+        if "generate a search string" in instruction:
+            return "\n".join(f"{symbol} earnings outlook" for symbol in symbols[:3])
+        digest = hashlib.sha256(f"{instruction}\x00{prompt}".encode('utf-8')).hexdigest()
+        return " ".join(digest[i % 56:i % 56 + 8] for i in range(filler_words))
+    return respond
+
+
+def run(cycles, llm_latency, data_latency, news_latency, tickers=5, quiet=True, revise=False):
+    symbols = SYMBOLS[:tickers]
+    data_source = FakeStockRetriever(latency=data_latency)
+    news = FakeNewsFetcher(latency=news_latency)
+    tracer = Tracer(trace_dir=None)
+    records = []
+    durations = []
+
+    with tempfile.TemporaryDirectory() as tmp, \
+            FakeCompletionServer(cycle_responder(symbols, revise=revise), latency=llm_latency) as server:
+        client = OpenAI(api_key='fake', base_url=server.base_url)
+        quote_service = QuoteService(data_source=data_source)
+        price_store = PriceStore(DatabaseManager(os.path.join(tmp, 'prices.db'), check_same_thread=False),
+                                 data_source=data_source)
+        portfolio = Portfolio(10 ** 7, quote_service, report_dir=tmp)
+        office = OfficeSimulation(portfolio, client, price_store=price_store, news_fetcher=news, tracer=tracer,
+                                  recommendation_parser=RecommendationParser(symbols=SYMBOLS))
+
+        with open(os.devnull, 'w') as devnull, \
+                (contextlib.redirect_stdout(devnull) if quiet else contextlib.nullcontext()):
+            for _ in range(cycles):
+                # Each cycle starts cold on quotes, as a new day would
+                quote_service.invalidate()
+                started = time.perf_counter()
+                office.run_daily_cycle()
+                durations.append(time.perf_counter() - started)
+                records.extend(tracer.spans)
+        llm_requests = server.request_count
+        price_store.db.close()
+
+    stages = {name: row for (kind, name), row in summarize(records).items() if kind == 'stage'}
+    durations = np.array(durations)
+    print(f"{cycles} cycles{' with one revision round' if revise else ''}, LLM latency {llm_latency * 1000:.0f} ms, data latency {data_latency * 1000:.0f} ms, "
+          f"news latency {news_latency * 1000:.0f} ms")
+    print(f"Cycle latency: p50 {np.percentile(durations, 50):.3f}s, max {durations.max():.3f}s "
+          f"({llm_requests / cycles:.0f} model requests, {data_source.request_count / cycles:.1f} price "
+          f"requests, {news.request_count / cycles:.0f} news requests per cycle)")
+    print(f"Recommendations parsed without the model: {office.operator.parser.hit_rate():.0%}")
+    print(f"{'Stage':<22} {'p50 ms':>9} {'p95 ms':>9}")
+    for name, row in sorted(stages.items(), key=lambda item: -item[1]['p50_ms']):
+        print(f"{name:<22} {row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f}")
+    return {
+        'cycle_p50': float(np.percentile(durations, 50)),
+        'cycle_max': float(durations.max()),
+        'stages_p50_ms': {name: row['p50_ms'] for name, row in stages.items()}
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--cycles', type=int, default=5)
+    parser.add_argument('--llm-latency', type=float, default=0.2)
+    parser.add_argument('--data-latency', type=float, default=0.05)
+    parser.add_argument('--news-latency', type=float, default=0.1)
+    parser.add_argument('--tickers', type=int, default=5)
+    parser.add_argument('--verbose', action='store_true', help="Show the agents' progress output")
+    parser.add_argument('--revise', action='store_true', help="Have the CEO ask for one revision every day")
+    args = parser.parse_args()
+    run(args.cycles, args.llm_latency, args.data_latency, args.news_latency, args.tickers, quiet=not args.verbose,
+        revise=args.revise)
\ No newline at end of file
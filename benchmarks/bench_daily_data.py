@@ -0,0 +1,124 @@
+"""
+daily_data storage layouts: the original table (date TEXT, PRIMARY KEY (date, symbol)) against the v2
+WITHOUT ROWID table clustered on (symbol, day). Builds a v1 database of synthetic rows, migrates a copy in
+place with database.db_manager.migrate, then times single-symbol range reads and cross-sectional single-day
+reads on both.
+
+    python benchmarks/bench_daily_data.py --symbols 2000 --days 1260 --queries 500
+"""
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from database.db_manager import DatabaseManager, connect, from_day, to_day
+
+# The layout before schema version 2, kept here only to build the starting point of the migration
+V1_DAILY_DATA_TABLE_SQL = '''
+    CREATE TABLE daily_data (
+        date TEXT,
+        symbol TEXT,
+        open REAL,
+        high REAL,
+        low REAL,
+        close REAL,
+        volume INTEGER,
+        PRIMARY KEY (date, symbol)
+    )
+'''
+
+
+def build_v1(path, symbol_count, day_count, seed=7):
+    rng = np.random.default_rng(seed)
+    symbols = [f"S{i:05d}" for i in range(symbol_count)]
+    # Weekdays only, ending on a fixed date
+    days = np.arange(to_day('2024-12-31') - day_count * 7 // 5, to_day('2024-12-31') + 1)
+    days = days[((days + 3) % 7) < 5][-day_count:]
+    dates = days.astype('datetime64[D]').astype('U10').tolist()
+
+    conn = sqlite3.connect(path)
+    conn.execute(V1_DAILY_DATA_TABLE_SQL)
+    with conn:
+        # Inserted day by day, the order the original builder's per-symbol commits interleave into
+        for date in dates:
+            closes = (100 + rng.normal(0, 1, symbol_count)).tolist()
+            volumes = rng.integers(10 ** 5, 10 ** 7, symbol_count).tolist()
+            conn.executemany('INSERT INTO daily_data VALUES (?, ?, ?, ?, ?, ?, ?)',
+                             [(date, symbol, close, close, close, close, volume)
+                              for symbol, close, volume in zip(symbols, closes, volumes)])
+    conn.close()
+    return symbols, days.tolist()
+
+
+def time_queries(run_query, queries):
+    started = time.perf_counter()
+    rows = 0
+    for query in queries:
+        rows += len(run_query(*query))
+    return (time.perf_counter() - started) / len(queries), rows / len(queries)
+
+
+def run(symbol_count, day_count, query_count, seed=7):
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        v1_path = os.path.join(tmp, 'v1.db')
+        v2_path = os.path.join(tmp, 'v2.db')
+        symbols, days = build_v1(v1_path, symbol_count, day_count, seed)
+        shutil.copy(v1_path, v2_path)
+
+        started = time.perf_counter()
+        connect(v2_path).close()
+        migration = time.perf_counter() - started
+
+        # One-year windows for random symbols, and random single days
+        range_queries = []
+        for _ in range(query_count):
+            first = rng.randrange(len(days) - 252)
+            range_queries.append((rng.choice(symbols), from_day(days[first]), from_day(days[first + 251])))
+        day_queries = [(from_day(rng.choice(days)),) for _ in range(query_count)]
+
+        v1 = sqlite3.connect(v1_path)
+
+        def v1_range(symbol, start_date, end_date):
+            return v1.execute('SELECT * FROM daily_data WHERE symbol = ? AND date BETWEEN ? AND ? ORDER BY date',
+                              (symbol, start_date, end_date)).fetchall()
+
+        def v1_day(date):
+            return v1.execute('SELECT * FROM daily_data WHERE date = ? ORDER BY symbol', (date,)).fetchall()
+
+        v2 = DatabaseManager(v2_path)
+        results = {
+            'v1 symbol range': time_queries(v1_range, range_queries),
+            'v2 symbol range': time_queries(v2.get_stock_data, range_queries),
+            'v1 single day': time_queries(v1_day, day_queries),
+            'v2 single day': time_queries(v2.get_day_data, day_queries),
+        }
+        assert v1_range(*range_queries[0]) == v2.get_stock_data(*range_queries[0])
+        assert v1_day(*day_queries[0]) == v2.get_day_data(*day_queries[0])
+        v1.close()
+        v2.close()
+        sizes = {name: os.path.getsize(path) for name, path in (('v1', v1_path), ('v2', v2_path))}
+
+    print(f"{symbol_count} symbols x {day_count} days ({symbol_count * day_count:,} rows), {query_count} queries each")
+    print(f"In-place migration v1 -> v2: {migration:.2f}s; file size {sizes['v1'] / 2 ** 20:.0f} MB -> "
+          f"{sizes['v2'] / 2 ** 20:.0f} MB")
+    print(f"{'query':<18} {'rows/query':>11} {'ms/query':>10}")
+    for name, (seconds, rows) in results.items():
+        print(f"{name:<18} {rows:>11.0f} {seconds * 1000:>10.3f}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--symbols', type=int, default=2000)
+    parser.add_argument('--days', type=int, default=1260)
+    parser.add_argument('--queries', type=int, default=500)
+    args = parser.parse_args()
+    run(args.symbols, args.days, args.queries)
\ No newline at end of file
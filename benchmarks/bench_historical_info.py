@@ -0,0 +1,67 @@
+"""
+Micro-benchmark of the two get_historical_info return modes: per-row dictionaries built with iterrows()
+versus columnar NumPy arrays built with vectorized date formatting.
+
+    python benchmarks/bench_historical_info.py --years 5 --symbols 500
+"""
+import argparse
+import os
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from tools.stockretriever import _frame_to_records, _frame_to_columns, to_daily_rows
+
+
+def make_history_frame(days, seed):
+    """
+    Builds a DataFrame shaped like yfinance's Ticker.history output (tz-aware index, OHLCV columns).
+    """
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(end='2024-10-04', periods=days, tz='America/New_York', name='Date')
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, days)))
+    return pd.DataFrame({
+        'Open': close * (1 + rng.normal(0, 0.005, days)),
+        'High': close * 1.01,
+        'Low': close * 0.99,
+        'Close': close,
+        'Volume': rng.integers(100000, 5000000, days),
+        'Dividends': 0.0,
+        'Stock Splits': 0.0
+    }, index=index)
+
+
+def run(years, symbol_count):
+    frames = [make_history_frame(252 * years, seed) for seed in range(symbol_count)]
+
+    timings = {}
+    for name, convert in (('records', _frame_to_records), ('columnar', _frame_to_columns)):
+        started = time.perf_counter()
+        converted = [convert(frame) for frame in frames]
+        timings[name] = time.perf_counter() - started
+
+        # Time the downstream step too: flattening into daily_data rows for SQLite
+        started = time.perf_counter()
+        for symbol, history in enumerate(converted):
+            to_daily_rows(str(symbol), history)
+        timings[name + ' + rows'] = timings[name] + time.perf_counter() - started
+
+    rows = 252 * years * symbol_count
+    print(f"{years} years x {symbol_count} symbols ({rows} rows)")
+    print(f"{'Mode':<18} {'Seconds':>9} {'Rows/s':>12}")
+    for name, elapsed in timings.items():
+        print(f"{name:<18} {elapsed:>9.3f} {rows / elapsed:>12.0f}")
+    print(f"Columnar speed-up: {timings['records'] / timings['columnar']:.1f}x "
+          f"(end to end {timings['records + rows'] / timings['columnar + rows']:.1f}x)")
+    return timings
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--years', type=int, default=5)
+    parser.add_argument('--symbols', type=int, default=500)
+    args = parser.parse_args()
+    run(args.years, args.symbols)
\ No newline at end of file
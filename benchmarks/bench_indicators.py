@@ -0,0 +1,89 @@
+"""
+IndicatorEngine over a FakeStockRetriever database: a full rebuild of five years of history versus the
+incremental update after new days are appended, and a check that both give the same values.
+
+    python benchmarks/bench_indicators.py --symbols 500 --new-days 1
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from database.build_database import DatabaseBuilder, SYMBOLS_FILE_PATH
+from database.db_manager import from_day
+from database.indicators import IndicatorEngine, INDICATOR_COLUMNS
+from benchmarks.fakes import FakeStockRetriever
+
+
+def build(tmp, symbol_count):
+    with open(SYMBOLS_FILE_PATH) as file:
+        symbols = [line.strip() for line in file if line.strip()][:symbol_count]
+    symbols_path = os.path.join(tmp, 'symbols.txt')
+    with open(symbols_path, 'w') as file:
+        file.write("\n".join(symbols))
+    database_path = os.path.join(tmp, 'full.db')
+    builder = DatabaseBuilder(database_path, symbols_path, FakeStockRetriever())
+    builder.create_tables()
+    builder.populate_database_concurrent(requests_per_second=1000.0)
+    builder.close()
+    return database_path
+
+
+def read_indicators(database_path):
+    conn = sqlite3.connect(database_path)
+    frame = pd.read_sql_query('SELECT * FROM indicators ORDER BY symbol, date', conn)
+    conn.close()
+    return frame
+
+
+def run(symbol_count, new_days):
+    with tempfile.TemporaryDirectory() as tmp:
+        full_path = build(tmp, symbol_count)
+
+        engine = IndicatorEngine(full_path)
+        started = time.perf_counter()
+        full_rows = engine.rebuild()
+        full = time.perf_counter() - started
+        engine.close()
+
+        # Same prices, but the newest days arrive after the indicators were computed
+        incremental_path = os.path.join(tmp, 'incremental.db')
+        shutil.copy(full_path, incremental_path)
+        conn = sqlite3.connect(incremental_path)
+        cutoff = conn.execute('SELECT DISTINCT day FROM daily_data ORDER BY day DESC LIMIT 1 OFFSET ?',
+                              (new_days - 1,)).fetchone()[0]
+        with conn:
+            conn.execute('DELETE FROM indicators WHERE date >= ?', (from_day(cutoff),))
+        conn.close()
+
+        engine = IndicatorEngine(incremental_path)
+        started = time.perf_counter()
+        incremental_rows = engine.update()
+        incremental = time.perf_counter() - started
+        engine.close()
+
+        expected, actual = read_indicators(full_path), read_indicators(incremental_path)
+        difference = max(np.nanmax(np.abs(expected[c].to_numpy(dtype=float) - actual[c].to_numpy(dtype=float)))
+                         for c in INDICATOR_COLUMNS)
+        assert difference < 1e-9, f"Incremental update differs from a full rebuild by {difference}"
+
+    print(f"{symbol_count} symbols")
+    print(f"Full rebuild:        {full_rows:>10,} rows in {full:6.2f}s")
+    print(f"Update ({new_days} new days): {incremental_rows:>10,} rows in {incremental:6.2f}s "
+          f"({full / incremental:.0f}x faster)")
+    print(f"Largest difference from the full rebuild: {difference:.2e}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--symbols', type=int, default=500)
+    parser.add_argument('--new-days', type=int, default=1)
+    args = parser.parse_args()
+    run(args.symbols, args.new_days)
\ No newline at end of file
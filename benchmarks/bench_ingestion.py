@@ -0,0 +1,130 @@
+"""
+Compares the sequential and concurrent DatabaseBuilder ingestion paths against FakeStockRetriever,
+then times an incremental update_database refresh after trimming the most recent days, and checks that a
+refresh whose batch fails leaves those symbols to be picked up by the next one.
+
+    python benchmarks/bench_ingestion.py --symbols 200 --latency 0.05
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.build_database import DatabaseBuilder, SYMBOLS_FILE_PATH
+from benchmarks.fakes import FakeStockRetriever
+
+
+def run(symbol_count, latency, workers, batch_size, rate):
+    with open(SYMBOLS_FILE_PATH) as file:
+        symbols = [line.strip() for line in file if line.strip()][:symbol_count]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        symbols_path = os.path.join(tmp, 'symbols.txt')
+        with open(symbols_path, 'w') as file:
+            file.write("\n".join(symbols))
+
+        results = {}
+        for mode in ('sequential', 'concurrent'):
+            database_path = os.path.join(tmp, f'{mode}.db')
+            builder = DatabaseBuilder(database_path, symbols_path, FakeStockRetriever(latency=latency))
+            builder.create_tables()
+            if mode == 'sequential':
+                started = time.perf_counter()
+                builder.populate_database()
+                builder.conn.commit()
+                elapsed = time.perf_counter() - started
+            else:
+                stats = builder.populate_database_concurrent(workers=workers, batch_size=batch_size,
+                                                             requests_per_second=rate)
+                elapsed = stats['elapsed']
+            builder.close()
+
+            conn = sqlite3.connect(database_path)
+            stock_count = conn.execute('SELECT COUNT(*) FROM stocks').fetchone()[0]
+            row_count = conn.execute('SELECT COUNT(*) FROM daily_data').fetchone()[0]
+            conn.close()
+            results[mode] = (stock_count, row_count, elapsed)
+
+        refresh = refresh_after_trim(database_path, symbols_path, latency)
+        failure = refresh_with_failure(database_path, symbols_path, symbols[0], batch_size)
+
+    print(f"{'Mode':<12} {'Symbols':>8} {'Rows':>10} {'Seconds':>9} {'Symbols/s':>10} {'Rows/s':>10}")
+    for mode, (stock_count, row_count, elapsed) in results.items():
+        print(f"{mode:<12} {stock_count:>8} {row_count:>10} {elapsed:>9.2f} "
+              f"{stock_count / elapsed:>10.1f} {row_count / elapsed:>10.0f}")
+
+    # Both paths must produce the same database contents
+    assert results['sequential'][:2] == results['concurrent'][:2], "Ingestion modes disagree"
+
+    trimmed, restored, requests, elapsed = refresh
+    print(f"\nRefresh: restored {restored}/{trimmed} trimmed rows with {requests} requests in {elapsed:.2f}s")
+
+    trimmed, restored, retried = failure
+    print(f"Refresh with a failed batch: restored {restored}/{trimmed} trimmed rows, {retried}/{trimmed} "
+          f"after retrying")
+    assert restored < trimmed, "Failed batch was not left out of the refresh"
+    assert retried == trimmed, "Retry did not restore the symbols of the failed batch"
+    return results
+
+
+def refresh_after_trim(database_path, symbols_path, latency, days=1):
+    """
+    Deletes the latest `days` trading days from a built database and times update_database bringing it back.
+    """
+    conn = sqlite3.connect(database_path)
+    cutoff = conn.execute('SELECT DISTINCT day FROM daily_data ORDER BY day DESC LIMIT 1 OFFSET ?',
+                          (days - 1,)).fetchone()[0]
+    with conn:
+        trimmed = conn.execute('DELETE FROM daily_data WHERE day >= ?', (cutoff,)).rowcount
+    conn.close()
+
+    source = FakeStockRetriever(latency=latency)
+    builder = DatabaseBuilder(database_path, symbols_path, source)
+    started = time.perf_counter()
+    builder.update_database(update_indicators=False)
+    elapsed = time.perf_counter() - started
+    builder.close()
+
+    conn = sqlite3.connect(database_path)
+    restored = conn.execute('SELECT COUNT(*) FROM daily_data WHERE day >= ?', (cutoff,)).fetchone()[0]
+    conn.close()
+    return trimmed, restored, source.request_count, elapsed
+
+
+def refresh_with_failure(database_path, symbols_path, failing_symbol, batch_size, days=1):
+    """
+    Trims the latest `days` trading days again and refreshes with a source whose batch holding
+    `failing_symbol` fails, then once more with a healthy source.
+
+    :return: (trimmed rows, rows restored despite the failure, rows restored after the retry)
+    """
+    conn = sqlite3.connect(database_path)
+    cutoff = conn.execute('SELECT DISTINCT day FROM daily_data ORDER BY day DESC LIMIT 1 OFFSET ?',
+                          (days - 1,)).fetchone()[0]
+    with conn:
+        trimmed = conn.execute('DELETE FROM daily_data WHERE day >= ?', (cutoff,)).rowcount
+    conn.close()
+
+    restored = []
+    for source in (FakeStockRetriever(fail_symbols=[failing_symbol]), FakeStockRetriever()):
+        builder = DatabaseBuilder(database_path, symbols_path, source)
+        builder.update_database(batch_size=batch_size, update_indicators=False)
+        builder.close()
+        conn = sqlite3.connect(database_path)
+        restored.append(conn.execute('SELECT COUNT(*) FROM daily_data WHERE day >= ?', (cutoff,)).fetchone()[0])
+        conn.close()
+    return (trimmed, *restored)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--symbols', type=int, default=100)
+    parser.add_argument('--latency', type=float, default=0.02)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--batch-size', type=int, default=50)
+    parser.add_argument('--rate', type=float, default=200.0)
+    args = parser.parse_args()
+    run(args.symbols, args.latency, args.workers, args.batch_size, args.rate)
\ No newline at end of file
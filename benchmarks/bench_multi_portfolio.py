@@ -0,0 +1,79 @@
+"""
+Throughput of office.multi_runner.MultiPortfolioRunner as the number of portfolios grows. Every office talks
+to the same FakeCompletionServer and shares the fake price and news sources, so the price request counts
+show how much the shared QuoteService and PriceStore absorb. A trailing "separate" row runs the largest N
+as independent single-office runners, as one process per portfolio would.
+
+    python benchmarks/bench_multi_portfolio.py --portfolios 1 2 4 8 --llm-latency 0.2
+"""
+import argparse
+import contextlib
+import os
+import sys
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openai import OpenAI
+
+from database.db_manager import DatabaseManager
+from office.multi_runner import MultiPortfolioRunner, PortfolioConfig
+from tools.price_store import PriceStore
+from tools.quote_service import QuoteService
+from benchmarks.bench_daily_cycle import SYMBOLS, cycle_responder
+from benchmarks.fakes import FakeCompletionServer, FakeNewsFetcher, FakeStockRetriever
+
+
+def run_day(count, client, data_source, news, tmp, tag):
+    price_store = PriceStore(DatabaseManager(os.path.join(tmp, f'prices_{tag}.db'), check_same_thread=False),
+                             data_source=data_source)
+    configs = [PortfolioConfig(f'{tag}_{i}', initial_cash=10 ** 6 * (i + 1), persist=False) for i in range(count)]
+    runner = MultiPortfolioRunner(configs, client, quote_service=QuoteService(data_source=data_source),
+                                  price_store=price_store, news_fetcher=news, report_root=tmp)
+    results = runner.run_day()
+    price_store.db.close()
+    failed = [name for name, result in results.items() if isinstance(result, Exception)]
+    if failed:
+        raise RuntimeError(f"Portfolios {failed} failed: {results[failed[0]]!r}")
+    return runner.day_durations[-1][1]
+
+
+def run(portfolio_counts, llm_latency, data_latency, news_latency):
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp, \
+            FakeCompletionServer(cycle_responder(SYMBOLS[:5]), latency=llm_latency) as server, \
+            open(os.devnull, 'w') as devnull:
+        client = OpenAI(api_key='fake', base_url=server.base_url)
+        for count in portfolio_counts:
+            data_source = FakeStockRetriever(latency=data_latency)
+            news = FakeNewsFetcher(latency=news_latency)
+            with contextlib.redirect_stdout(devnull):
+                seconds = run_day(count, client, data_source, news, tmp, f'shared{count}')
+            rows.append((f'{count} shared', count, seconds, data_source.request_count))
+
+        # The same portfolios one after another, each with its own caches
+        count = max(portfolio_counts)
+        data_source = FakeStockRetriever(latency=data_latency)
+        news = FakeNewsFetcher(latency=news_latency)
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(devnull):
+            for i in range(count):
+                run_day(1, client, data_source, news, tmp, f'separate{i}')
+        rows.append((f'{count} separate', count, time.perf_counter() - started, data_source.request_count))
+
+    print(f"LLM latency {llm_latency * 1000:.0f} ms, data latency {data_latency * 1000:.0f} ms, "
+          f"news latency {news_latency * 1000:.0f} ms")
+    print(f"{'Portfolios':<13} {'Day s':>7} {'Portfolios/hour':>16} {'Price requests':>15}")
+    for label, count, seconds, price_requests in rows:
+        print(f"{label:<13} {seconds:>7.2f} {count / seconds * 3600:>16.0f} {price_requests:>15}")
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--portfolios', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--llm-latency', type=float, default=0.2)
+    parser.add_argument('--data-latency', type=float, default=0.05)
+    parser.add_argument('--news-latency', type=float, default=0.1)
+    args = parser.parse_args()
+    run(args.portfolios, args.llm_latency, args.data_latency, args.news_latency)
\ No newline at end of file
@@ -0,0 +1,68 @@
+"""
+Portfolio bookkeeping at scale: ledger mutation throughput, get_performance_report and
+generate_ledger_report with 1M transactions over 5,000 holdings.
+
+    python benchmarks/bench_portfolio.py --transactions 1000000 --holdings 5000
+"""
+import argparse
+import datetime
+import os
+import random
+import sys
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.portfolio import Portfolio
+from tools.quote_service import QuoteService
+from benchmarks.fakes import FakeStockRetriever
+
+
+def run(transactions, holdings, seed=7):
+    rng = random.Random(seed)
+    symbols = [f"S{i:05d}" for i in range(holdings)]
+    start = datetime.date(2015, 1, 1)
+
+    with tempfile.TemporaryDirectory() as report_dir:
+        portfolio = Portfolio(1e12, QuoteService(data_source=FakeStockRetriever()), report_dir=report_dir)
+
+        started = time.perf_counter()
+        # Every symbol is bought once so all of them end up held; the rest is a random mix of buys and sells
+        for i, symbol in enumerate(symbols):
+            portfolio.buy_stock(symbol, 100, rng.uniform(10, 500), start + datetime.timedelta(days=i % 3000))
+        for i in range(transactions - holdings):
+            symbol = symbols[rng.randrange(holdings)]
+            day = start + datetime.timedelta(days=rng.randrange(3000))
+            if rng.random() < 0.3 and portfolio.holdings[symbol].quantity > 1:
+                portfolio.sell_stock(symbol, 1, rng.uniform(10, 500), day)
+            else:
+                portfolio.buy_stock(symbol, rng.randint(1, 10), rng.uniform(10, 500), day)
+        mutate = time.perf_counter() - started
+
+        started = time.perf_counter()
+        portfolio.get_performance_report()
+        performance = time.perf_counter() - started
+
+        started = time.perf_counter()
+        portfolio.generate_ledger_report()
+        ledger = time.perf_counter() - started
+
+        # What the old report paid per holding: one full ledger scan for the first purchase date
+        started = time.perf_counter()
+        min(t.date for t in portfolio.ledger if t.symbol == symbols[0] and t.type == 'buy')
+        legacy_scan = time.perf_counter() - started
+
+    print(f"{len(portfolio.ledger)} transactions, {len(portfolio.holdings)} holdings")
+    print(f"Ledger mutations:        {mutate:8.2f}s ({len(portfolio.ledger) / mutate:,.0f} transactions/sec)")
+    print(f"get_performance_report:  {performance:8.3f}s")
+    print(f"generate_ledger_report:  {ledger:8.3f}s")
+    print(f"(old per-holding ledger rescans alone would take ~{legacy_scan * len(portfolio.holdings):,.0f}s)")
+    return mutate, performance, ledger
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--transactions', type=int, default=1000000)
+    parser.add_argument('--holdings', type=int, default=5000)
+    args = parser.parse_args()
+    run(args.transactions, args.holdings)
\ No newline at end of file
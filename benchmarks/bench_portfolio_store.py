@@ -0,0 +1,81 @@
+"""
+Durable portfolio state: append throughput into PortfolioStore, and startup time of Portfolio.load (latest
+snapshot plus tail) against a full replay of the ledger, as the ledger grows.
+
+    python benchmarks/bench_portfolio_store.py --transactions 200000 --holdings 500 --snapshot-every 1000
+"""
+import argparse
+import datetime
+import os
+import random
+import sys
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.portfolio import Portfolio, Transaction
+from models.portfolio_store import PortfolioStore
+from tools.quote_service import QuoteService
+from benchmarks.fakes import FakeStockRetriever
+
+
+def trade(portfolio, rng, symbols, count, start):
+    for _ in range(count):
+        symbol = symbols[rng.randrange(len(symbols))]
+        day = start + datetime.timedelta(days=rng.randrange(3000))
+        holding = portfolio.holdings.get(symbol)
+        if holding is not None and holding.quantity > 1 and rng.random() < 0.3:
+            portfolio.sell_stock(symbol, 1, rng.uniform(10, 500), day)
+        else:
+            portfolio.buy_stock(symbol, rng.randint(1, 10), rng.uniform(10, 500), day)
+
+
+def state(portfolio):
+    return (portfolio.cash_cents, {s: (h.quantity, h.cost_cents) for s, h in portfolio.holdings.items()},
+            portfolio.first_purchase)
+
+
+def run(transactions, holdings, snapshot_every, steps=4, seed=7):
+    rng = random.Random(seed)
+    symbols = [f"S{i:05d}" for i in range(holdings)]
+    start = datetime.date(2015, 1, 1)
+    quotes = QuoteService(data_source=FakeStockRetriever())
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'portfolio.db')
+        portfolio = Portfolio(1e12, quotes, report_dir=directory,
+                              store=PortfolioStore(path, snapshot_every=snapshot_every))
+
+        print(f"{'ledger size':>12} {'append/sec':>12} {'load (snapshot + tail)':>24} {'full replay':>12}")
+        for step in range(1, steps + 1):
+            count = transactions // steps
+            started = time.perf_counter()
+            trade(portfolio, rng, symbols, count, start)
+            append_rate = count / (time.perf_counter() - started)
+
+            # A fresh connection, as after a restart
+            started = time.perf_counter()
+            loaded = Portfolio.load(PortfolioStore(path, snapshot_every=snapshot_every), quote_service=quotes,
+                                    report_dir=directory)
+            load_time = time.perf_counter() - started
+            assert state(loaded) == state(portfolio)
+            loaded.store.close()
+
+            started = time.perf_counter()
+            replay = Portfolio(1e12, quotes, report_dir=directory)
+            for row in portfolio.store.iter_transactions():
+                replay._apply(Transaction(*row))
+            replay_time = time.perf_counter() - started
+            assert state(replay) == state(portfolio)
+
+            print(f"{len(portfolio.store):>12,} {append_rate:>12,.0f} {load_time:>23.3f}s {replay_time:>11.3f}s")
+        portfolio.store.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--transactions', type=int, default=200000)
+    parser.add_argument('--holdings', type=int, default=500)
+    parser.add_argument('--snapshot-every', type=int, default=1000)
+    args = parser.parse_args()
+    run(args.transactions, args.holdings, args.snapshot_every)
\ No newline at end of file
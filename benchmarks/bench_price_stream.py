@@ -0,0 +1,76 @@
+"""
+Per-tick cost of keeping a large book marked to market: tools.price_stream.MarkToMarket's incremental update
+against re-pricing every holding on each tick (what calling Portfolio.get_performance_report per update
+would amount to, without its formatting and file write).
+
+    python benchmarks/bench_price_stream.py --holdings 1000 --ticks 200000
+"""
+import argparse
+import datetime
+import os
+import sys
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from models.portfolio import Portfolio, to_cents
+from tools.price_stream import MarkToMarket, PriceTick
+
+
+def build(holdings, ticks, seed=7):
+    rng = np.random.default_rng(seed)
+    symbols = [f"S{i:05d}" for i in range(holdings)]
+    portfolio = Portfolio(10 ** 9, report_dir=tempfile.gettempdir())
+    day = datetime.date(2024, 1, 2)
+    for symbol in symbols:
+        portfolio.buy_stock(symbol, int(rng.integers(1, 500)), float(rng.uniform(10, 500)), day)
+
+    start = datetime.datetime(2024, 1, 2, 9, 30)
+    prices = dict(zip(symbols, rng.uniform(10, 500, holdings)))
+    stream = []
+    for i, index in enumerate(rng.integers(0, holdings, ticks)):
+        symbol = symbols[index]
+        prices[symbol] *= 1 + rng.normal(0, 0.001)
+        stream.append(PriceTick(symbol, float(prices[symbol]), start + datetime.timedelta(milliseconds=i)))
+    return portfolio, stream
+
+
+def full_revaluation(portfolio, marks, tick):
+    marks[tick.symbol] = to_cents(tick.price)
+    return portfolio.cash_cents + sum(holding.quantity * marks.get(symbol, holding.cost_cents // holding.quantity)
+                                      for symbol, holding in portfolio.holdings.items())
+
+
+def run(holdings, ticks, full_ticks):
+    portfolio, stream = build(holdings, ticks)
+    engine = MarkToMarket(portfolio)
+
+    started = time.perf_counter()
+    engine.consume(stream)
+    incremental = (time.perf_counter() - started) / ticks
+
+    marks = {}
+    started = time.perf_counter()
+    for tick in stream[:full_ticks]:
+        full_revaluation(portfolio, marks, tick)
+    full = (time.perf_counter() - started) / full_ticks
+
+    # Both must agree once every symbol has been marked
+    marks.update(engine.marks)
+    assert full_revaluation(portfolio, marks, stream[-1]) == engine.nav_cents()
+
+    print(f"{holdings} holdings, {ticks} ticks")
+    print(f"Incremental MarkToMarket:   {incremental * 1e6:>9.2f} us/tick ({1 / incremental:,.0f} ticks/s)")
+    print(f"Full revaluation per tick:  {full * 1e6:>9.2f} us/tick ({1 / full:,.0f} ticks/s)")
+    return incremental, full
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--holdings', type=int, default=1000)
+    parser.add_argument('--ticks', type=int, default=200000)
+    parser.add_argument('--full-ticks', type=int, default=2000, help="Ticks timed with full revaluation")
+    args = parser.parse_args()
+    run(args.holdings, args.ticks, args.full_ticks)
\ No newline at end of file
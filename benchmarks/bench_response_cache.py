@@ -0,0 +1,80 @@
+"""
+Checks and times the Agent response cache against FakeCompletionServer: repeated prompts must be served
+from disk without reaching the server, TTL expiry and LRU eviction must force fresh requests, and an agent
+with caching disabled must always go to the server.
+
+    python benchmarks/bench_response_cache.py --latency 0.2
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openai import OpenAI
+
+from agents.agent import Agent
+from agents.response_cache import ResponseCache
+from benchmarks.fakes import FakeCompletionServer, echo_responder
+
+
+def run(latency, prompts):
+    with tempfile.TemporaryDirectory() as tmp, FakeCompletionServer(latency=latency) as server:
+        client = OpenAI(api_key='fake', base_url=server.base_url)
+        cache = ResponseCache(os.path.join(tmp, 'cache.db'), ttl_seconds=3600, max_entries=prompts)
+        agent = Agent(client=client, cache=cache)
+
+        started = time.perf_counter()
+        cold = [agent.call_openai_api("instruction", f"prompt {i}") for i in range(prompts)]
+        cold_elapsed = time.perf_counter() - started
+
+        started = time.perf_counter()
+        warm = [agent.call_openai_api("instruction", f"prompt {i}") for i in range(prompts)]
+        warm_elapsed = time.perf_counter() - started
+
+        assert cold == warm == [echo_responder("instruction", f"prompt {i}") for i in range(prompts)]
+        assert server.request_count == prompts, server.request_count
+        assert (agent.cache_hits, agent.cache_misses) == (prompts, prompts)
+
+        # A new model name changes the key
+        agent.model = "gpt-4o-mini"
+        agent.call_openai_api("instruction", "prompt 0")
+        assert server.request_count == prompts + 1
+        agent.model = "gpt-4o"
+
+        # That extra entry pushed the cache past max_entries, evicting the least recently used one: "prompt 0",
+        # the first prompt re-read by the warm pass
+        assert len(cache) == prompts
+        before = server.request_count
+        agent.call_openai_api("instruction", "prompt 0")
+        assert server.request_count == before + 1, "evicted entry should have been refetched"
+
+        # Expired entries are refetched
+        cache.ttl_seconds = 0
+        time.sleep(0.01)
+        before = server.request_count
+        agent.call_openai_api("instruction", "prompt 2")
+        assert server.request_count == before + 1, "expired entry should have been refetched"
+
+        # A second agent sharing the cache but with caching disabled always calls the server
+        uncached = Agent(client=client, cache=cache)
+        uncached.disable_cache()
+        before = server.request_count
+        uncached.call_openai_api("instruction", "prompt 3")
+        uncached.call_openai_api("instruction", "prompt 3")
+        assert server.request_count == before + 2 and uncached.cache_hits == 0
+        cache.close()
+
+    print(f"{prompts} prompts, {latency:.2f}s server latency")
+    print(f"Cold (all misses): {cold_elapsed:.3f}s")
+    print(f"Warm (all hits):   {warm_elapsed:.3f}s ({cold_elapsed / warm_elapsed:.0f}x faster)")
+    print(f"Hits/misses: {agent.cache_hits}/{agent.cache_misses}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--prompts', type=int, default=20)
+    args = parser.parse_args()
+    run(args.latency, args.prompts)
\ No newline at end of file
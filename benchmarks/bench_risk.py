@@ -0,0 +1,75 @@
+"""
+models.risk.RiskModel over a synthetic universe: building the return window and cross products from
+daily_data (SQLite and the columnar export), folding in one new day incrementally, and the per-report cost
+of portfolio_risk for a book of holdings.
+
+    python benchmarks/bench_risk.py --symbols 3000 --days 300 --holdings 50
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from database.columnar_cache import ColumnarCache
+from database.db_manager import DAILY_DATA_INSERT_SQL, connect, from_day
+from models.risk import RiskModel
+from benchmarks.bench_columnar_cache import build, daily_rows
+
+
+def timed(function, *args, **kwargs):
+    started = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+def run(symbol_count, day_count, holdings, seed=7):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'prices.db')
+        symbols, days, rng = build(path, symbol_count, day_count, seed)
+        values = {symbol: float(value) for symbol, value in
+                  zip(rng.choice(symbols, holdings, replace=False), rng.uniform(1e3, 1e5, holdings))}
+        nav = sum(values.values()) * 1.25
+
+        _, sqlite_build = timed(RiskModel(path).refresh)
+        ColumnarCache(path).export()
+        model = RiskModel(path)
+        _, columnar_build = timed(model.refresh)
+        _, report = timed(model.portfolio_risk, values, nav)
+
+        # One more weekday of closes, as update_database would add
+        day = days[-1] + 1
+        while (day + 3) % 7 >= 5:
+            day += 1
+        conn = connect(path)
+        with conn:
+            conn.executemany(DAILY_DATA_INSERT_SQL, daily_rows([day], symbols, rng))
+        conn.close()
+        ColumnarCache(path).refresh()
+        _, incremental = timed(model.refresh)
+
+        # The incremental window must match one built from scratch
+        fresh = RiskModel(path)
+        fresh.refresh()
+        assert np.allclose(model.covariance(), fresh.covariance())
+
+    print(f"{symbol_count} symbols x {day_count} days, {holdings} holdings, window {model.window} "
+          f"(last day {from_day(day)})")
+    print(f"Build from SQLite:         {sqlite_build * 1000:>8.1f} ms")
+    print(f"Build from columnar cache: {columnar_build * 1000:>8.1f} ms")
+    print(f"Fold in one new day:       {incremental * 1000:>8.1f} ms")
+    print(f"portfolio_risk:            {report * 1000:>8.1f} ms")
+    return {'sqlite_build': sqlite_build, 'columnar_build': columnar_build, 'incremental': incremental,
+            'report': report}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--symbols', type=int, default=3000)
+    parser.add_argument('--days', type=int, default=300)
+    parser.add_argument('--holdings', type=int, default=50)
+    args = parser.parse_args()
+    run(args.symbols, args.days, args.holdings)
\ No newline at end of file
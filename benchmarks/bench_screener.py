@@ -0,0 +1,59 @@
+"""
+Fundamental screens over the whole NASDAQ symbol list: fills the fundamentals table through
+DatabaseBuilder.update_fundamentals with FakeStockRetriever, then times typical Screener queries.
+
+    python benchmarks/bench_screener.py --repeat 200
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.build_database import DatabaseBuilder, SYMBOLS_FILE_PATH
+from database.screener import Screener, VALUE_SCREEN, format_shortlist
+from benchmarks.fakes import FakeStockRetriever
+
+SCREENS = {
+    'value (P/E < 15, cap > $10B, by yield)': VALUE_SCREEN,
+    'sector = Technology, by market cap': {'sector': 'Technology', 'order_by': 'market_cap'},
+    'yield >= 4%, cap > $1B, by P/E asc': {'min_dividend_yield': 0.04, 'min_market_cap': 1e9,
+                                            'order_by': 'pe_ratio', 'descending': False},
+    'full ranking, no filter': {'order_by': 'dividend_yield', 'limit': None},
+}
+
+
+def run(repeat):
+    with tempfile.TemporaryDirectory() as tmp:
+        database_path = os.path.join(tmp, 'screener.db')
+        builder = DatabaseBuilder(database_path, SYMBOLS_FILE_PATH, FakeStockRetriever())
+        builder.create_tables()
+        symbols = builder.get_nasdaq_symbols()
+        with builder.conn:
+            builder.conn.executemany('INSERT OR REPLACE INTO stocks VALUES (?, ?)', [(s, s) for s in symbols])
+        started = time.perf_counter()
+        builder.update_fundamentals(requests_per_second=100000.0)
+        fill = time.perf_counter() - started
+        builder.close()
+
+        screener = Screener(database_path)
+        print(f"{len(symbols)} symbols, fundamentals filled in {fill:.2f}s")
+        print(f"{'screen':<42} {'matches':>8} {'ms/query':>9}")
+        for name, criteria in SCREENS.items():
+            started = time.perf_counter()
+            for _ in range(repeat):
+                rows = screener.screen(**criteria)
+            elapsed = (time.perf_counter() - started) / repeat
+            print(f"{name:<42} {len(rows):>8} {elapsed * 1000:>9.3f}")
+
+        print("\nValue shortlist (top 5):")
+        print(format_shortlist(screener.screen(**dict(VALUE_SCREEN, limit=5))))
+        screener.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+    run(args.repeat)
\ No newline at end of file
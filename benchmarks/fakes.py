@@ -0,0 +1,292 @@
+"""
+Local, deterministic stand-ins for the network services the pipeline talks to.
+They let benchmarks (and anyone poking at the code offline) run without API keys or rate limits.
+"""
+import hashlib
+import json
+import random
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+
+def _to_date(value):
+    if isinstance(value, str):
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+def _seed(symbol):
+    # crc32 rather than hash(): stable across processes, so runs are reproducible
+    return zlib.crc32(symbol.encode('utf-8'))
+
+
+class FakeStockRetriever:
+    """
+    Drop-in replacement for the tools.stockretriever module.
+    Generates a reproducible random walk per symbol on weekdays and sleeps `latency` seconds per request.
+    """
+
+    def __init__(self, latency=0.0, batch_latency=None, fail_symbols=()):
+        """
+        :param latency: Simulated round-trip time of a single-symbol request, in seconds.
+        :param batch_latency: Simulated round-trip time of a multi-ticker request. Defaults to `latency`.
+        :param fail_symbols: Symbols whose history requests fail, together with the whole batch they are in.
+                             Like the real module, a failed request raises with raise_errors and otherwise
+                             returns empty history.
+        """
+        self.latency = latency
+        self.batch_latency = latency if batch_latency is None else batch_latency
+        self.fail_symbols = frozenset(fail_symbols)
+        self.request_count = 0
+
+    def _sleep(self, seconds):
+        self.request_count += 1
+        if seconds:
+            time.sleep(seconds)
+
+    def _price_path(self, symbol, start_date, end_date):
+        start_date = _to_date(start_date)
+        end_date = _to_date(end_date)
+        # Walk from a fixed origin so overlapping ranges agree on their prices
+        origin = datetime(2000, 1, 3).date()
+        rng = random.Random(_seed(symbol))
+        price = rng.uniform(10, 500)
+        day = origin
+        rows = []
+        while day < end_date:
+            if day.weekday() < 5:
+                change = rng.gauss(0.0003, 0.02)
+                volume = rng.randint(100000, 5000000)
+                open_price = price
+                price = max(1.0, price * (1 + change))
+                if day >= start_date:
+                    rows.append({
+                        'Date': day.strftime('%Y-%m-%d'),
+                        'Open': open_price,
+                        'High': max(open_price, price) * 1.01,
+                        'Low': min(open_price, price) * 0.99,
+                        'Close': price,
+                        'Volume': volume
+                    })
+            day += timedelta(days=1)
+        return rows
+
+    def get_current_info(self, symbols):
+        for _ in symbols:
+            self._sleep(self.latency)
+        return self._current_info(symbols)
+
+    def _current_info(self, symbols):
+        results = []
+        for symbol in symbols:
+            rng = random.Random(_seed(symbol))
+            results.append({
+                'symbol': symbol,
+                'longName': f"{symbol} Holdings Inc.",
+                'currentPrice': round(rng.uniform(10, 500), 2),
+                'marketCap': rng.randint(10 ** 8, 10 ** 12),
+                'peRatio': round(rng.uniform(5, 60), 2),
+                'volume': rng.randint(100000, 5000000),
+                'averageVolume': rng.randint(100000, 5000000),
+                'dividendYield': round(rng.uniform(0, 0.06), 4),
+                'sector': rng.choice(['Technology', 'Healthcare', 'Financial Services', 'Energy']),
+                'industry': 'N/A'
+            })
+        return results
+
+    def get_current_prices(self, symbols):
+        self._sleep(self.batch_latency)
+        return {info['symbol']: info['currentPrice'] for info in self._current_info(symbols)}
+
+    def _history(self, symbol, start_date, end_date, columnar):
+        rows = self._price_path(symbol, start_date, end_date)
+        if not columnar:
+            return rows
+        columns = {'Date': np.array([row['Date'] for row in rows], dtype='U10')}
+        for field in ('Open', 'High', 'Low', 'Close'):
+            columns[field] = np.array([row[field] for row in rows], dtype=np.float64)
+        columns['Volume'] = np.array([row['Volume'] for row in rows], dtype=np.int64)
+        return columns
+
+    def _failed(self, symbols, raise_errors):
+        failed = self.fail_symbols.intersection(symbols)
+        if failed and raise_errors:
+            raise ConnectionError(f"Simulated failure fetching {sorted(failed)}")
+        return bool(failed)
+
+    def get_historical_info(self, symbol, start_date, end_date, columnar=False, raise_errors=False):
+        self._sleep(self.latency)
+        if self._failed([symbol], raise_errors):
+            return self._history(symbol, end_date, end_date, columnar)
+        return self._history(symbol, start_date, end_date, columnar)
+
+    def get_historical_info_batch(self, symbols, start_date, end_date, columnar=False, raise_errors=False):
+        self._sleep(self.batch_latency)
+        if self._failed(symbols, raise_errors):
+            return {}
+        return {symbol: self._history(symbol, start_date, end_date, columnar) for symbol in symbols}
+
+
+class FakeNewsFetcher:
+    """
+    Stand-in for tools.news_fetcher.NewsFetcher: a callable(search_term) -> news text returning
+    `articles` reproducible headlines per term after sleeping `latency` seconds.
+    """
+
+    def __init__(self, latency=0.0, articles=5):
+        self.latency = latency
+        self.articles = articles
+        self.request_count = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, search_term):
+        with self.lock:
+            self.request_count += 1
+        if self.latency:
+            time.sleep(self.latency)
+        term = search_term.strip()
+        rng = random.Random(_seed(term))
+        return "\n\n".join(
+            f"Title: {term} outlook update {i + 1}\n"
+            f"Description: Analysts expect {term} to move {rng.uniform(-5, 5):+.1f}% this quarter.\n"
+            f"URL: https://news.example.com/{_seed(term)}/{i + 1}\n"
+            for i in range(self.articles))
+
+
+class _FakeHTTPServer(ThreadingHTTPServer):
+    # The default backlog of 5 makes bursts of concurrent clients stall on SYN retries
+    request_queue_size = 128
+    daemon_threads = True
+
+
+def echo_responder(instruction, prompt):
+    """
+    Default FakeCompletionServer responder: a deterministic digest of the request.
+    """
+    digest = hashlib.sha256(f"{instruction}\x00{prompt}".encode('utf-8')).hexdigest()[:16]
+    return f"fake completion {digest}"
+
+
+class FakeCompletionServer:
+    """
+    Local HTTP server speaking the subset of the OpenAI chat completions API the agents use.
+    Point a client at it with OpenAI(api_key='fake', base_url=server.base_url).
+
+        with FakeCompletionServer(latency=0.1) as server:
+            agent = Agent(client=OpenAI(api_key='fake', base_url=server.base_url))
+    """
+
+    def __init__(self, responder=echo_responder, latency=0.0, port=0, latency_per_token=0.0,
+                 latency_per_output_token=0.0):
+        """
+        :param responder: Callable (instruction, prompt) -> completion text.
+        :param latency: Seconds to sleep before answering each request.
+        :param port: Port to bind on 127.0.0.1; 0 picks a free one.
+        :param latency_per_token: Extra seconds per prompt token (estimated from its length), modelling the
+                                  time a real model spends reading a longer prompt.
+        :param latency_per_output_token: Seconds per completion word, modelling generation speed. Streaming
+                                         requests receive each word as it is "generated"; the others wait
+                                         for all of them.
+        """
+        self.responder = responder
+        self.latency = latency
+        self.latency_per_token = latency_per_token
+        self.latency_per_output_token = latency_per_output_token
+        self.request_count = 0
+        self.requests = []
+        self.lock = threading.Lock()
+        self.httpd = _FakeHTTPServer(('127.0.0.1', port), self._make_handler())
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                body = json.loads(self.rfile.read(length) or b'{}')
+                messages = body.get('messages', [])
+                instruction = next((m['content'] for m in messages if m['role'] == 'system'), '')
+                prompt = next((m['content'] for m in messages if m['role'] == 'user'), '')
+                with server.lock:
+                    server.request_count += 1
+                    server.requests.append(body)
+                delay = server.latency + server.latency_per_token * len(f"{instruction}{prompt}") / 4
+                if delay:
+                    time.sleep(delay)
+                content = server.responder(instruction, prompt)
+                if body.get('stream'):
+                    self._stream(body, content)
+                    return
+                if server.latency_per_output_token:
+                    time.sleep(server.latency_per_output_token * len(content.split()))
+                payload = json.dumps({
+                    'id': f"chatcmpl-fake-{server.request_count}",
+                    'object': 'chat.completion',
+                    'created': int(time.time()),
+                    'model': body.get('model', 'fake'),
+                    'choices': [{'index': 0, 'finish_reason': 'stop',
+                                 'message': {'role': 'assistant', 'content': content}}],
+                    'usage': {'prompt_tokens': len(f"{instruction} {prompt}".split()),
+                              'completion_tokens': len(content.split()),
+                              'total_tokens': len(f"{instruction} {prompt} {content}".split())}
+                }).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _stream(self, body, content):
+                # Server-sent events, one chunk per word, closed by [DONE]; HTTP/1.0 ends the body on close
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.end_headers()
+                words = content.split(' ')
+                for i, word in enumerate(words):
+                    if server.latency_per_output_token:
+                        time.sleep(server.latency_per_output_token)
+                    chunk = {
+                        'id': f"chatcmpl-fake-{server.request_count}",
+                        'object': 'chat.completion.chunk',
+                        'created': int(time.time()),
+                        'model': body.get('model', 'fake'),
+                        'choices': [{'index': 0, 'finish_reason': None,
+                                     'delta': {'content': word if i == len(words) - 1 else word + ' '}}]
+                    }
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+                    self.wfile.flush()
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
\ No newline at end of file
@@ -0,0 +1,160 @@
+"""
+Offline benchmark suite. Runs the end-to-end daily cycle, DatabaseBuilder ingestion, Portfolio reports at
+scale and DatabaseManager queries against local fakes (see benchmarks/fakes.py), so no API key or network is
+needed. Each run is stored as benchmarks/results/<timestamp>_<commit>.json and compared with the previous
+stored run, so a regression between commits shows up as a slower row.
+
+    python benchmarks/run_suite.py
+    python benchmarks/run_suite.py --only daily_cycle portfolio --repeat 3
+    python benchmarks/run_suite.py --baseline benchmarks/results/20261018-120000_abc1234.json
+"""
+import argparse
+import contextlib
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import bench_daily_cycle, bench_daily_data, bench_ingestion, bench_portfolio
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BASE_DIR, 'benchmarks', 'results')
+# Slower than the baseline by more than this fraction is flagged
+REGRESSION_THRESHOLD = 0.10
+
+
+def daily_cycle():
+    result = bench_daily_cycle.run(cycles=3, llm_latency=0.05, data_latency=0.01, news_latency=0.02)
+    metrics = {'cycle_p50_s': result['cycle_p50']}
+    metrics.update({f'stage.{name}_p50_s': ms / 1000 for name, ms in result['stages_p50_ms'].items()})
+    revised = bench_daily_cycle.run(cycles=3, llm_latency=0.05, data_latency=0.01, news_latency=0.02, revise=True)
+    metrics['two_round_cycle_p50_s'] = revised['cycle_p50']
+    return metrics
+
+
+def ingestion():
+    results = bench_ingestion.run(symbol_count=50, latency=0.005, workers=8, batch_size=25, rate=1000.0)
+    return {f'{mode}_s': elapsed for mode, (_, _, elapsed) in results.items()}
+
+
+def portfolio():
+    mutate, performance, ledger = bench_portfolio.run(transactions=100000, holdings=1000)
+    return {'ledger_mutations_s': mutate, 'performance_report_s': performance, 'ledger_report_s': ledger}
+
+
+def db_queries():
+    results = bench_daily_data.run(symbol_count=300, day_count=500, query_count=200)
+    # The v1 rows time a layout the database no longer uses, so only the current one is tracked
+    return {f"{name[3:].replace(' ', '_')}_s": seconds for name, (seconds, _) in results.items()
+            if name.startswith('v2')}
+
+
+# Every metric is a duration in seconds, lower is better
+SUITE = {
+    'daily_cycle': daily_cycle,
+    'ingestion': ingestion,
+    'portfolio': portfolio,
+    'db_queries': db_queries,
+}
+
+
+def git_revision():
+    """
+    :return: (short commit hash, whether the working tree has uncommitted changes); ('unknown', False)
+             outside a git checkout.
+    """
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        status = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=BASE_DIR,
+                                capture_output=True, text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown', False
+    return commit, bool(status.strip())
+
+
+def run_suite(names, repeat=1, verbose=False):
+    """
+    :return: {'<benchmark>.<metric>': seconds}, the best of `repeat` runs for each metric.
+    """
+    metrics = {}
+    for name in names:
+        started = time.perf_counter()
+        for _ in range(repeat):
+            with open(os.devnull, 'w') as devnull, \
+                    (contextlib.nullcontext() if verbose else contextlib.redirect_stdout(devnull)):
+                result = SUITE[name]()
+            for metric, seconds in result.items():
+                key = f'{name}.{metric}'
+                metrics[key] = min(seconds, metrics.get(key, seconds))
+        print(f"{name}: done in {time.perf_counter() - started:.1f}s")
+    return metrics
+
+
+def save(metrics, results_dir=RESULTS_DIR):
+    commit, dirty = git_revision()
+    record = {
+        'commit': commit,
+        'dirty': dirty,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'metrics': metrics
+    }
+    os.makedirs(results_dir, exist_ok=True)
+    path = os.path.join(results_dir, f"{time.strftime('%Y%m%d-%H%M%S')}_{commit}{'-dirty' if dirty else ''}.json")
+    with open(path, 'w') as file:
+        json.dump(record, file, indent=2, sort_keys=True)
+    return path
+
+
+def latest_result(results_dir=RESULTS_DIR, exclude=None):
+    # Timestamped names sort chronologically
+    paths = [path for path in sorted(glob.glob(os.path.join(results_dir, '*.json'))) if path != exclude]
+    return paths[-1] if paths else None
+
+
+def comparison_report(metrics, baseline):
+    """
+    :return: Table of every metric against the baseline run, flagging slowdowns beyond REGRESSION_THRESHOLD.
+    """
+    previous = baseline['metrics']
+    report = f"Compared with {baseline['commit']}{' (dirty)' if baseline.get('dirty') else ''} " \
+             f"from {baseline['timestamp']}\n"
+    report += f"{'Metric':<46} {'Baseline':>10} {'Now':>10} {'Change':>8}\n"
+    for key in sorted(metrics):
+        now = metrics[key]
+        before = previous.get(key)
+        if before is None:
+            report += f"{key:<46} {'-':>10} {now:>10.4f} {'new':>8}\n"
+            continue
+        change = now / before - 1 if before else 0.0
+        flag = "  << slower" if change > REGRESSION_THRESHOLD else ""
+        report += f"{key:<46} {before:>10.4f} {now:>10.4f} {change:>+8.1%}{flag}\n"
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--only', nargs='*', choices=list(SUITE), help="Benchmarks to run (all by default)")
+    parser.add_argument('--repeat', type=int, default=1, help="Runs per benchmark; the fastest is kept")
+    parser.add_argument('--baseline', help="Result file to compare with (the previous stored run by default)")
+    parser.add_argument('--no-save', action='store_true', help="Compare only, do not store this run")
+    parser.add_argument('--verbose', action='store_true', help="Show each benchmark's own output")
+    args = parser.parse_args()
+
+    metrics = run_suite(args.only or list(SUITE), args.repeat, args.verbose)
+    path = None if args.no_save else save(metrics)
+    baseline_path = args.baseline or latest_result(exclude=path)
+    if baseline_path:
+        with open(baseline_path) as file:
+            print(comparison_report(metrics, json.load(file)))
+    else:
+        for key in sorted(metrics):
+            print(f"{key:<46} {metrics[key]:>10.4f}")
+    if path:
+        print(f"Results saved as {path}")
\ No newline at end of file
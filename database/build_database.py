@@ -1,10 +1,20 @@
 import sqlite3
 import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from tools import stockretriever
+from tools.rate_limiter import TokenBucket
+from database.db_manager import (STOCKS_TABLE_SQL, DAILY_DATA_TABLE_SQL, DAILY_DATA_INDEX_SQL,
+                                 DAILY_DATA_INSERT_SQL, PRICE_COVERAGE_TABLE_SQL, FUNDAMENTALS_TABLE_SQL,
+                                 FUNDAMENTALS_INDEX_SQL, to_fundamentals_row, from_day, to_day, connect)
+from database.indicators import IndicatorEngine
+from database.columnar_cache import ColumnarCache
 import json
 import logging
 
@@ -17,34 +27,31 @@ SYMBOLS_FILE_PATH = os.path.join(BASE_DIR, 'nasdaq_symbols.txt')
 
 
 class DatabaseBuilder:
-    def __init__(self):
-        self.conn = sqlite3.connect(DATABASE_PATH)
+    def __init__(self, database_path=DATABASE_PATH, symbols_path=SYMBOLS_FILE_PATH, data_source=stockretriever):
+        """
+        :param database_path: Path of the SQLite database file to build.
+        :param symbols_path: Text file with one ticker symbol per line.
+        :param data_source: Module or object providing get_current_info, get_historical_info and
+                            get_historical_info_batch (tools.stockretriever, or a local stand-in).
+        """
+        self.database_path = database_path
+        self.symbols_path = symbols_path
+        self.data_source = data_source
+        self.conn = connect(database_path)
         self.cursor = self.conn.cursor()
 
     def create_tables(self):
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS stocks (
-                symbol TEXT PRIMARY KEY,
-                company_name TEXT
-            )
-        ''')
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS daily_data (
-                date TEXT,
-                symbol TEXT,
-                open REAL,
-                high REAL,
-                low REAL,
-                close REAL,
-                volume INTEGER,
-                PRIMARY KEY (date, symbol),
-                FOREIGN KEY (symbol) REFERENCES stocks(symbol)
-            )
-        ''')
+        self.cursor.execute(STOCKS_TABLE_SQL)
+        self.cursor.execute(DAILY_DATA_TABLE_SQL)
+        self.cursor.execute(DAILY_DATA_INDEX_SQL)
+        self.cursor.execute(PRICE_COVERAGE_TABLE_SQL)
+        self.cursor.execute(FUNDAMENTALS_TABLE_SQL)
+        for index_sql in FUNDAMENTALS_INDEX_SQL:
+            self.cursor.execute(index_sql)
         self.conn.commit()
 
     def get_nasdaq_symbols(self):
-        with open(SYMBOLS_FILE_PATH, 'r') as file:
+        with open(self.symbols_path, 'r') as file:
             return [line.strip() for line in file if line.strip()]
 
     def populate_database(self):
@@ -52,13 +59,14 @@ class DatabaseBuilder:
         total_symbols = len(symbols)
 
         BATCH_SIZE = 100
+        updated_at = datetime.now().strftime('%Y-%m-%d')
         for index, symbol in enumerate(symbols, 1):
             try:
                 logging.info(f"Processing {symbol} ({index}/{total_symbols})")
 
                 # Fetch current info to get company name
                 try:
-                    current_info = stockretriever.get_current_info([symbol])[0]
+                    current_info = self.data_source.get_current_info([symbol])[0]
                     company_name = current_info.get('longName', 'Unknown')
                 except (json.JSONDecodeError, IndexError) as e:
                     logging.error(f"Error processing {symbol}: {str(e)}. Skipping this symbol.")
@@ -70,12 +78,15 @@ class DatabaseBuilder:
                 # Insert or update stock info
                 self.cursor.execute('INSERT OR REPLACE INTO stocks VALUES (?, ?)',
                                     (symbol, company_name))
+                self.cursor.execute('INSERT OR REPLACE INTO fundamentals VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                                    to_fundamentals_row(current_info, updated_at))
 
                 # Fetch historical data (last 5 years)
                 end_date = datetime.now()
                 start_date = end_date - timedelta(days=365 * 5)
                 try:
-                    historical_data = stockretriever.get_historical_info(symbol, start_date, end_date)
+                    historical_data = stockretriever.to_daily_rows(
+                        symbol, self.data_source.get_historical_info(symbol, start_date, end_date, columnar=True))
                 except json.JSONDecodeError:
                     logging.error(f"Invalid JSON response for historical data of {symbol}. Skipping historical data.")
                     continue
@@ -85,10 +96,7 @@ class DatabaseBuilder:
                     continue
 
                 # Insert historical data
-                self.cursor.executemany('''
-                    INSERT OR REPLACE INTO daily_data VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', [(data['Date'], symbol, data['Open'], data['High'], data['Low'], data['Close'], data['Volume'])
-                      for data in historical_data])
+                self.cursor.executemany(DAILY_DATA_INSERT_SQL, historical_data)
 
                 # Commit after each stock to save progress
                 if index % BATCH_SIZE == 0:
@@ -101,39 +109,268 @@ class DatabaseBuilder:
 
         logging.info("Database population completed.")
 
-    def update_database(self):
+    def populate_database_concurrent(self, workers=8, batch_size=50, requests_per_second=5.0, commit_rows=50000):
+        """
+        Concurrent variant of populate_database. A pool of fetch workers downloads multi-ticker batches of
+        history while sharing one token-bucket rate limit; a single writer thread drains their results into
+        SQLite in large executemany transactions.
+
+        :param workers: Number of fetch worker threads.
+        :param batch_size: Number of symbols per multi-ticker history download.
+        :param requests_per_second: Sustained request rate shared by all workers.
+        :param commit_rows: Number of daily_data rows to buffer before each commit.
+        :return: Dictionary with symbols, rows, elapsed seconds, symbols_per_sec and rows_per_sec.
+        """
         symbols = self.get_nasdaq_symbols()
-        total_symbols = len(symbols)
+        batches = [symbols[i:i + batch_size] for i in range(0, len(symbols), batch_size)]
+        limiter = TokenBucket(requests_per_second)
+        results = queue.Queue(maxsize=workers * 2)
+        stats = {'symbols': 0, 'rows': 0, 'total_symbols': len(symbols)}
 
-        for index, symbol in enumerate(symbols, 1):
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=365 * 5)
+
+        started = time.perf_counter()
+        # The writer's exception, if it fails; it keeps draining the queue so the workers never block on put
+        writer_errors = []
+        writer = threading.Thread(target=self._write_results,
+                                  args=(results, commit_rows, stats, started, writer_errors))
+        writer.start()
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {executor.submit(self._fetch_batch, batch, start_date, end_date, limiter, results):
+                           batch for batch in batches}
+            for future, batch in futures.items():
+                if future.exception() is not None:
+                    logging.error(f"Batch starting at {batch[0]} failed and was not written: {future.exception()}")
+        finally:
+            # Sentinel: tells the writer every worker has finished
+            results.put(None)
+            writer.join()
+        if writer_errors:
+            raise writer_errors[0]
+
+        elapsed = time.perf_counter() - started
+        stats['elapsed'] = elapsed
+        stats['symbols_per_sec'] = stats['symbols'] / elapsed if elapsed else 0.0
+        stats['rows_per_sec'] = stats['rows'] / elapsed if elapsed else 0.0
+        logging.info(f"Database population completed: {stats['symbols']} symbols, {stats['rows']} rows in "
+                     f"{elapsed:.1f}s ({stats['symbols_per_sec']:.1f} symbols/sec, "
+                     f"{stats['rows_per_sec']:.0f} rows/sec)")
+        return stats
+
+    def _fetch_batch(self, batch, start_date, end_date, limiter, results):
+        """
+        Worker body: fetches one batch of symbols and hands the rows to the writer thread.
+        """
+        limiter.acquire()
+        try:
+            history = self.data_source.get_historical_info_batch(batch, start_date, end_date, columnar=True,
+                                                                 raise_errors=True)
+        except Exception as e:
+            logging.error(f"Error fetching historical data for batch starting at {batch[0]}: {e}")
+            history = {}
+
+        updated_at = datetime.now().strftime('%Y-%m-%d')
+        stock_rows = []
+        fundamentals_rows = []
+        daily_rows = []
+        for symbol in batch:
+            limiter.acquire()
             try:
-                logging.info(f"Updating {symbol} ({index}/{total_symbols})")
+                current_info = self.data_source.get_current_info([symbol])[0]
+                company_name = current_info.get('longName', 'Unknown')
+            except (json.JSONDecodeError, IndexError) as e:
+                logging.error(f"Error processing {symbol}: {str(e)}. Skipping this symbol.")
+                continue
+            except Exception as e:
+                logging.error(f"Unexpected error processing {symbol}: {str(e)}. Skipping this symbol.")
+                continue
+
+            stock_rows.append((symbol, company_name))
+            fundamentals_rows.append(to_fundamentals_row(current_info, updated_at))
+
+            historical_data = stockretriever.to_daily_rows(symbol, history.get(symbol, []))
+            if not historical_data:
+                logging.error(f"No historical data available for {symbol}. Skipping historical data.")
+                continue
+            daily_rows.extend(historical_data)
+
+        results.put((stock_rows, fundamentals_rows, daily_rows))
 
-                # Get the most recent date for this symbol
-                self.cursor.execute('SELECT MAX(date) FROM daily_data WHERE symbol = ?', (symbol,))
-                last_date = self.cursor.fetchone()[0]
+    def _write_results(self, results, commit_rows, stats, started, errors):
+        """
+        Writer body: the only thread that touches SQLite during a concurrent build. If writing fails, the
+        exception is appended to `errors` and the remaining results are drained unwritten until the sentinel.
+        """
+        conn = None
+        pending_stocks = []
+        pending_fundamentals = []
+        pending_rows = []
 
-                if last_date:
-                    start_date = datetime.strptime(last_date, '%Y-%m-%d') + timedelta(days=1)
-                    end_date = datetime.now()
+        def flush():
+            with conn:
+                conn.executemany('INSERT OR REPLACE INTO stocks VALUES (?, ?)', pending_stocks)
+                conn.executemany('INSERT OR REPLACE INTO fundamentals VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                                 pending_fundamentals)
+                conn.executemany(DAILY_DATA_INSERT_SQL, pending_rows)
+            stats['symbols'] += len(pending_stocks)
+            stats['rows'] += len(pending_rows)
+            elapsed = time.perf_counter() - started
+            logging.info(f"Committed {stats['symbols']}/{stats['total_symbols']} symbols, {stats['rows']} rows "
+                         f"({stats['symbols'] / elapsed:.1f} symbols/sec, {stats['rows'] / elapsed:.0f} rows/sec)")
+            pending_stocks.clear()
+            pending_fundamentals.clear()
+            pending_rows.clear()
 
-                    if start_date < end_date:
-                        new_data = stockretriever.get_historical_info(symbol, start_date, end_date)
+        try:
+            # sqlite3 connections are bound to the thread that created them, so the writer opens its own
+            conn = connect(self.database_path)
+            while True:
+                item = results.get()
+                if item is None:
+                    break
+                stock_rows, fundamentals_rows, daily_rows = item
+                pending_stocks.extend(stock_rows)
+                pending_fundamentals.extend(fundamentals_rows)
+                pending_rows.extend(daily_rows)
+                if len(pending_rows) >= commit_rows:
+                    flush()
+            if pending_stocks or pending_rows:
+                flush()
+        except Exception as e:
+            logging.error(f"Writer failed after {stats['symbols']} symbols; discarding the remaining results: {e}")
+            errors.append(e)
+            while results.get() is not None:
+                pass
+        finally:
+            if conn is not None:
+                conn.close()
 
-                        self.cursor.executemany('''
-                            INSERT OR REPLACE INTO daily_data VALUES (?, ?, ?, ?, ?, ?, ?)
-                        ''', [(data['Date'], symbol, data['Open'], data['High'], data['Low'], data['Close'],
-                               data['Volume'])
-                              for data in new_data])
+    def update_fundamentals(self, workers=8, requests_per_second=5.0):
+        """
+        Refreshes the fundamentals table from get_current_info for every symbol in the stocks table.
 
-                        self.conn.commit()
-                else:
-                    logging.info(f"No existing data for {symbol}. Skipping update.")
+        :param workers: Number of fetch worker threads.
+        :param requests_per_second: Sustained request rate shared by all workers.
+        :return: Number of symbols refreshed.
+        """
+        self.cursor.execute('SELECT symbol FROM stocks')
+        symbols = [row[0] for row in self.cursor.fetchall()]
+        limiter = TokenBucket(requests_per_second)
+        updated_at = datetime.now().strftime('%Y-%m-%d')
 
+        def fetch(symbol):
+            limiter.acquire()
+            try:
+                return self.data_source.get_current_info([symbol])
             except Exception as e:
-                logging.error(f"Error updating {symbol}: {e}")
+                logging.error(f"Error fetching fundamentals for {symbol}: {e}")
+                return []
+
+        started = time.perf_counter()
+        rows = []
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for infos in executor.map(fetch, symbols):
+                rows.extend(to_fundamentals_row(info, updated_at) for info in infos)
+        with self.conn:
+            self.conn.executemany('INSERT OR REPLACE INTO fundamentals VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                                  rows)
+        logging.info(f"Fundamentals updated: {len(rows)} symbols in {time.perf_counter() - started:.1f}s.")
+        return len(rows)
+
+    def update_database(self, batch_size=200, update_indicators=True, refresh_columnar_cache=True):
+        """
+        Brings every symbol up to date with set-based queries. The last stored date of all symbols is read
+        with one grouped query, symbols that share the same missing date range are bucketed together, and
+        each bucket is fetched with multi-ticker downloads and written in a single transaction.
+
+        :param batch_size: Maximum number of symbols per multi-ticker download.
+        :param update_indicators: Also compute the indicators table for the appended days (see
+                                  database.indicators).
+        :param refresh_columnar_cache: Bring the memory-mapped price export up to date, if one has been made
+                                       (see database.columnar_cache).
+        :return: Earliest date written ('YYYY-MM-DD'), or None when nothing was written.
+        """
+        symbols = self.get_nasdaq_symbols()
+        started = time.perf_counter()
+
+        # One seek per symbol on the (symbol, day) primary key
+        self.cursor.execute('SELECT symbol, MAX(day) FROM daily_data GROUP BY symbol')
+        last_dates = {symbol: from_day(day) for symbol, day in self.cursor.fetchall()}
+
+        # Symbols that are equally far behind share one fetch window
+        buckets = {}
+        missing = 0
+        for symbol in symbols:
+            last_date = last_dates.get(symbol)
+            if last_date:
+                buckets.setdefault(last_date, []).append(symbol)
+            else:
+                missing += 1
+        if missing:
+            logging.info(f"No existing data for {missing} symbols. Skipping update for them.")
+
+        end_date = datetime.now()
+        updated_symbols = 0
+        updated_rows = 0
+        failed_chunks = 0
+        failed_symbols = 0
+        # Earliest date written, so the columnar export also rewrites rows filled in for symbols that lagged behind
+        earliest_date = None
+        for last_date, bucket in sorted(buckets.items()):
+            start_date = datetime.strptime(last_date, '%Y-%m-%d') + timedelta(days=1)
+            if start_date >= end_date:
+                continue
+
+            logging.info(f"Updating {len(bucket)} symbols from {start_date.strftime('%Y-%m-%d')}")
+            rows = []
+            # Symbols that got at least one new day
+            fetched_symbols = 0
+            for i in range(0, len(bucket), batch_size):
+                chunk = bucket[i:i + batch_size]
+                try:
+                    new_data = self.data_source.get_historical_info_batch(chunk, start_date, end_date,
+                                                                          columnar=True, raise_errors=True)
+                except Exception as e:
+                    logging.error(f"Error updating batch starting at {chunk[0]}: {e}")
+                    failed_chunks += 1
+                    failed_symbols += len(chunk)
+                    continue
+                fetched_symbols += sum(1 for history in new_data.values() if len(history['Close']))
+                for symbol, history in new_data.items():
+                    rows.extend(stockretriever.to_daily_rows(symbol, history))
+
+            try:
+                with self.conn:
+                    self.conn.executemany(DAILY_DATA_INSERT_SQL, rows)
+            except sqlite3.Error as e:
+                logging.error(f"Error writing update for bucket {last_date}: {e}")
+                continue
+            updated_symbols += fetched_symbols
+            updated_rows += len(rows)
+            if rows:
+                bucket_earliest = min(row[0] for row in rows)
+                earliest_date = bucket_earliest if earliest_date is None else min(earliest_date, bucket_earliest)
+
+        elapsed = time.perf_counter() - started
+        logging.info(f"Database update completed: {updated_symbols} symbols, {updated_rows} rows "
+                     f"in {elapsed:.1f}s.")
+        if failed_chunks:
+            logging.warning(f"{failed_chunks} batches ({failed_symbols} symbols) could not be fetched and were "
+                            f"not updated.")
+
+        if update_indicators:
+            # Only rows newer than each symbol's last indicator row are computed
+            engine = IndicatorEngine(self.database_path)
+            engine.update()
+            engine.close()
 
-        logging.info("Database update completed.")
+        if refresh_columnar_cache:
+            cache = ColumnarCache(self.database_path)
+            if cache.exists() and earliest_date is not None:
+                cache.refresh(since_day=to_day(earliest_date))
+        return earliest_date
 
     def close(self):
         self.conn.close()
@@ -142,6 +379,6 @@ class DatabaseBuilder:
 if __name__ == "__main__":
     db_builder = DatabaseBuilder()
     db_builder.create_tables()
-    db_builder.populate_database()
+    db_builder.populate_database_concurrent()
     db_builder.update_database()
     db_builder.close()
\ No newline at end of file
@@ -0,0 +1,259 @@
+import json
+import os
+import logging
+import time
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from database.db_manager import DATABASE_PATH, connect
+
+FORMAT_VERSION = 1
+FIELDS = ('open', 'high', 'low', 'close', 'volume')
+HEADER_FILE = 'header.json'
+DAYS_FILE = 'days.i4'
+VALUE_DTYPE = np.float64
+DAY_DTYPE = np.int32
+
+
+def _field_file(field):
+    return f'{field}.f8'
+
+
+class CachedPrices:
+    """
+    Read-only, zero-copy view of an exported cache. Every field is a (days x symbols) float64 matrix mapped
+    straight from its file, so loading costs a few system calls and the pages are shared with every other
+    process reading the same cache. Missing bars (and volume of missing bars) are NaN.
+    """
+
+    def __init__(self, cache_dir, header):
+        self.cache_dir = cache_dir
+        self.symbols = header['symbols']
+        self.symbol_index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        rows, columns = header['rows'], len(self.symbols)
+        self.days = self._map(DAYS_FILE, DAY_DTYPE, (rows,))
+        self.fields = {field: self._map(_field_file(field), VALUE_DTYPE, (rows, columns)) for field in FIELDS}
+
+    def _map(self, name, dtype, shape):
+        if 0 in shape:
+            # mmap cannot map an empty file
+            return np.empty(shape, dtype=dtype)
+        return np.memmap(os.path.join(self.cache_dir, name), dtype=dtype, mode='r', shape=shape)
+
+    def __getitem__(self, field):
+        return self.fields[field]
+
+    @property
+    def dates(self):
+        """
+        Row dates as 'YYYY-MM-DD' strings (computed, not mapped).
+        """
+        return self.days.astype('datetime64[D]').astype('U10')
+
+    def row_range(self, start_day, end_day):
+        """
+        :return: slice of the rows with start_day <= day <= end_day (day numbers, see db_manager.to_day).
+        """
+        return slice(int(np.searchsorted(self.days, start_day, side='left')),
+                     int(np.searchsorted(self.days, end_day, side='right')))
+
+    def column(self, symbol, field='close'):
+        """
+        :return: Strided view of one symbol's values over every day.
+        """
+        return self.fields[field][:, self.symbol_index[symbol]]
+
+
+class ColumnarCache:
+    """
+    Exports daily_data into raw memory-mapped NumPy files: one date x symbol float64 matrix per field and the
+    int32 day numbers of its rows, described by a JSON header. Rows are stored day after day, so a refresh
+    after update_database appends the new days to the end of each file and rewrites only the rows of the days
+    it changed.
+
+        cache = ColumnarCache()
+        cache.refresh()
+        closes = cache.load()['close']
+    """
+
+    def __init__(self, database_path=DATABASE_PATH, cache_dir=None):
+        """
+        :param database_path: SQLite database holding daily_data.
+        :param cache_dir: Directory of the exported files. Defaults to '<database_path>.columns'.
+        """
+        self.database_path = database_path
+        self.cache_dir = cache_dir or f"{database_path}.columns"
+
+    def _path(self, name):
+        return os.path.join(self.cache_dir, name)
+
+    def exists(self):
+        return os.path.exists(self._path(HEADER_FILE))
+
+    def read_header(self):
+        with open(self._path(HEADER_FILE)) as file:
+            return json.load(file)
+
+    def _write_header(self, header):
+        # The header is replaced atomically and written last, so readers never see rows that are not on disk
+        temporary = self._path(HEADER_FILE + '.tmp')
+        with open(temporary, 'w') as file:
+            json.dump(header, file)
+        os.replace(temporary, self._path(HEADER_FILE))
+
+    def load(self):
+        """
+        :return: CachedPrices mapping the current export.
+        """
+        header = self.read_header()
+        if header.get('version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported columnar cache version {header.get('version')}; re-run export().")
+        return CachedPrices(self.cache_dir, header)
+
+    def _fill(self, conn, matrices, days, symbol_index, since_day):
+        """
+        Scatters daily_data rows with day > since_day (all rows when None) into the (days x symbols) matrices.
+
+        :return: Number of rows read.
+        """
+        count = 0
+        query = 'SELECT day, symbol, open, high, low, close, volume FROM daily_data'
+        if since_day is None:
+            # A plain scan in primary-key order; a range on the day index would look up every row separately
+            cursor = conn.execute(query)
+        else:
+            cursor = conn.execute(query + ' WHERE day > ?', (since_day,))
+        while True:
+            rows = cursor.fetchmany(200000)
+            if not rows:
+                return count
+            count += len(rows)
+            day_column, symbol_column, *values = zip(*rows)
+            row_index = np.searchsorted(days, np.array(day_column, dtype=DAY_DTYPE))
+            column_index = np.array([symbol_index[symbol] for symbol in symbol_column])
+            for field, column in zip(FIELDS, values):
+                matrices[field][row_index, column_index] = np.array(column, dtype=VALUE_DTYPE)
+
+    def export(self):
+        """
+        Writes the whole daily_data table. New files are written next to the old ones and swapped in, so
+        readers that still map the previous export keep a consistent view.
+
+        :return: Number of (day, symbol) cells written per field.
+        """
+        started = time.perf_counter()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        conn = connect(self.database_path)
+        try:
+            symbols = [row[0] for row in conn.execute('SELECT symbol FROM daily_data GROUP BY symbol')]
+            days = np.array([row[0] for row in conn.execute('SELECT DISTINCT day FROM daily_data ORDER BY day')],
+                            dtype=DAY_DTYPE)
+            shape = (len(days), len(symbols))
+            symbol_index = {symbol: i for i, symbol in enumerate(symbols)}
+
+            matrices = {}
+            for field in FIELDS:
+                if 0 in shape:
+                    matrices[field] = np.empty(shape, dtype=VALUE_DTYPE)
+                else:
+                    matrices[field] = np.memmap(self._path(_field_file(field) + '.tmp'), dtype=VALUE_DTYPE,
+                                                mode='w+', shape=shape)
+                    matrices[field][:] = np.nan
+            cells = self._fill(conn, matrices, days, symbol_index, None)
+        finally:
+            conn.close()
+
+        for field, matrix in matrices.items():
+            if isinstance(matrix, np.memmap):
+                matrix.flush()
+                os.replace(self._path(_field_file(field) + '.tmp'), self._path(_field_file(field)))
+            else:
+                open(self._path(_field_file(field)), 'wb').close()
+        days.tofile(self._path(DAYS_FILE))
+        self._write_header({'version': FORMAT_VERSION, 'rows': len(days), 'symbols': symbols,
+                            'fields': list(FIELDS), 'cells': cells})
+        logging.info(f"Columnar cache exported: {shape[0]} days x {shape[1]} symbols "
+                     f"in {time.perf_counter() - started:.1f}s.")
+        return shape[0] * shape[1]
+
+    def refresh(self, since_day=None):
+        """
+        Brings the export up to date with daily_data. Days after the last exported one are appended. When
+        older days changed too (a symbol that lagged behind caught up, or rows were replaced), pass the
+        earliest changed day as `since_day` and the exported rows from that day on are rewritten in place.
+        Falls back to a full export when there is no cache yet, when daily_data has a symbol the cache has
+        no column for or a day inside the exported range that it has no row for, or when rows were added
+        before `since_day` (or before the last exported day, without `since_day`).
+
+        :param since_day: Earliest day number (see db_manager.to_day) whose rows were inserted or replaced
+                          since the last export or refresh, e.g. as reported by update_database.
+        :return: Number of (day, symbol) cells written per field.
+        """
+        if not self.exists():
+            return self.export()
+        header = self.read_header()
+        if header.get('version') != FORMAT_VERSION or 'cells' not in header:
+            return self.export()
+
+        started = time.perf_counter()
+        symbols = header['symbols']
+        rows = header['rows']
+        existing_days = np.fromfile(self._path(DAYS_FILE), dtype=DAY_DTYPE, count=rows)
+        last_day = int(existing_days[-1]) if rows else int(np.iinfo(DAY_DTYPE).min)
+        # Rows after start_day are rewritten or appended
+        start_day = last_day if since_day is None else min(int(since_day) - 1, last_day)
+        first_row = int(np.searchsorted(existing_days, start_day, side='right'))
+
+        conn = connect(self.database_path)
+        try:
+            # One seek per symbol on the primary key, so symbols with only old rows are seen as well
+            stored_symbols = {row[0] for row in conn.execute('SELECT symbol FROM daily_data GROUP BY symbol')}
+            cells = conn.execute('SELECT COUNT(*) FROM daily_data').fetchone()[0]
+            changed_cells = conn.execute('SELECT COUNT(*) FROM daily_data WHERE day > ?',
+                                         (start_day,)).fetchone()[0]
+            days = np.array([row[0] for row in conn.execute(
+                'SELECT DISTINCT day FROM daily_data WHERE day > ? ORDER BY day', (start_day,))], dtype=DAY_DTYPE)
+            # Cells exported up to start_day: rows with any value present after it are taken off the total
+            exported = CachedPrices(self.cache_dir, header)
+            present = np.zeros((rows - first_row, len(symbols)), dtype=bool)
+            for field in FIELDS:
+                present |= ~np.isnan(exported[field][first_row:rows])
+            exported_cells = header['cells'] - int(present.sum())
+            if not stored_symbols <= set(symbols) or \
+                    not np.array_equal(days[:rows - first_row], existing_days[first_row:]) or \
+                    cells - changed_cells != exported_cells:
+                days = None
+            else:
+                shape = (len(days), len(symbols))
+                block = {field: np.full(shape, np.nan, dtype=VALUE_DTYPE) for field in FIELDS}
+                self._fill(conn, block, days, {symbol: i for i, symbol in enumerate(symbols)}, start_day)
+        finally:
+            conn.close()
+        if days is None:
+            # A new symbol needs a column in every row, and a new or changed earlier day a row in the middle
+            return self.export()
+        if not len(days):
+            return 0
+
+        # Rows from first_row on are overwritten; anything past them is left over from an interrupted refresh
+        row_bytes = len(symbols) * VALUE_DTYPE().itemsize
+        writes = [(_field_file(field), block[field], row_bytes) for field in FIELDS]
+        writes.append((DAYS_FILE, days, DAY_DTYPE().itemsize))
+        for name, values, row_bytes in writes:
+            with open(self._path(name), 'r+b') as file:
+                file.seek(first_row * row_bytes)
+                file.write(np.ascontiguousarray(values).tobytes())
+                file.truncate()
+        header['rows'] = first_row + len(days)
+        header['cells'] = cells
+        self._write_header(header)
+        logging.info(f"Columnar cache refreshed: {len(days) - (rows - first_row)} new days, {rows - first_row} "
+                     f"rewritten in {time.perf_counter() - started:.2f}s.")
+        return shape[0] * shape[1]
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    ColumnarCache().refresh()
\ No newline at end of file
@@ -1,25 +1,267 @@
 import sqlite3
 import os
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
 # Assuming the database is in the same directory as this script
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATABASE_PATH = os.path.join(BASE_DIR, 'stock_data.db')
 
+STOCKS_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS stocks (
+        symbol TEXT PRIMARY KEY,
+        company_name TEXT
+    )
+'''
+
+# Schema version stored in PRAGMA user_version. Version 2 clusters daily_data on (symbol, day) in a
+# WITHOUT ROWID table, where day is the number of days since 1970-01-01; databases built with the original
+# (date TEXT, symbol) layout are migrated in place by migrate()
+SCHEMA_VERSION = 2
+
+DAILY_DATA_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS daily_data (
+        symbol TEXT NOT NULL,
+        day INTEGER NOT NULL,
+        open REAL,
+        high REAL,
+        low REAL,
+        close REAL,
+        volume INTEGER,
+        PRIMARY KEY (symbol, day),
+        FOREIGN KEY (symbol) REFERENCES stocks(symbol)
+    ) WITHOUT ROWID
+'''
+
+# Serves cross-sectional reads (every symbol on one day) and the date-range scans of incremental updates
+DAILY_DATA_INDEX_SQL = 'CREATE INDEX IF NOT EXISTS idx_daily_data_day ON daily_data (day)'
+
+# Julian day number of 1970-01-01, the origin of daily_data.day
+EPOCH_JULIAN_DAY = 2440587.5
+EPOCH = date(1970, 1, 1)
+
+# Takes the (date, symbol, open, high, low, close, volume) tuples of stockretriever.to_daily_rows and
+# converts the date to a day number in SQLite
+DAILY_DATA_INSERT_SQL = f'''
+    INSERT OR REPLACE INTO daily_data (symbol, day, open, high, low, close, volume)
+    VALUES (?2, CAST(julianday(?1) - {EPOCH_JULIAN_DAY} AS INTEGER), ?3, ?4, ?5, ?6, ?7)
+'''
+
+# SQL expression turning daily_data.day back into 'YYYY-MM-DD'
+DATE_FROM_DAY_SQL = f'date(day + {EPOCH_JULIAN_DAY})'
+
+# Half-open [start_date, end_date) range of days already fetched from the network for each symbol,
+# so weekends, holidays and not-yet-listed days are not re-requested on every read
+PRICE_COVERAGE_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS price_coverage (
+        symbol TEXT PRIMARY KEY,
+        start_date TEXT,
+        end_date TEXT
+    )
+'''
+
+# Latest get_current_info fields per symbol, for database.screener. Missing values ('N/A') are stored as NULL
+FUNDAMENTALS_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS fundamentals (
+        symbol TEXT PRIMARY KEY,
+        long_name TEXT,
+        sector TEXT,
+        industry TEXT,
+        market_cap REAL,
+        pe_ratio REAL,
+        dividend_yield REAL,
+        current_price REAL,
+        volume INTEGER,
+        average_volume INTEGER,
+        updated_at TEXT,
+        FOREIGN KEY (symbol) REFERENCES stocks(symbol)
+    )
+'''
+
+FUNDAMENTALS_INDEX_SQL = (
+    'CREATE INDEX IF NOT EXISTS idx_fundamentals_sector ON fundamentals (sector, market_cap)',
+    'CREATE INDEX IF NOT EXISTS idx_fundamentals_market_cap ON fundamentals (market_cap)',
+    'CREATE INDEX IF NOT EXISTS idx_fundamentals_pe_ratio ON fundamentals (pe_ratio)',
+    'CREATE INDEX IF NOT EXISTS idx_fundamentals_dividend_yield ON fundamentals (dividend_yield)',
+)
+
+# Technical indicators materialized from daily_data by database.indicators.IndicatorEngine. avg_gain_14 and
+# avg_loss_14 are the smoothed RSI averages, kept so updates can continue the recursion from the last row
+INDICATORS_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS indicators (
+        date TEXT,
+        symbol TEXT,
+        sma_20 REAL,
+        sma_50 REAL,
+        sma_200 REAL,
+        ema_12 REAL,
+        ema_26 REAL,
+        rsi_14 REAL,
+        avg_gain_14 REAL,
+        avg_loss_14 REAL,
+        atr_14 REAL,
+        volatility_20 REAL,
+        beta_60 REAL,
+        PRIMARY KEY (date, symbol),
+        FOREIGN KEY (symbol) REFERENCES stocks(symbol)
+    )
+'''
+
+INDICATORS_INDEX_SQL = 'CREATE INDEX IF NOT EXISTS idx_indicators_symbol_date ON indicators (symbol, date)'
+
+
+def to_fundamentals_row(info, updated_at):
+    """
+    Convert one get_current_info dictionary into a fundamentals table row.
+    """
+    def value(key):
+        field = info.get(key)
+        return None if field in (None, 'N/A') else field
+
+    return (info['symbol'], value('longName'), value('sector'), value('industry'), value('marketCap'),
+            value('peRatio'), value('dividendYield'), value('currentPrice'), value('volume'),
+            value('averageVolume'), updated_at)
+
+
+def to_day(value):
+    """
+    Convert a date, datetime or 'YYYY-MM-DD' string to a daily_data day number.
+    """
+    if isinstance(value, datetime):
+        value = value.date()
+    elif isinstance(value, str):
+        value = date.fromisoformat(value[:10])
+    return (value - EPOCH).days
+
+
+def from_day(day):
+    """
+    Convert a daily_data day number to 'YYYY-MM-DD'.
+    """
+    return (EPOCH + timedelta(days=day)).isoformat()
+
+
+def configure_connection(conn):
+    """
+    Applies the storage PRAGMAs: WAL so readers never block the writer, synchronous=NORMAL (safe with WAL),
+    memory-mapped reads and a 64 MB page cache.
+    """
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute('PRAGMA mmap_size=268435456')
+    conn.execute('PRAGMA cache_size=-65536')
+    conn.execute('PRAGMA temp_store=MEMORY')
+
+
+def migrate(conn):
+    """
+    Brings a database to SCHEMA_VERSION. A version 1 daily_data table (date TEXT, PRIMARY KEY (date, symbol))
+    is copied into the version 2 layout in symbol order and dropped, inside one transaction.
+    """
+    if conn.execute('PRAGMA user_version').fetchone()[0] >= SCHEMA_VERSION:
+        return
+    columns = [row[1] for row in conn.execute('PRAGMA table_info(daily_data)')]
+    migrated = 'date' in columns
+    conn.execute('BEGIN')
+    try:
+        if migrated:
+            conn.execute('ALTER TABLE daily_data RENAME TO daily_data_v1')
+        conn.execute(DAILY_DATA_TABLE_SQL)
+        if migrated:
+            conn.execute(f'''
+                INSERT INTO daily_data (symbol, day, open, high, low, close, volume)
+                SELECT symbol, CAST(julianday(date) - {EPOCH_JULIAN_DAY} AS INTEGER), open, high, low, close, volume
+                FROM daily_data_v1 ORDER BY symbol, date
+            ''')
+            conn.execute('DROP TABLE daily_data_v1')
+        conn.execute(DAILY_DATA_INDEX_SQL)
+        conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+        conn.execute('COMMIT')
+    except Exception:
+        conn.execute('ROLLBACK')
+        raise
+    if migrated:
+        # Give the pages of the old table back to the filesystem
+        conn.execute('VACUUM')
+
+
+def connect(database_path=DATABASE_PATH, check_same_thread=True):
+    """
+    Opens the stock database with the storage PRAGMAs applied and the schema migrated to SCHEMA_VERSION.
+    """
+    conn = sqlite3.connect(database_path, check_same_thread=check_same_thread)
+    configure_connection(conn)
+    migrate(conn)
+    return conn
+
 
 class DatabaseManager:
-    def __init__(self):
-        self.conn = sqlite3.connect(DATABASE_PATH)
+    def __init__(self, database_path=DATABASE_PATH, check_same_thread=True):
+        """
+        :param database_path: Path of the SQLite database file.
+        :param check_same_thread: Passed to sqlite3.connect. Set to False when the manager is shared between
+                                  threads behind an external lock.
+        """
+        self.conn = connect(database_path, check_same_thread)
         self.cursor = self.conn.cursor()
 
+    def create_price_tables(self):
+        self.cursor.execute(STOCKS_TABLE_SQL)
+        self.cursor.execute(DAILY_DATA_TABLE_SQL)
+        self.cursor.execute(DAILY_DATA_INDEX_SQL)
+        self.cursor.execute(PRICE_COVERAGE_TABLE_SQL)
+        self.conn.commit()
+
     def get_stock_data(self, symbol, start_date, end_date):
+        """
+        :return: (date, symbol, open, high, low, close, volume) rows of `symbol` between the two dates
+                 (inclusive), oldest first. Served by a range seek on the (symbol, day) primary key.
+        """
+        self.cursor.execute(f'''
+            SELECT {DATE_FROM_DAY_SQL}, symbol, open, high, low, close, volume FROM daily_data
+            WHERE symbol = ? AND day BETWEEN ? AND ?
+            ORDER BY day
+        ''', (symbol, to_day(start_date), to_day(end_date)))
+        return self.cursor.fetchall()
+
+    def get_day_data(self, day):
+        """
+        :return: (date, symbol, open, high, low, close, volume) rows of every symbol on one date.
+        """
+        self.cursor.execute(f'''
+            SELECT {DATE_FROM_DAY_SQL}, symbol, open, high, low, close, volume FROM daily_data
+            WHERE day = ?
+            ORDER BY symbol
+        ''', (to_day(day),))
+        return self.cursor.fetchall()
+
+    def get_indicators(self, symbol, start_date, end_date):
         self.cursor.execute('''
-            SELECT * FROM daily_data
+            SELECT * FROM indicators
             WHERE symbol = ? AND date BETWEEN ? AND ?
             ORDER BY date
         ''', (symbol, start_date, end_date))
         return self.cursor.fetchall()
 
+    def insert_daily_data(self, rows):
+        """
+        Inserts (date, symbol, open, high, low, close, volume) rows in a single transaction.
+        """
+        with self.conn:
+            self.conn.executemany(DAILY_DATA_INSERT_SQL, rows)
+
+    def get_symbol_date_range(self, symbol):
+        self.cursor.execute('SELECT MIN(day), MAX(day) FROM daily_data WHERE symbol = ?', (symbol,))
+        return tuple(None if day is None else from_day(day) for day in self.cursor.fetchone())
+
+    def get_coverage(self, symbol):
+        self.cursor.execute('SELECT start_date, end_date FROM price_coverage WHERE symbol = ?', (symbol,))
+        return self.cursor.fetchone()
+
+    def set_coverage(self, symbol, start_date, end_date):
+        with self.conn:
+            self.conn.execute('INSERT OR REPLACE INTO price_coverage VALUES (?, ?, ?)',
+                              (symbol, start_date, end_date))
+
     def get_all_symbols(self):
         self.cursor.execute('SELECT symbol FROM stocks')
         return [row[0] for row in self.cursor.fetchall()]
@@ -33,8 +275,8 @@ class DatabaseManager:
         return self.cursor.fetchone()[0]
 
     def get_date_range(self):
-        self.cursor.execute('SELECT MIN(date), MAX(date) FROM daily_data')
-        return self.cursor.fetchone()
+        self.cursor.execute('SELECT MIN(day), MAX(day) FROM daily_data')
+        return tuple(None if day is None else from_day(day) for day in self.cursor.fetchone())
 
     def close(self):
         self.conn.close()
@@ -0,0 +1,280 @@
+import os
+import time
+import logging
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from database.db_manager import (DATABASE_PATH, INDICATORS_TABLE_SQL, INDICATORS_INDEX_SQL, connect, to_day,
+                                 from_day)
+
+TRADING_DAYS_PER_YEAR = 252
+SMA_WINDOWS = (20, 50, 200)
+EMA_SPANS = (12, 26)
+RSI_PERIOD = 14
+ATR_PERIOD = 14
+VOLATILITY_WINDOW = 20
+BETA_WINDOW = 60
+# Trading days of history re-read before the first new row, enough for the longest rolling window
+WARMUP_DAYS = max(SMA_WINDOWS + (VOLATILITY_WINDOW + 1, BETA_WINDOW + 1))
+
+INDICATOR_COLUMNS = ('sma_20', 'sma_50', 'sma_200', 'ema_12', 'ema_26', 'rsi_14', 'avg_gain_14', 'avg_loss_14',
+                     'atr_14', 'volatility_20', 'beta_60')
+# Exponentially smoothed indicators, continued from the last stored row on update
+RECURSIVE_COLUMNS = ('ema_12', 'ema_26', 'avg_gain_14', 'avg_loss_14', 'atr_14')
+# Lower bound for reads of the whole history
+EARLIEST_DAY = to_day('1900-01-01')
+
+
+def _with_date_index(frame):
+    """
+    Replace a daily_data day-number index with 'YYYY-MM-DD' strings, the key of the indicators table.
+    """
+    frame.index = frame.index.to_numpy(dtype=np.int64).astype('datetime64[D]').astype('U10')
+    return frame
+
+
+class _OwnBars:
+    """
+    Maps a date x symbol grid to one where each symbol's bars are stacked from the top without gaps: row k of
+    a column is that symbol's k-th own bar. Rolling windows, differences and smoothing computed on the packed
+    grid run over each symbol's own trading days, so a day missing for one symbol does not leave NaN holes in
+    its windows, and results do not depend on which symbols share a chunk.
+    """
+
+    def __init__(self, present):
+        """
+        :param present: Boolean date x symbol array of the cells holding a bar.
+        """
+        # Column-major order, so each symbol's bars come out in date order
+        self.columns, self.rows = np.nonzero(present.T)
+        counts = present.sum(axis=0)
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        self.ranks = np.arange(len(self.rows)) - np.repeat(starts, counts)
+        self.shape = (int(counts.max()) if len(counts) else 0, present.shape[1])
+
+    def pack(self, values, fill=np.nan):
+        """
+        :param values: Date x symbol array on the original grid.
+        :return: The packed array, `fill` below each symbol's last bar.
+        """
+        values = np.asarray(values)
+        packed = np.full(self.shape, fill, dtype=values.dtype)
+        packed[self.ranks, self.columns] = values[self.rows, self.columns]
+        return packed
+
+
+class IndicatorEngine:
+    """
+    Materializes technical indicators over daily_data into the indexed indicators table.
+
+    Each chunk of symbols is computed at once on matrices holding every symbol's own bars in order (see
+    _OwnBars), so windows count a symbol's trading days even when it has no bar on a day others have. On
+    update, only rows newer than a symbol's last stored indicator row are written: rolling indicators re-read
+    a warm-up window of WARMUP_DAYS of each symbol's own bars, and the exponentially smoothed ones (EMA, RSI
+    averages, ATR) continue from the values stored on the last row, so an update gives the same values as a
+    full rebuild.
+
+    Beta is measured against the equal-weighted average daily return of every symbol in daily_data.
+    """
+
+    def __init__(self, database_path=DATABASE_PATH, chunk_size=500):
+        """
+        :param database_path: Path of the SQLite database holding daily_data.
+        :param chunk_size: Number of symbols computed together; bounds memory use.
+        """
+        self.conn = connect(database_path)
+        self.chunk_size = chunk_size
+        with self.conn:
+            self.conn.execute(INDICATORS_TABLE_SQL)
+            self.conn.execute(INDICATORS_INDEX_SQL)
+
+    def rebuild(self):
+        """
+        Drops every stored indicator row and recomputes the full history of all symbols.
+        """
+        with self.conn:
+            self.conn.execute('DELETE FROM indicators')
+        return self.update()
+
+    def update(self, symbols=None):
+        """
+        Computes indicators for every daily_data row that has none yet.
+
+        :param symbols: Optional list of symbols to update; defaults to all symbols in daily_data.
+        :return: Number of indicator rows written.
+        """
+        started = time.perf_counter()
+        indicator_last = dict(self.conn.execute(
+            'SELECT symbol, MAX(date) FROM indicators GROUP BY symbol').fetchall())
+        if indicator_last:
+            # Only symbols with prices newer than the stalest indicator row can need work; the date range keeps
+            # this from scanning the whole daily_data table
+            rows = self.conn.execute('''
+                SELECT symbol, MAX(day) FROM daily_data WHERE day > ? GROUP BY symbol
+            ''', (to_day(min(indicator_last.values())),)).fetchall()
+        else:
+            rows = self.conn.execute('SELECT symbol, MAX(day) FROM daily_data GROUP BY symbol').fetchall()
+        data_last = {symbol: from_day(day) for symbol, day in rows}
+        if symbols is not None:
+            data_last = {symbol: data_last[symbol] for symbol in symbols if symbol in data_last}
+
+        # Symbols whose indicators stop on the same day share one warm-up window and one set of seeds
+        buckets = {}
+        for symbol, last_date in data_last.items():
+            computed_through = indicator_last.get(symbol)
+            if computed_through is None or computed_through < last_date:
+                buckets.setdefault(computed_through, []).append(symbol)
+
+        written = 0
+        for computed_through, bucket in sorted(buckets.items(), key=lambda item: item[0] or ''):
+            window_starts = self._window_starts(bucket, computed_through)
+            market = self._market_returns(min(window_starts.values()) if window_starts else None)
+            for i in range(0, len(bucket), self.chunk_size):
+                chunk = bucket[i:i + self.chunk_size]
+                window_start = min(window_starts[symbol] for symbol in chunk) if window_starts else None
+                rows = self._compute(chunk, computed_through, window_start, market)
+                with self.conn:
+                    self.conn.executemany(f'''
+                        INSERT OR REPLACE INTO indicators (date, symbol, {", ".join(INDICATOR_COLUMNS)})
+                        VALUES ({", ".join("?" * (len(INDICATOR_COLUMNS) + 2))})
+                    ''', rows)
+                written += len(rows)
+
+        elapsed = time.perf_counter() - started
+        logging.info(f"Indicators updated: {sum(len(b) for b in buckets.values())} symbols, {written} rows "
+                     f"in {elapsed:.1f}s.")
+        return written
+
+    def _window_starts(self, symbols, computed_through):
+        """
+        :return: {symbol: first date to read so its rolling windows ending after `computed_through` are
+                 complete}: its WARMUP_DAYS-th own bar back, or its first bar. Empty to read the whole history.
+        """
+        if computed_through is None:
+            return {}
+        starts = {}
+        through = to_day(computed_through)
+        for symbol in symbols:
+            # Seeks on the (symbol, day) primary key
+            row = self.conn.execute('''
+                SELECT day FROM daily_data WHERE symbol = ? AND day <= ? ORDER BY day DESC LIMIT 1 OFFSET ?
+            ''', (symbol, through, WARMUP_DAYS - 1)).fetchone()
+            if row is None:
+                row = self.conn.execute('SELECT MIN(day) FROM daily_data WHERE symbol = ?', (symbol,)).fetchone()
+            starts[symbol] = from_day(row[0])
+        return starts
+
+    def _market_returns(self, window_start):
+        """
+        :return: Series of the equal-weighted average daily return of all symbols, indexed by date.
+        """
+        frame = pd.read_sql_query('''
+            SELECT day, AVG(close / prev_close - 1) AS market FROM (
+                SELECT day, close, LAG(close) OVER (PARTITION BY symbol ORDER BY day) AS prev_close
+                FROM daily_data WHERE day >= ?
+            ) WHERE prev_close > 0 GROUP BY day
+        ''', self.conn, params=(to_day(window_start) if window_start else EARLIEST_DAY,))
+        return _with_date_index(frame.set_index('day'))['market']
+
+    def _load_prices(self, symbols, window_start):
+        placeholders = ", ".join("?" * len(symbols))
+        frame = pd.read_sql_query(f'''
+            SELECT day, symbol, high, low, close FROM daily_data
+            WHERE symbol IN ({placeholders}) AND day >= ?
+        ''', self.conn, params=(*symbols, to_day(window_start) if window_start else EARLIEST_DAY))
+        return {field: _with_date_index(frame.pivot(index='day', columns='symbol', values=field).sort_index())
+                for field in ('high', 'low', 'close')}
+
+    def _load_seeds(self, symbols, computed_through):
+        placeholders = ", ".join("?" * len(symbols))
+        frame = pd.read_sql_query(f'''
+            SELECT symbol, {", ".join(RECURSIVE_COLUMNS)} FROM indicators
+            WHERE date = ? AND symbol IN ({placeholders})
+        ''', self.conn, params=(computed_through, *symbols))
+        return frame.set_index('symbol')
+
+    @staticmethod
+    def _smooth(values, alpha, seeds, done, seed_rows):
+        """
+        Exponential smoothing down each column, y[t] = (1 - alpha) * y[t-1] + alpha * x[t]. With seeds, the
+        recursion restarts from the stored value in `seed_rows` (the bar on computed_through) instead of from
+        the first row; the cells in `done` are ignored.
+        """
+        if seeds is not None:
+            values = values.mask(done)
+            values = values.mask(seed_rows, np.broadcast_to(seeds.reindex(values.columns).to_numpy(), values.shape))
+        return values.ewm(alpha=alpha, adjust=False, ignore_na=True).mean()
+
+    def _compute(self, symbols, computed_through, window_start, market):
+        """
+        :return: Rows (date, symbol, *INDICATOR_COLUMNS) for every day after `computed_through`.
+        """
+        prices = self._load_prices(symbols, window_start)
+        grid = prices['close']
+        bars = _OwnBars(grid.notna().to_numpy())
+        columns = grid.columns
+
+        def packed(values):
+            return pd.DataFrame(bars.pack(values), columns=columns)
+
+        high, low, close = packed(prices['high']), packed(prices['low']), packed(grid)
+        dates = bars.pack(np.broadcast_to(grid.index.to_numpy(dtype='U10')[:, None], grid.shape), fill='')
+        present = dates != ''
+        done = present & (dates <= computed_through) if computed_through else None
+        seed_rows = dates == computed_through if computed_through else None
+        seeds = self._load_seeds(list(columns), computed_through) if computed_through else None
+
+        def seed(column):
+            return None if seeds is None else seeds[column]
+
+        indicators = {f'sma_{window}': close.rolling(window).mean() for window in SMA_WINDOWS}
+        for span in EMA_SPANS:
+            indicators[f'ema_{span}'] = self._smooth(close, 2 / (span + 1), seed(f'ema_{span}'), done, seed_rows)
+
+        delta = close.diff()
+        avg_gain = self._smooth(delta.clip(lower=0), 1 / RSI_PERIOD, seed('avg_gain_14'), done, seed_rows)
+        avg_loss = self._smooth((-delta).clip(lower=0), 1 / RSI_PERIOD, seed('avg_loss_14'), done, seed_rows)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            indicators['rsi_14'] = 100 - 100 / (1 + avg_gain / avg_loss)
+        indicators['avg_gain_14'] = avg_gain
+        indicators['avg_loss_14'] = avg_loss
+
+        prev_close = close.shift(1)
+        # fmax ignores a missing previous close, so the first day's true range is its high - low
+        true_range = np.fmax(high - low, np.fmax((high - prev_close).abs(), (low - prev_close).abs()))
+        indicators['atr_14'] = self._smooth(true_range, 1 / ATR_PERIOD, seed('atr_14'), done, seed_rows)
+
+        log_returns = np.log(close / prev_close)
+        indicators['volatility_20'] = (log_returns.rolling(VOLATILITY_WINDOW).std()
+                                       * np.sqrt(TRADING_DAYS_PER_YEAR))
+
+        # Returns over each symbol's own bars, against the market's return on the same days
+        returns = close / prev_close - 1
+        market = packed(np.broadcast_to(market.reindex(grid.index).to_numpy()[:, None], grid.shape))
+        mean_returns = returns.rolling(BETA_WINDOW).mean()
+        mean_market = market.rolling(BETA_WINDOW).mean()
+        covariance = (returns * market).rolling(BETA_WINDOW).mean() - mean_returns * mean_market
+        variance = (market * market).rolling(BETA_WINDOW).mean() - mean_market * mean_market
+        indicators['beta_60'] = covariance / variance
+
+        # One output row per stored price after computed_through
+        new_rows = present if computed_through is None else present & ~done
+        row_index, column_index = np.nonzero(new_rows)
+        values = [indicators[column].to_numpy()[row_index, column_index] for column in INDICATOR_COLUMNS]
+        # NaN (window not yet full) is stored as NULL
+        value_columns = [np.where(np.isnan(v), None, v).tolist() for v in values]
+        return list(zip(dates[row_index, column_index].tolist(), columns.to_numpy()[column_index].tolist(),
+                        *value_columns))
+
+    def close(self):
+        self.conn.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    engine = IndicatorEngine()
+    engine.update()
+    engine.close()
\ No newline at end of file
@@ -0,0 +1,115 @@
+import os
+import threading
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_manager import DATABASE_PATH, FUNDAMENTALS_TABLE_SQL, FUNDAMENTALS_INDEX_SQL, connect
+
+SCREEN_COLUMNS = ('symbol', 'long_name', 'sector', 'industry', 'market_cap', 'pe_ratio', 'dividend_yield',
+                  'current_price', 'volume', 'average_volume', 'updated_at')
+SORTABLE_COLUMNS = ('market_cap', 'pe_ratio', 'dividend_yield', 'current_price', 'volume', 'average_volume')
+
+# Buffett-style default: profitable large caps trading at a modest multiple, highest yield first
+VALUE_SCREEN = {
+    'min_pe': 0,
+    'max_pe': 15,
+    'min_market_cap': 10e9,
+    'order_by': 'dividend_yield',
+    'limit': 20,
+}
+
+
+class Screener:
+    """
+    Filters and ranks symbols by the fundamentals table (filled by DatabaseBuilder from get_current_info).
+    Every filter is a bound parameter over indexed columns, so a screen of the whole NASDAQ list is answered
+    in milliseconds.
+
+        Screener().screen(max_pe=15, min_market_cap=10e9, sector='Technology', order_by='dividend_yield')
+    """
+
+    def __init__(self, database_path=DATABASE_PATH):
+        """
+        :param database_path: Path of the SQLite database holding the fundamentals table.
+        """
+        # Screens may run on the office's stage threads, so one connection is shared behind a lock
+        self.conn = connect(database_path, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.conn:
+            self.conn.execute(FUNDAMENTALS_TABLE_SQL)
+            for index_sql in FUNDAMENTALS_INDEX_SQL:
+                self.conn.execute(index_sql)
+
+    def screen(self, min_pe=None, max_pe=None, min_market_cap=None, max_market_cap=None, min_dividend_yield=None,
+               sector=None, industry=None, order_by='market_cap', descending=True, limit=20):
+        """
+        :param min_pe: Minimum trailing P/E (exclusive). Symbols without a P/E are dropped by either P/E bound.
+        :param max_pe: Maximum trailing P/E (exclusive).
+        :param min_market_cap: Minimum market capitalization in dollars.
+        :param max_market_cap: Maximum market capitalization in dollars.
+        :param min_dividend_yield: Minimum dividend yield as a fraction (0.03 for 3%).
+        :param sector: Exact sector name, e.g. 'Technology'.
+        :param industry: Exact industry name.
+        :param order_by: One of SORTABLE_COLUMNS. Symbols missing the value sort last.
+        :param descending: Sort from the largest value down.
+        :param limit: Maximum number of symbols returned; None for all.
+        :return: List of dictionaries with SCREEN_COLUMNS keys, ranked.
+        """
+        if order_by not in SORTABLE_COLUMNS:
+            raise ValueError(f"Cannot sort by '{order_by}'; choose one of {SORTABLE_COLUMNS}.")
+
+        conditions = []
+        params = []
+        for column, operator, value in (('pe_ratio', '>', min_pe), ('pe_ratio', '<', max_pe),
+                                        ('market_cap', '>=', min_market_cap), ('market_cap', '<=', max_market_cap),
+                                        ('dividend_yield', '>=', min_dividend_yield),
+                                        ('sector', '=', sector), ('industry', '=', industry)):
+            if value is not None:
+                conditions.append(f"{column} {operator} ?")
+                params.append(value)
+
+        query = f"SELECT {', '.join(SCREEN_COLUMNS)} FROM fundamentals"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += f" ORDER BY {order_by} IS NULL, {order_by} {'DESC' if descending else 'ASC'}, symbol"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        with self.lock:
+            rows = self.conn.execute(query, params).fetchall()
+        return [dict(zip(SCREEN_COLUMNS, row)) for row in rows]
+
+    def sectors(self):
+        """
+        :return: Sorted list of the distinct sector names.
+        """
+        with self.lock:
+            rows = self.conn.execute('SELECT DISTINCT sector FROM fundamentals WHERE sector IS NOT NULL '
+                                     'ORDER BY sector').fetchall()
+        return [row[0] for row in rows]
+
+    def close(self):
+        self.conn.close()
+
+
+def format_shortlist(rows):
+    """
+    Render screen results as a compact ranked table for prompts.
+    """
+    def number(value, fmt):
+        return "n/a" if value is None else fmt.format(value)
+
+    lines = ["Rank,Ticker,Company,Sector,P/E,Market cap ($B),Dividend yield"]
+    for rank, row in enumerate(rows, 1):
+        market_cap = None if row['market_cap'] is None else row['market_cap'] / 1e9
+        lines.append(f"{rank},{row['symbol']},{row['long_name'] or 'n/a'},{row['sector'] or 'n/a'},"
+                     f"{number(row['pe_ratio'], '{:.1f}')},{number(market_cap, '{:.1f}')},"
+                     f"{number(row['dividend_yield'], '{:.2%}')}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    screener = Screener()
+    print(format_shortlist(screener.screen(**VALUE_SCREEN)))
+    screener.close()
\ No newline at end of file
@@ -1,15 +1,27 @@
 from office.office_simulation import OfficeSimulation
 from models.portfolio import Portfolio
+from models.portfolio_store import PortfolioStore
+from models.risk import RiskModel
+from database.screener import Screener, VALUE_SCREEN
+from tools.tracing import Tracer
 import time
 
 if __name__ == "__main__":
-    portfolio = Portfolio()
-    office = OfficeSimulation(portfolio)
+    # Resume from the persisted ledger so a restart keeps the holdings and cash
+    portfolio = Portfolio.load(PortfolioStore())
+    # The performance report read by the CEO and Buffett includes the portfolio's risk figures. Risk is tracked
+    # over the holdings, the benchmark and the value screen's shortlist rather than every listed symbol; stocks
+    # bought later are added when they first appear in the report
+    shortlist = [row['symbol'] for row in Screener().screen(**dict(VALUE_SCREEN, limit=200))]
+    portfolio.risk_model = RiskModel(symbols=list(portfolio.holdings) + shortlist)
+    # Every cycle's stages, model calls and network requests are traced to traces/
+    office = OfficeSimulation(portfolio, tracer=Tracer())
 
     while True:
         try:
             daily_report = office.run_daily_cycle()
             print(daily_report)
+            portfolio.checkpoint()
             # Wait for next day (you might want to implement a proper scheduling mechanism)
             time.sleep(86400)  # Sleep for 24 hours
         except Exception as e:
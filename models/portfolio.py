@@ -1,89 +1,249 @@
 import datetime
+import os
 from decimal import Decimal
 from typing import List, Dict
-from tools.stockretriever import get_current_info
+from tools.quote_service import QuoteService, default_quote_service
+from tools.clock import system_clock
+from models.risk import format_risk
+
+
+def to_cents(price: float) -> int:
+    return int(round(price * 100))
+
+
+def cents_to_decimal(cents: int) -> Decimal:
+    return Decimal(cents).scaleb(-2)
+
+
+def format_cents(cents: int) -> str:
+    """
+    Formats integer cents as dollars with two decimals, without going through Decimal or float.
+    """
+    sign = '-' if cents < 0 else ''
+    dollars, remainder = divmod(abs(cents), 100)
+    return f"{sign}{dollars}.{remainder:02d}"
+
+
+class Transaction:
+    """
+    One ledger entry. Prices are held as integer cents; `price` gives the Decimal dollar value.
+    """
+    __slots__ = ('date', 'type', 'symbol', 'quantity', 'price_cents')
+
+    def __init__(self, date: datetime.date, transaction_type: str, symbol: str, quantity: int, price_cents: int):
+        self.date = date
+        self.type = transaction_type
+        self.symbol = symbol
+        self.quantity = quantity
+        self.price_cents = price_cents
+
+    @property
+    def price(self) -> Decimal:
+        return cents_to_decimal(self.price_cents)
+
+    def __getitem__(self, key):
+        # Keeps transaction['date']-style access working for code written against the old dict ledger
+        return getattr(self, key)
+
+
+class Holding:
+    """
+    Position in one symbol: share count and total purchase cost in integer cents.
+    """
+    __slots__ = ('quantity', 'cost_cents')
+
+    def __init__(self, quantity: int = 0, cost_cents: int = 0):
+        self.quantity = quantity
+        self.cost_cents = cost_cents
+
+    @property
+    def cost(self) -> Decimal:
+        return cents_to_decimal(self.cost_cents)
+
+    def __getitem__(self, key):
+        return getattr(self, key)
 
 
 class Portfolio:
-    def __init__(self, initial_cash: float = 100000.0):
-        self.ledger: List[Dict] = []
-        self.cash: Decimal = Decimal(str(initial_cash))
-        self.holdings: Dict[str, Dict] = {}
+    def __init__(self, initial_cash: float = 100000.0, quote_service: QuoteService = None, clock=None,
+                 report_dir: str = '.', store=None, risk_model=None):
+        """
+        :param store: Optional PortfolioStore every transaction is appended to. Use Portfolio.load to resume a
+                      portfolio from an existing store.
+        :param risk_model: Optional models.risk.RiskModel. The performance report then includes volatility,
+                           value at risk, beta and concentration, so the CEO and Buffett see them too.
+        """
+        self.ledger: List[Transaction] = []
+        self.initial_cash_cents: int = to_cents(initial_cash)
+        self.cash_cents: int = self.initial_cash_cents
+        self.holdings: Dict[str, Holding] = {}
+        # Per-symbol indexes over the ledger, so reports never rescan it
+        self.first_purchase: Dict[str, datetime.date] = {}
+        self.lots: Dict[str, List[int]] = {}
+        self.quote_service = quote_service or default_quote_service
+        self.clock = clock or system_clock
+        self.report_dir = report_dir
+        self.store = store
+        self.risk_model = risk_model
+        # Callables notified of every new transaction (see add_listener)
+        self.listeners = []
+        if store is not None and store.get_initial_cash_cents() is None:
+            store.set_initial_cash_cents(self.initial_cash_cents)
+
+    @classmethod
+    def load(cls, store, initial_cash: float = 100000.0, quote_service: QuoteService = None, clock=None,
+             report_dir: str = '.', risk_model=None):
+        """
+        Rebuilds a portfolio from its store: the latest snapshot plus the transactions recorded after it. A new
+        store starts a fresh portfolio with `initial_cash`.
+        In memory, `ledger` only holds the replayed tail and later transactions; the full history stays in the
+        store and is read from there by the ledger report and get_lot_history.
+        """
+        portfolio = cls(initial_cash, quote_service, clock, report_dir, store, risk_model)
+        portfolio.initial_cash_cents = store.get_initial_cash_cents()
+        portfolio.cash_cents = portfolio.initial_cash_cents
+
+        after_seq = 0
+        snapshot = store.load_snapshot()
+        if snapshot is not None:
+            after_seq, portfolio.cash_cents, holdings, portfolio.first_purchase = snapshot
+            portfolio.holdings = {symbol: Holding(quantity, cost_cents)
+                                  for symbol, (quantity, cost_cents) in holdings.items()}
+        for date, transaction_type, symbol, quantity, price_cents in store.iter_transactions(after_seq):
+            portfolio._apply(Transaction(date, transaction_type, symbol, quantity, price_cents))
+        return portfolio
+
+    def checkpoint(self):
+        """
+        Writes a snapshot of the current state to the store, so the next load has no tail to replay.
+        """
+        if self.store is not None and self.store.last_snapshot_seq != self.store.last_seq:
+            self.store.write_snapshot(self.cash_cents, self.holdings, self.first_purchase)
+
+    def add_listener(self, listener):
+        """
+        :param listener: Callable(transaction) run after each buy or sell has been applied, e.g. to keep an
+                         incremental valuation (tools.price_stream.MarkToMarket) in step with the holdings.
+        """
+        self.listeners.append(listener)
+
+    @property
+    def cash(self) -> Decimal:
+        return cents_to_decimal(self.cash_cents)
+
+    @property
+    def initial_cash(self) -> Decimal:
+        return cents_to_decimal(self.initial_cash_cents)
 
     def _add_transaction(self, transaction_type: str, symbol: str, quantity: int, price: float, date: datetime.date):
-        transaction = {
-            'date': date,
-            'type': transaction_type,
-            'symbol': symbol,
-            'quantity': quantity,
-            'price': Decimal(str(price))
-        }
+        transaction = Transaction(date, transaction_type, symbol, quantity, to_cents(price))
+        # Persist before touching memory: a crash in between is repaired by replaying the stored tail
+        if self.store is not None:
+            self.store.append(transaction)
+        self._apply(transaction)
+        if self.store is not None and self.store.snapshot_due():
+            self.checkpoint()
+        for listener in self.listeners:
+            listener(transaction)
+
+    def _apply(self, transaction: Transaction):
+        symbol, quantity, price_cents, date = (transaction.symbol, transaction.quantity, transaction.price_cents,
+                                               transaction.date)
         self.ledger.append(transaction)
+        self.lots.setdefault(symbol, []).append(len(self.ledger) - 1)
 
-        if transaction_type == 'buy':
-            if symbol not in self.holdings:
-                self.holdings[symbol] = {'quantity': 0, 'cost': Decimal('0')}
-            self.holdings[symbol]['quantity'] += quantity
-            self.holdings[symbol]['cost'] += Decimal(str(price)) * Decimal(str(quantity))
-            self.cash -= Decimal(str(price)) * Decimal(str(quantity))
-        elif transaction_type == 'sell':
-            self.holdings[symbol]['quantity'] -= quantity
-            self.cash += Decimal(str(price)) * Decimal(str(quantity))
-            if self.holdings[symbol]['quantity'] == 0:
+        if transaction.type == 'buy':
+            holding = self.holdings.get(symbol)
+            if holding is None:
+                holding = self.holdings[symbol] = Holding()
+            holding.quantity += quantity
+            holding.cost_cents += price_cents * quantity
+            self.cash_cents -= price_cents * quantity
+            first_purchase = self.first_purchase.get(symbol)
+            if first_purchase is None or date < first_purchase:
+                self.first_purchase[symbol] = date
+        elif transaction.type == 'sell':
+            holding = self.holdings[symbol]
+            holding.quantity -= quantity
+            self.cash_cents += price_cents * quantity
+            if holding.quantity == 0:
                 del self.holdings[symbol]
 
+    def get_lot_history(self, symbol: str) -> List[Transaction]:
+        """
+        :return: Every ledger transaction for `symbol`, in the order they were recorded.
+        """
+        if self.store is not None:
+            return [Transaction(*row) for row in self.store.iter_transactions(symbol=symbol)]
+        return [self.ledger[i] for i in self.lots.get(symbol, [])]
+
     def buy_stock(self, symbol: str, quantity: int, price: float, date: datetime.date = None):
         if date is None:
-            date = datetime.date.today()
-        total_cost = Decimal(str(price)) * Decimal(str(quantity))
-        if total_cost > self.cash:
+            date = self.clock.today()
+        if to_cents(price) * quantity > self.cash_cents:
             raise ValueError("Insufficient funds to complete the purchase.")
         self._add_transaction('buy', symbol, quantity, price, date)
 
     def sell_stock(self, symbol: str, quantity: int, price: float, date: datetime.date = None):
         if date is None:
-            date = datetime.date.today()
+            date = self.clock.today()
         if symbol not in self.holdings or self.holdings[symbol]['quantity'] < quantity:
             raise ValueError("Insufficient stocks to complete the sale.")
         self._add_transaction('sell', symbol, quantity, price, date)
 
     def get_performance_report(self) -> str:
-        current_date = datetime.date.today()
-        current_info = get_current_info(list(self.holdings.keys()))
-        current_prices = {info['symbol']: Decimal(str(info['currentPrice'])) for info in current_info}
+        current_date = self.clock.today()
+        quotes = self.quote_service.get_quotes(self.holdings.keys())
 
-        report = f"Performance Report as of {current_date}\n\n"
-        report += f"Available Cash: ${self.cash:.2f}\n\n"
-        report += "Stock Performance:\n"
+        lines = [f"Performance Report as of {current_date}\n",
+                 f"Available Cash: ${self.cash:.2f}\n",
+                 "Stock Performance:"]
 
         total_portfolio_value = self.cash
+        # Market values of the quoted holdings, for the risk figures
+        values = {}
+        unquoted = []
         for symbol, holding in self.holdings.items():
-            quantity = holding['quantity']
-            cost_basis = holding['cost'] / Decimal(str(quantity))
-            current_price = current_prices[symbol]
+            quantity = holding.quantity
+            cost_basis = holding.cost / quantity
+            days_held = (current_date - self.first_purchase[symbol]).days
+            lines.append(f"  {symbol}:")
+            lines.append(f"    Quantity: {quantity}")
+            lines.append(f"    Cost Basis: ${cost_basis:.2f}")
 
-            total_value = current_price * Decimal(str(quantity))
+            if symbol in quotes:
+                current_price = Decimal(str(quotes[symbol]))
+                total_value = current_price * quantity
+                values[symbol] = float(total_value)
+                return_rate = ((current_price - cost_basis) / cost_basis) * 100
+                lines.append(f"    Current Price: ${current_price:.2f}")
+                lines.append(f"    Total Value: ${total_value:.2f}")
+                lines.append(f"    Return Rate: {return_rate:.2f}%")
+            else:
+                # Without a quote, value the holding at cost rather than failing the whole report, and say so
+                total_value = holding.cost
+                unquoted.append(symbol)
+                lines.append("    Current Price: unavailable, valued at cost")
+                lines.append(f"    Total Value: ${total_value:.2f} (at cost)")
+                lines.append("    Return Rate: unknown")
             total_portfolio_value += total_value
+            lines.append(f"    Days Held: {days_held}\n")
 
-            return_rate = ((current_price - cost_basis) / cost_basis) * 100
-
-            purchase_date = min(t['date'] for t in self.ledger if t['symbol'] == symbol and t['type'] == 'buy')
-            days_held = (current_date - purchase_date).days
-
-            report += f"  {symbol}:\n"
-            report += f"    Quantity: {quantity}\n"
-            report += f"    Cost Basis: ${cost_basis:.2f}\n"
-            report += f"    Current Price: ${current_price:.2f}\n"
-            report += f"    Total Value: ${total_value:.2f}\n"
-            report += f"    Return Rate: {return_rate:.2f}%\n"
-            report += f"    Days Held: {days_held}\n\n"
-
-        total_return = ((total_portfolio_value - Decimal('100000')) / Decimal('100000')) * 100
-        report += f"Total Portfolio Value: ${total_portfolio_value:.2f}\n"
-        report += f"Total Portfolio Return: {total_return:.2f}%\n"
+        total_return = ((total_portfolio_value - self.initial_cash) / self.initial_cash) * 100
+        lines.append(f"Total Portfolio Value: ${total_portfolio_value:.2f}")
+        lines.append(f"Total Portfolio Return: {total_return:.2f}%\n")
+        if unquoted:
+            lines.append(f"No current price for {', '.join(unquoted)}; valued at cost in the totals above.\n")
+        if self.risk_model is not None:
+            risk = self.risk_model.portfolio_risk(values, float(total_portfolio_value), as_of=current_date)
+            lines.append(format_risk(risk))
+            if unquoted:
+                lines.append(f"  Left out of the risk figures (no current price): {', '.join(unquoted)}")
+            lines.append("")
+        report = "\n".join(lines)
 
         # Save report to file
-        filename = f"portfolio_report_{current_date}.txt"
+        filename = os.path.join(self.report_dir, f"portfolio_report_{current_date}.txt")
         with open(filename, 'w') as f:
             f.write(report)
 
@@ -95,32 +255,36 @@ class Portfolio:
         symbol, quantity, price, and the remaining cash balance after each transaction.
         :return: A formatted report of the ledger as a string.
         """
-        report = f"Ledger Report as of {datetime.date.today()}\n"
-        report += "-" * 50 + "\n"
-        report += f"{'Date':<12} {'Type':<10} {'Symbol':<8} {'Quantity':<10} {'Price':<10} {'Cash Balance':<15}\n"
-        report += "-" * 50 + "\n"
-
-        running_cash = Decimal(str(self.cash))  # Keep track of the running cash balance
-        for transaction in self.ledger:
-            date = transaction['date'].strftime('%Y-%m-%d')
-            t_type = transaction['type']
-            symbol = transaction['symbol']
-            quantity = transaction['quantity']
-            price = transaction['price']
+        lines = [f"Ledger Report as of {self.clock.today()}",
+                 "-" * 50,
+                 f"{'Date':<12} {'Type':<10} {'Symbol':<8} {'Quantity':<10} {'Price':<10} {'Cash Balance':<15}",
+                 "-" * 50]
+
+        running_cash_cents = self.cash_cents  # Keep track of the running cash balance
+        if self.store is not None:
+            transactions = (Transaction(*row) for row in self.store.iter_transactions())
+        else:
+            transactions = self.ledger
+        for transaction in transactions:
+            date = transaction.date.isoformat()
+            t_type = transaction.type
+            quantity = transaction.quantity
 
             # Calculate running cash balance after each transaction
             if t_type == 'buy':
-                running_cash += price * quantity
+                running_cash_cents += transaction.price_cents * quantity
             elif t_type == 'sell':
-                running_cash -= price * quantity
+                running_cash_cents -= transaction.price_cents * quantity
 
-            report += f"{date:<12} {t_type:<10} {symbol:<8} {quantity:<10} ${price:<10.2f} ${running_cash:<15.2f}\n"
+            lines.append(f"{date:<12} {t_type:<10} {transaction.symbol:<8} {quantity:<10} "
+                         f"${format_cents(transaction.price_cents):<10} ${format_cents(running_cash_cents):<15}")
 
-        report += "-" * 50 + "\n"
+        lines.append("-" * 50)
+        report = "\n".join(lines) + "\n"
 
         # Save report to file
-        current_date = datetime.date.today()
-        filename = f"ledger_report_{current_date}.txt"
+        current_date = self.clock.today()
+        filename = os.path.join(self.report_dir, f"ledger_report_{current_date}.txt")
         with open(filename, 'w') as f:
             f.write(report)
 
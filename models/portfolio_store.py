@@ -0,0 +1,151 @@
+import datetime
+import json
+import os
+import sqlite3
+import threading
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PORTFOLIO_PATH = os.path.join(BASE_DIR, 'database', 'portfolio.db')
+
+
+class PortfolioStore:
+    """
+    Durable portfolio state in SQLite (WAL mode). Transactions are only ever appended, and a snapshot of
+    cash, holdings and first purchase dates is written every `snapshot_every` transactions. A portfolio is
+    rebuilt from the latest snapshot plus the transactions recorded after it, so startup cost is bounded by
+    `snapshot_every` rather than by the length of the ledger.
+    """
+
+    def __init__(self, path=PORTFOLIO_PATH, snapshot_every=1000, keep_snapshots=2):
+        """
+        :param path: SQLite file holding the ledger. Its directory is created if missing.
+        :param snapshot_every: Number of transactions between automatic snapshots.
+        :param keep_snapshots: Number of most recent snapshots kept on disk.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.snapshot_every = snapshot_every
+        self.keep_snapshots = keep_snapshots
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        # With WAL, NORMAL only gives up durability of the last commits on power loss, never consistency
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        with self.conn:
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                )
+            ''')
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS transactions (
+                    seq INTEGER PRIMARY KEY,
+                    date TEXT,
+                    type TEXT,
+                    symbol TEXT,
+                    quantity INTEGER,
+                    price_cents INTEGER
+                )
+            ''')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS idx_transactions_symbol ON transactions (symbol, seq)')
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS snapshots (
+                    seq INTEGER PRIMARY KEY,
+                    created_at REAL,
+                    cash_cents INTEGER,
+                    state TEXT
+                )
+            ''')
+        self.last_seq = self.conn.execute('SELECT COALESCE(MAX(seq), 0) FROM transactions').fetchone()[0]
+        self.last_snapshot_seq = self.conn.execute('SELECT COALESCE(MAX(seq), 0) FROM snapshots').fetchone()[0]
+
+    def get_initial_cash_cents(self):
+        """
+        :return: The initial cash recorded for this ledger, or None for a new store.
+        """
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'initial_cash_cents'").fetchone()
+        return int(row[0]) if row else None
+
+    def set_initial_cash_cents(self, cents):
+        with self.lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('initial_cash_cents', ?)", (str(cents),))
+
+    def append(self, transaction):
+        """
+        Appends one transaction and commits it.
+        :return: The sequence number of the stored transaction.
+        """
+        with self.lock, self.conn:
+            cursor = self.conn.execute(
+                'INSERT INTO transactions (date, type, symbol, quantity, price_cents) VALUES (?, ?, ?, ?, ?)',
+                (transaction.date.isoformat(), transaction.type, transaction.symbol, transaction.quantity,
+                 transaction.price_cents))
+            self.last_seq = cursor.lastrowid
+            return self.last_seq
+
+    def snapshot_due(self):
+        return self.last_seq - self.last_snapshot_seq >= self.snapshot_every
+
+    def write_snapshot(self, cash_cents, holdings, first_purchase):
+        """
+        Records the portfolio state as of the last appended transaction and drops older snapshots.
+        :param cash_cents: Cash balance in cents.
+        :param holdings: Dictionary of {symbol: Holding}.
+        :param first_purchase: Dictionary of {symbol: date of the first purchase}.
+        """
+        state = json.dumps({
+            'holdings': {symbol: [h.quantity, h.cost_cents] for symbol, h in holdings.items()},
+            'first_purchase': {symbol: date.isoformat() for symbol, date in first_purchase.items()},
+        })
+        with self.lock, self.conn:
+            self.conn.execute('INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?, ?)',
+                              (self.last_seq, time.time(), cash_cents, state))
+            self.conn.execute('''
+                DELETE FROM snapshots WHERE seq IN (
+                    SELECT seq FROM snapshots ORDER BY seq DESC LIMIT -1 OFFSET ?
+                )
+            ''', (self.keep_snapshots,))
+            self.last_snapshot_seq = self.last_seq
+
+    def load_snapshot(self):
+        """
+        :return: Tuple of (seq, cash_cents, {symbol: (quantity, cost_cents)}, {symbol: date}) for the latest
+                 snapshot, or None when no snapshot has been written yet.
+        """
+        row = self.conn.execute(
+            'SELECT seq, cash_cents, state FROM snapshots ORDER BY seq DESC LIMIT 1').fetchone()
+        if row is None:
+            return None
+        seq, cash_cents, state = row
+        state = json.loads(state)
+        holdings = {symbol: tuple(values) for symbol, values in state['holdings'].items()}
+        first_purchase = {symbol: datetime.date.fromisoformat(date)
+                          for symbol, date in state['first_purchase'].items()}
+        return seq, cash_cents, holdings, first_purchase
+
+    def iter_transactions(self, after_seq=0, symbol=None):
+        """
+        Yields (date, type, symbol, quantity, price_cents) rows in ledger order.
+        :param after_seq: Only yield transactions recorded after this sequence number.
+        :param symbol: Only yield transactions for this symbol.
+        """
+        if symbol is None:
+            cursor = self.conn.execute('''
+                SELECT date, type, symbol, quantity, price_cents FROM transactions WHERE seq > ? ORDER BY seq
+            ''', (after_seq,))
+        else:
+            cursor = self.conn.execute('''
+                SELECT date, type, symbol, quantity, price_cents FROM transactions
+                WHERE symbol = ? AND seq > ? ORDER BY seq
+            ''', (symbol, after_seq))
+        for date, t_type, t_symbol, quantity, price_cents in cursor:
+            yield datetime.date.fromisoformat(date), t_type, t_symbol, quantity, price_cents
+
+    def __len__(self):
+        return self.last_seq
+
+    def close(self):
+        self.conn.close()
\ No newline at end of file
@@ -0,0 +1,307 @@
+"""
+Portfolio risk from daily closes: volatility, historical and parametric value at risk, beta to a benchmark
+and concentration. RiskModel keeps a rolling window of daily returns for every symbol in daily_data along
+with their sums and cross products, so covariances of any subset of symbols come straight from cached
+statistics. New days are folded in incrementally (one matrix product per batch of days), and the whole
+window is only rebuilt when the universe of symbols changes.
+
+    model = RiskModel()
+    print(format_risk(model.portfolio_risk({'AAPL': 15000.0, 'MSFT': 9000.0}, nav=30000.0)))
+"""
+import math
+from statistics import NormalDist
+
+import numpy as np
+
+from database.columnar_cache import ColumnarCache
+from database.db_manager import DATABASE_PATH, connect, to_day
+
+TRADING_DAYS = 252
+DEFAULT_BENCHMARK = 'SPY'
+
+
+class RiskModel:
+    """
+    Rolling-window return statistics over a universe of symbols, read from the columnar export of daily_data
+    when there is one (see database.columnar_cache) and from daily_data otherwise.
+
+    Returns are simple close-to-close returns. A symbol without a close on a day gets a zero return for it,
+    so every window row covers every symbol and the cross products stay additive.
+    """
+
+    def __init__(self, database_path=DATABASE_PATH, window=TRADING_DAYS, benchmark=DEFAULT_BENCHMARK,
+                 symbols=None, rebuild_every=TRADING_DAYS):
+        """
+        :param database_path: SQLite database holding daily_data.
+        :param window: Number of most recent daily returns the statistics cover.
+        :param benchmark: Symbol beta is measured against. When it has no prices, the equal-weighted average
+                          of the universe is used instead.
+        :param symbols: Universe to track, e.g. the holdings and a screened shortlist; the benchmark and any
+                        symbol later passed to portfolio_risk are added to it. Every symbol in daily_data by
+                        default, which over a full exchange listing costs memory quadratic in the number of
+                        symbols for the cross products.
+        :param rebuild_every: Days folded in incrementally before the sums are recomputed from the window,
+                              which bounds floating-point drift from adding and removing days.
+        """
+        self.database_path = database_path
+        self.columnar_cache = ColumnarCache(database_path)
+        self.window = window
+        self.benchmark = benchmark
+        self.requested_symbols = list(dict.fromkeys(list(symbols) + [benchmark])) if symbols is not None else None
+        self.rebuild_every = rebuild_every
+        self._clear([])
+
+    def _clear(self, symbols):
+        self.symbols = list(symbols)
+        self.symbol_index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        columns = len(self.symbols)
+        # Ring buffer of the window's return rows, oldest at `start`
+        self.returns = np.zeros((self.window, columns))
+        self.start = 0
+        self.count = 0
+        self.sums = np.zeros(columns)
+        self.cross = np.zeros((columns, columns))
+        self.last_close = np.full(columns, np.nan)
+        self.last_day = None
+        self.updates_since_rebuild = 0
+
+    # Loading
+
+    def _read_closes(self, after_day, as_of_day, limit_days):
+        """
+        :return: (day numbers, symbols, days x symbols closes with NaN for missing bars) for days after
+                 `after_day` up to `as_of_day`, at most the last `limit_days` of them.
+        """
+        if self.columnar_cache.exists():
+            prices = self.columnar_cache.load()
+            rows = prices.row_range(-2 ** 31 if after_day is None else after_day + 1,
+                                    2 ** 31 - 1 if as_of_day is None else as_of_day)
+            rows = slice(max(rows.start, rows.stop - limit_days), rows.stop)
+            closes = prices['close'][rows]
+            symbols = prices.symbols
+            if self.requested_symbols is not None:
+                columns = [prices.symbol_index[symbol] for symbol in self.requested_symbols
+                           if symbol in prices.symbol_index]
+                closes = closes[:, columns]
+                symbols = [prices.symbols[column] for column in columns]
+            return np.array(prices.days[rows]), list(symbols), np.array(closes)
+
+        conn = connect(self.database_path)
+        try:
+            conditions, params = [], []
+            if after_day is not None:
+                conditions.append('day > ?')
+                params.append(after_day)
+            if as_of_day is not None:
+                conditions.append('day <= ?')
+                params.append(as_of_day)
+            where = f" WHERE {' AND '.join(conditions)}" if conditions else ''
+            days = [row[0] for row in conn.execute(
+                f'SELECT DISTINCT day FROM daily_data{where} ORDER BY day DESC LIMIT ?', params + [limit_days])]
+            days = np.array(sorted(days), dtype=np.int64)
+            if not len(days):
+                return days, [], np.empty((0, 0))
+            query = 'SELECT day, symbol, close FROM daily_data WHERE day >= ? AND day <= ?'
+            params = [int(days[0]), int(days[-1])]
+            if self.requested_symbols is not None:
+                # A range seek per symbol on the (symbol, day) primary key
+                query += f" AND symbol IN ({', '.join('?' * len(self.requested_symbols))})"
+                params.extend(self.requested_symbols)
+            rows = conn.execute(query, params).fetchall()
+        finally:
+            conn.close()
+        symbols = sorted({row[1] for row in rows})
+        symbol_index = {symbol: i for i, symbol in enumerate(symbols)}
+        closes = np.full((len(days), len(symbols)), np.nan)
+        if rows:
+            day_column, symbol_column, close_column = zip(*rows)
+            closes[np.searchsorted(days, np.array(day_column)),
+                   [symbol_index[symbol] for symbol in symbol_column]] = np.array(close_column, dtype=float)
+        return days, symbols, closes
+
+    def track(self, symbols):
+        """
+        Adds symbols to a limited universe; the window is reloaded on the next refresh when any is new.
+        """
+        if self.requested_symbols is None:
+            return
+        new = [symbol for symbol in dict.fromkeys(symbols) if symbol not in self.requested_symbols]
+        if new:
+            self.requested_symbols.extend(new)
+            self._clear([])
+
+    def refresh(self, as_of=None):
+        """
+        Folds in the days added since the last refresh.
+
+        :param as_of: Last day to include (date or 'YYYY-MM-DD'), e.g. a backtest's simulated today. Every
+                      available day by default.
+        :return: Number of new return rows.
+        """
+        as_of_day = to_day(as_of) if as_of is not None else None
+        if self.last_day is not None and as_of_day is not None and as_of_day < self.last_day:
+            # Moving back in time: the window has to be rebuilt
+            self._clear([])
+
+        # One extra day supplies the previous close of the first return
+        days, symbols, closes = self._read_closes(self.last_day, as_of_day, self.window + 1)
+        if not len(days):
+            return 0
+        first_load = self.last_day is None
+        if first_load:
+            self._clear(symbols)
+        elif symbols != self.symbols:
+            if not set(symbols) <= set(self.symbols):
+                # New symbols in daily_data: reload the window over the larger universe
+                self._clear([])
+                return self.refresh(as_of)
+            aligned = np.full((len(days), len(self.symbols)), np.nan)
+            aligned[:, [self.symbol_index[symbol] for symbol in symbols]] = closes
+            closes = aligned
+
+        returns = np.empty((len(days), len(self.symbols)))
+        for row, close in enumerate(closes):
+            with np.errstate(invalid='ignore', divide='ignore'):
+                returns[row] = close / self.last_close - 1
+            priced = np.isfinite(close)
+            self.last_close[priced] = close[priced]
+        returns[~np.isfinite(returns)] = 0.0
+        if first_load:
+            # The first day only provides closes
+            returns = returns[1:]
+        self.last_day = int(days[-1])
+        self._append(returns)
+        return len(returns)
+
+    def _append(self, returns):
+        """
+        Adds return rows to the window, dropping the oldest ones beyond its length, and updates the sums and
+        cross products by the difference.
+        """
+        if not len(returns):
+            return
+        if len(returns) >= self.window or self.updates_since_rebuild + len(returns) > self.rebuild_every:
+            rows = np.concatenate([self.window_returns(), returns])[-self.window:]
+            self.returns[:len(rows)] = rows
+            self.start, self.count = 0, len(rows)
+            self.sums = rows.sum(axis=0)
+            self.cross = rows.T @ rows
+            self.updates_since_rebuild = 0
+            return
+
+        overflow = max(0, self.count + len(returns) - self.window)
+        dropped = self.returns[(self.start + np.arange(overflow)) % self.window]
+        # Added rows count positively and dropped rows negatively, so one product updates the cross products
+        changes = np.concatenate([returns, dropped])
+        signs = np.concatenate([np.ones(len(returns)), -np.ones(overflow)])
+        self.sums += signs @ changes
+        self.cross += (changes * signs[:, None]).T @ changes
+        self.start = (self.start + overflow) % self.window
+        self.count -= overflow
+        positions = (self.start + self.count + np.arange(len(returns))) % self.window
+        self.returns[positions] = returns
+        self.count += len(returns)
+        self.updates_since_rebuild += len(returns)
+
+    # Statistics
+
+    def window_returns(self, columns=None):
+        """
+        :return: The window's return rows, oldest first, optionally restricted to column indexes.
+        """
+        rows = (self.start + np.arange(self.count)) % self.window
+        return self.returns[rows] if columns is None else self.returns[np.ix_(rows, columns)]
+
+    def covariance(self, symbols=None):
+        """
+        :return: Daily covariance matrix of `symbols` (every tracked symbol by default), in that order.
+        """
+        if self.count < 2:
+            raise ValueError("At least two days of returns are needed for a covariance.")
+        columns = slice(None) if symbols is None else [self.symbol_index[symbol] for symbol in symbols]
+        sums = self.sums[columns]
+        cross = self.cross[np.ix_(columns, columns)] if symbols is not None else self.cross
+        return (cross - np.outer(sums, sums) / self.count) / (self.count - 1)
+
+    def _market_covariance(self, columns):
+        """
+        :return: (covariance of each column with the market, market variance), the market being the
+                 benchmark symbol or the equal-weighted universe.
+        """
+        n = self.count
+        if self.benchmark in self.symbol_index and np.any(self.window_returns([self.symbol_index[self.benchmark]])):
+            b = self.symbol_index[self.benchmark]
+            covariances = (self.cross[columns, b] - self.sums[columns] * self.sums[b] / n) / (n - 1)
+            variance = (self.cross[b, b] - self.sums[b] ** 2 / n) / (n - 1)
+            return covariances, variance
+        size = len(self.symbols)
+        market_sum = self.sums.sum() / size
+        covariances = (self.cross[columns].sum(axis=1) / size - self.sums[columns] * market_sum / n) / (n - 1)
+        variance = (self.cross.sum() / size ** 2 - market_sum ** 2 / n) / (n - 1)
+        return covariances, variance
+
+    def portfolio_risk(self, values, nav, confidence=0.95, as_of=None):
+        """
+        :param values: {symbol: market value} of the holdings.
+        :param nav: Total portfolio value including cash, which carries no risk.
+        :param confidence: Confidence level of the one-day value at risk.
+        :param as_of: Passed to refresh, e.g. the portfolio's today.
+        :return: Dictionary of risk figures. Holdings without price history are listed under 'unpriced'
+                 and left out of the figures; their weight is reported as 'unpriced_weight'.
+        """
+        self.track(values)
+        self.refresh(as_of)
+        priced = [symbol for symbol in values if symbol in self.symbol_index and values[symbol]]
+        unpriced = [symbol for symbol in values if symbol not in self.symbol_index]
+        invested = sum(values.values())
+        weights_by_symbol = {symbol: value / invested for symbol, value in values.items()} if invested else {}
+        concentration = sum(weight ** 2 for weight in weights_by_symbol.values())
+        risk = {
+            'days': self.count,
+            'invested_weight': invested / nav if nav else 0.0,
+            'unpriced': unpriced,
+            'unpriced_weight': sum(values[symbol] for symbol in unpriced) / nav if nav else 0.0,
+            'concentration_hhi': concentration,
+            'effective_holdings': 1 / concentration if concentration else 0.0,
+            'largest_holding': max(weights_by_symbol.items(), key=lambda item: item[1]) if weights_by_symbol
+            else None,
+            'volatility': 0.0, 'var_parametric': 0.0, 'var_historical': 0.0, 'beta': 0.0
+        }
+        if not priced or self.count < 2 or not nav:
+            return risk
+
+        columns = [self.symbol_index[symbol] for symbol in priced]
+        weights = np.array([values[symbol] / nav for symbol in priced])
+        daily_variance = float(weights @ self.covariance(priced) @ weights)
+        daily_volatility = math.sqrt(max(daily_variance, 0.0))
+        portfolio_returns = self.window_returns(columns) @ weights
+        covariances, market_variance = self._market_covariance(columns)
+
+        risk['volatility'] = daily_volatility * math.sqrt(TRADING_DAYS)
+        risk['var_parametric'] = NormalDist().inv_cdf(confidence) * daily_volatility * nav
+        risk['var_historical'] = max(0.0, -float(np.percentile(portfolio_returns, (1 - confidence) * 100))) * nav
+        risk['beta'] = float(weights @ covariances / market_variance) if market_variance > 0 else 0.0
+        risk['confidence'] = confidence
+        return risk
+
+
+def format_risk(risk):
+    """
+    :return: Risk figures as lines for the performance report.
+    """
+    confidence = risk.get('confidence', 0.95)
+    lines = [f"Risk ({risk['days']} days of returns):",
+             f"  Annualized Volatility: {risk['volatility'] * 100:.2f}%",
+             f"  1-day VaR ({confidence:.0%}, historical): ${risk['var_historical']:.2f}",
+             f"  1-day VaR ({confidence:.0%}, parametric): ${risk['var_parametric']:.2f}",
+             f"  Beta: {risk['beta']:.2f}",
+             f"  Invested: {risk['invested_weight'] * 100:.1f}% of portfolio value",
+             f"  Concentration (HHI): {risk['concentration_hhi']:.3f} "
+             f"(~{risk['effective_holdings']:.1f} effective holdings)"]
+    if risk['largest_holding'] is not None:
+        symbol, weight = risk['largest_holding']
+        lines.append(f"  Largest Holding: {symbol} ({weight * 100:.1f}% of invested value)")
+    if risk['unpriced']:
+        lines.append(f"  No price history for: {', '.join(risk['unpriced'])} "
+                     f"({risk['unpriced_weight'] * 100:.1f}% of portfolio value, not in the figures above)")
+    return "\n".join(lines)
\ No newline at end of file
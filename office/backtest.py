@@ -0,0 +1,339 @@
+"""
+Offline backtesting: replays the OfficeSimulation daily cycle over past trading days with a simulated
+clock, prices from the daily_data table and a deterministic (or recorded) stand-in for the model.
+
+    python office/backtest.py --start 2021-01-04 --end 2023-12-29 --symbols AAPL MSFT NVDA
+"""
+import argparse
+import contextlib
+import math
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from agents.completion_clients import StubCompletionClient
+from database.columnar_cache import ColumnarCache
+from database.db_manager import DATABASE_PATH, connect, to_day
+from models.portfolio import Portfolio
+from office.office_simulation import OfficeSimulation
+from tools.clock import SimulatedClock
+from tools.quote_service import QuoteService
+
+DATE_FORMAT = '%Y-%m-%d'
+FIELDS = ('Open', 'High', 'Low', 'Close', 'Volume')
+TRIPLET_PATTERN = re.compile(r'\((\w+),\s*(\d+),\s*(buy|sell)\)')
+
+
+def _as_date(value):
+    if isinstance(value, str):
+        return datetime.strptime(value, DATE_FORMAT).date()
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+class HistoricalMarket:
+    """
+    Prices for a backtest, loaded once from daily_data into date x symbol matrices. It serves price history
+    (the PriceStore interface) and current prices (the QuoteService data-source interface) as of the
+    simulated clock, and never returns a bar from after the clock's date.
+    """
+
+    def __init__(self, clock, start_date, end_date, symbols=None, database_path=DATABASE_PATH, lookback_days=180,
+                 price_cache=None):
+        """
+        :param clock: SimulatedClock driving the backtest.
+        :param start_date: First day that will be simulated.
+        :param end_date: Last day that will be simulated.
+        :param symbols: Optional list restricting the universe; all symbols in daily_data by default.
+        :param lookback_days: Calendar days of history loaded before start_date for the agents' price requests.
+        :param price_cache: Optional CachedPrices (database.columnar_cache) to read instead of SQLite.
+        """
+        self.clock = clock
+        load_start = _as_date(start_date) - timedelta(days=lookback_days)
+        if price_cache is not None:
+            self._load_cached(price_cache, to_day(load_start), to_day(_as_date(end_date)), symbols)
+        else:
+            self._load_database(database_path, to_day(load_start), to_day(_as_date(end_date)), symbols)
+        self.symbol_index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        # Quotes use the last known close, so a symbol that did not trade on a day keeps its price
+        self.filled_closes = pd.DataFrame(self.matrices['Close']).ffill().to_numpy(dtype=np.float64)
+
+    def _load_database(self, database_path, start_day, end_day, symbols):
+        query = 'SELECT day, symbol, open, high, low, close, volume FROM daily_data WHERE day BETWEEN ? AND ?'
+        params = [start_day, end_day]
+        if symbols:
+            query += f" AND symbol IN ({', '.join('?' * len(symbols))})"
+            params.extend(symbols)
+        conn = connect(database_path)
+        try:
+            frame = pd.read_sql_query(query, conn, params=params)
+        finally:
+            conn.close()
+        if frame.empty:
+            raise ValueError("No daily_data rows in the requested backtest range.")
+
+        matrices = {field: frame.pivot(index='day', columns='symbol', values=field.lower()).sort_index()
+                    for field in FIELDS}
+        closes = matrices['Close']
+        self.dates = closes.index.to_numpy(dtype=np.int64).astype('datetime64[D]').astype('U10')
+        self.symbols = list(closes.columns)
+        self.matrices = {field: matrix.to_numpy(dtype=np.float64) for field, matrix in matrices.items()}
+
+    def _load_cached(self, price_cache, start_day, end_day, symbols):
+        rows = price_cache.row_range(start_day, end_day)
+        if symbols:
+            columns = sorted(price_cache.symbol_index[symbol] for symbol in set(symbols)
+                             if symbol in price_cache.symbol_index)
+        else:
+            columns = slice(None)
+        # Row slices of the mapped matrices are views; only a symbol subset is copied
+        matrices = {field: price_cache[field.lower()][rows][:, columns] for field in FIELDS}
+        # Keep the days on which at least one of the selected symbols traded, as the SQL load does
+        traded = ~np.isnan(matrices['Close']).all(axis=1)
+        if not traded.any():
+            raise ValueError("No daily_data rows in the requested backtest range.")
+        if not traded.all():
+            matrices = {field: matrix[traded] for field, matrix in matrices.items()}
+        self.dates = price_cache.days[rows][traded].astype('datetime64[D]').astype('U10')
+        self.symbols = np.asarray(price_cache.symbols)[columns].tolist()
+        self.matrices = matrices
+
+    def row_for(self, day):
+        """
+        :return: Index of the last loaded trading day on or before `day` (-1 if none).
+        """
+        return int(np.searchsorted(self.dates, _as_date(day).strftime(DATE_FORMAT), side='right')) - 1
+
+    def trading_days(self, start_date, end_date):
+        start = _as_date(start_date).strftime(DATE_FORMAT)
+        end = _as_date(end_date).strftime(DATE_FORMAT)
+        return [datetime.strptime(day, DATE_FORMAT).date() for day in self.dates if start <= day <= end]
+
+    def get_current_prices(self, symbols):
+        row = self.row_for(self.clock.today())
+        prices = {}
+        if row < 0:
+            return prices
+        for symbol in symbols:
+            column = self.symbol_index.get(symbol)
+            if column is not None and not math.isnan(self.filled_closes[row, column]):
+                prices[symbol] = float(self.filled_closes[row, column])
+        return prices
+
+    def get_history(self, symbol, start_date, end_date):
+        """
+        Columnar history for [start_date, end_date), cut off at the simulated date.
+        """
+        column = self.symbol_index.get(symbol)
+        end = min(_as_date(end_date), self.clock.today() + timedelta(days=1))
+        low = int(np.searchsorted(self.dates, _as_date(start_date).strftime(DATE_FORMAT), side='left'))
+        high = int(np.searchsorted(self.dates, end.strftime(DATE_FORMAT), side='left'))
+        if column is None or high <= low:
+            low = high = 0
+        traded = ~np.isnan(self.matrices['Close'][low:high, column if column is not None else 0])
+        history = {'Date': self.dates[low:high][traded]}
+        for field in FIELDS:
+            values = self.matrices[field][low:high, column if column is not None else 0][traded]
+            history[field] = values.astype(np.int64) if field == 'Volume' else values
+        return history
+
+
+class MomentumStrategy:
+    """
+    Deterministic stand-in for every agent prompt in the daily cycle. Buffett picks the `top_n` symbols with
+    the best trailing return, sells holdings that dropped out of the picks, buys new picks with an equal
+    share of the portfolio value, and the CEO always approves.
+    """
+
+    def __init__(self, market, portfolio, top_n=5, lookback=60):
+        self.market = market
+        self.portfolio = portfolio
+        self.top_n = top_n
+        self.lookback = lookback
+
+    def picks(self):
+        row = self.market.row_for(self.market.clock.today())
+        if row < self.lookback:
+            return []
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns = self.market.filled_closes[row] / self.market.filled_closes[row - self.lookback] - 1
+        returns = np.where(np.isfinite(returns), returns, -np.inf)
+        best = np.argsort(-returns, kind='stable')[:self.top_n]
+        return [self.market.symbols[i] for i in best if np.isfinite(returns[i])]
+
+    def orders(self):
+        picks = self.picks()
+        held = dict((symbol, holding['quantity']) for symbol, holding in self.portfolio.holdings.items())
+        prices = self.market.get_current_prices(list(held) + picks)
+
+        orders = []
+        cash = float(self.portfolio.cash)
+        value = cash + sum(quantity * prices.get(symbol, 0.0) for symbol, quantity in held.items())
+        # Sells first, so the operator frees cash before it buys
+        for symbol, quantity in held.items():
+            if symbol not in picks and symbol in prices:
+                orders.append((symbol, quantity, 'sell'))
+                cash += quantity * prices[symbol]
+        for symbol in picks:
+            if symbol in held or symbol not in prices:
+                continue
+            quantity = int(min(cash, value / self.top_n) // prices[symbol])
+            if quantity > 0:
+                orders.append((symbol, quantity, 'buy'))
+                cash -= quantity * prices[symbol]
+        return orders
+
+    def __call__(self, instruction, prompt):
+        if "Make a final recommendation" in prompt:
+            orders = self.orders()
+            lines = [f"({symbol}, {quantity}, {action})" for symbol, quantity, action in orders]
+            return "Momentum rebalance.\n" + ("\n".join(lines) if lines else "Hold all positions.")
+        if "Which stock symbols (tickers)" in prompt:
+            return ", ".join(self.picks()) or "None"
+        if "output only ticket number" in instruction:
+            candidates = re.findall(r'\b[A-Z][A-Z.\-]{0,5}\b', prompt)
+            return ", ".join(dict.fromkeys(s for s in candidates if s in self.market.symbol_index))
+        if "score the recommendation" in instruction:
+            return "95\nApproved by the backtest strategy."
+        if instruction == "Parse stock recommendation":
+            return "\n".join(f"({symbol}, {quantity}, {action})"
+                             for symbol, quantity, action in TRIPLET_PATTERN.findall(prompt))
+        return "Backtest stand-in response."
+
+
+def no_news(search_term):
+    return f"No news is replayed in backtests ({search_term.strip()})."
+
+
+class Backtest:
+    """
+    Replays OfficeSimulation.run_daily_cycle for every trading day in [start_date, end_date] and marks the
+    portfolio to market at each day's close.
+    """
+
+    def __init__(self, start_date, end_date, initial_cash=100000.0, symbols=None, database_path=DATABASE_PATH,
+                 client=None, strategy=MomentumStrategy, report_dir=None, quiet=True, price_cache=None):
+        """
+        :param client: Optional OpenAI-compatible client answering the agents, e.g. a ReplayCompletionClient
+                       over recorded responses. When omitted, `strategy` answers every prompt.
+        :param strategy: Factory (market, portfolio) -> responder(instruction, prompt) used when no client
+                         is given. MomentumStrategy by default.
+        :param report_dir: Directory for the daily report files. A temporary directory is used (and
+                           removed) when omitted.
+        :param quiet: Silence the agents' progress printing while replaying.
+        :param price_cache: Optional CachedPrices to load the market from instead of SQLite.
+        """
+        self.start_date = _as_date(start_date)
+        self.end_date = _as_date(end_date)
+        self.initial_cash = initial_cash
+        self.symbols = symbols
+        self.database_path = database_path
+        self.client = client
+        self.strategy = strategy
+        self.report_dir = report_dir
+        self.quiet = quiet
+        self.price_cache = price_cache
+        self.portfolio = None
+
+    def run(self):
+        """
+        :return: DataFrame indexed by date with cash, equity, nav, daily_return and cumulative_return.
+        """
+        clock = SimulatedClock(self.start_date)
+        market = HistoricalMarket(clock, self.start_date, self.end_date, self.symbols, self.database_path,
+                                  price_cache=self.price_cache)
+        report_dir = self.report_dir or tempfile.mkdtemp(prefix='backtest_')
+
+        try:
+            # Prices move once per simulated day, so quotes are never reused across days
+            quote_service = QuoteService(ttl_seconds=0, data_source=market)
+            self.portfolio = Portfolio(self.initial_cash, quote_service, clock, report_dir)
+            client = self.client or StubCompletionClient(self.strategy(market, self.portfolio))
+            office = OfficeSimulation(self.portfolio, client, quote_service=quote_service, price_store=market,
+                                      news_fetcher=no_news, clock=clock, report_dir=report_dir)
+
+            days = market.trading_days(self.start_date, self.end_date)
+            positions = np.zeros((len(days), len(market.symbols)))
+            cash = np.zeros(len(days))
+            started = time.perf_counter()
+            with open(os.devnull, 'w') as devnull, \
+                    (contextlib.redirect_stdout(devnull) if self.quiet else contextlib.nullcontext()):
+                for i, day in enumerate(days):
+                    clock.set(day)
+                    office.run_daily_cycle()
+                    for symbol, holding in self.portfolio.holdings.items():
+                        positions[i, market.symbol_index[symbol]] = holding['quantity']
+                    cash[i] = float(self.portfolio.cash)
+            self.elapsed = time.perf_counter() - started
+        finally:
+            if self.report_dir is None:
+                shutil.rmtree(report_dir, ignore_errors=True)
+
+        return self._mark_to_market(market, days, positions, cash)
+
+    def _mark_to_market(self, market, days, positions, cash):
+        """
+        Values every simulated day in one pass: end-of-day positions times that day's closes.
+        """
+        rows = np.array([market.row_for(day) for day in days], dtype=np.int64)
+        closes = np.nan_to_num(market.filled_closes[rows])
+        equity = (positions * closes).sum(axis=1)
+        nav = cash + equity
+        previous = np.concatenate(([self.initial_cash], nav[:-1]))
+        return pd.DataFrame({
+            'cash': cash,
+            'equity': equity,
+            'nav': nav,
+            'daily_return': nav / previous - 1,
+            'cumulative_return': nav / self.initial_cash - 1
+        }, index=pd.Index([day.strftime(DATE_FORMAT) for day in days], name='date'))
+
+
+def summarize(results):
+    """
+    :return: Total return, annualized volatility and maximum drawdown of a backtest result.
+    """
+    nav = results['nav'].to_numpy()
+    drawdown = nav / np.maximum.accumulate(nav) - 1
+    return {
+        'days': len(results),
+        'total_return': float(results['cumulative_return'].iloc[-1]) if len(results) else 0.0,
+        'annualized_volatility': float(results['daily_return'].std() * np.sqrt(252)) if len(results) > 1 else 0.0,
+        'max_drawdown': float(drawdown.min()) if len(results) else 0.0
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--start', required=True)
+    parser.add_argument('--end', required=True)
+    parser.add_argument('--cash', type=float, default=100000.0)
+    parser.add_argument('--symbols', nargs='*')
+    parser.add_argument('--database', default=DATABASE_PATH)
+    parser.add_argument('--columnar-cache', action='store_true',
+                        help="Load prices from the database's memory-mapped export, refreshing it first")
+    args = parser.parse_args()
+
+    price_cache = None
+    if args.columnar_cache:
+        cache = ColumnarCache(args.database)
+        cache.refresh()
+        price_cache = cache.load()
+    backtest = Backtest(args.start, args.end, args.cash, args.symbols, args.database, price_cache=price_cache)
+    results = backtest.run()
+    summary = summarize(results)
+    print(results.tail())
+    print(f"\n{summary['days']} trading days in {backtest.elapsed:.1f}s "
+          f"({summary['days'] / backtest.elapsed:.0f} days/sec)")
+    print(f"Total return: {summary['total_return']:.2%}")
+    print(f"Annualized volatility: {summary['annualized_volatility']:.2%}")
+    print(f"Max drawdown: {summary['max_drawdown']:.2%}")
\ No newline at end of file
@@ -0,0 +1,180 @@
+"""
+Runs several portfolios, each with its own OfficeSimulation, concurrently in one process with shared
+caches.
+
+    python office/multi_runner.py
+"""
+import contextvars
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openai import OpenAI
+
+from agents.agent import API_KEY
+from agents.warren_buffet import BUFFET_PHILOSOPHY
+from models.portfolio import Portfolio
+from models.portfolio_store import PortfolioStore
+from office.office_simulation import OfficeSimulation
+from tools.news_fetcher import NewsFetcher
+from tools.price_store import PriceStore
+from tools.quote_service import QuoteService
+from tools.tracing import Tracer
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPORTS_DIR = os.path.join(BASE_DIR, 'reports')
+
+
+class PortfolioConfig:
+    """
+    One strategy variant run by MultiPortfolioRunner.
+    """
+
+    def __init__(self, name, initial_cash=100000.0, philosophy=BUFFET_PHILOSOPHY, persist=True, **office_options):
+        """
+        :param name: Unique name, used as the portfolio's directory under the runner's report root.
+        :param initial_cash: Cash a new portfolio starts with.
+        :param philosophy: Investment philosophy Buffett follows in this office.
+        :param persist: Keep the ledger in <report dir>/portfolio.db and resume from it on the next start.
+        :param office_options: Further OfficeSimulation keyword arguments, e.g. max_rounds or screener.
+        """
+        self.name = name
+        self.initial_cash = initial_cash
+        self.philosophy = philosophy
+        self.persist = persist
+        self.office_options = office_options
+
+
+class MultiPortfolioRunner:
+    """
+    Hosts several OfficeSimulations in one process and runs their daily cycles concurrently. The offices
+    share one model client, one response cache, one QuoteService, one PriceStore and one news fetcher, so a
+    price, quote or article needed by several portfolios is fetched once. Each portfolio keeps its own
+    ledger, store and report directory (<report_root>/<name>/).
+
+        runner = MultiPortfolioRunner([PortfolioConfig('value'), PortfolioConfig('growth', philosophy=...)])
+        runner.run_day()
+        print(runner.throughput_report())
+    """
+
+    def __init__(self, configs, client=None, response_cache=None, quote_service=None, price_store=None,
+                 news_fetcher=None, clock=None, report_root=REPORTS_DIR, max_workers=None, trace=False):
+        """
+        :param configs: PortfolioConfig per office; names must be unique.
+        :param client: OpenAI-compatible client shared by every agent of every office. One OpenAI client on
+                       API_KEY is created if not given.
+        :param response_cache: Optional ResponseCache shared by every office (caching stays opt-in).
+        :param quote_service: Shared QuoteService. A new one is created if not given.
+        :param price_store: Shared PriceStore. One on the project database is created if not given.
+        :param news_fetcher: Shared news fetcher. A NewsFetcher is created if not given.
+        :param clock: Clock deciding what "today" is for every portfolio.
+        :param report_root: Directory holding one directory per portfolio.
+        :param max_workers: Daily cycles run at once; all offices by default.
+        :param trace: Trace each office's cycles into its report directory (see tools.tracing).
+        """
+        names = [config.name for config in configs]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Portfolio names must be unique: {names}")
+        self.client = client or OpenAI(api_key=API_KEY)
+        self.response_cache = response_cache
+        self.quote_service = quote_service or QuoteService()
+        self.price_store = price_store or PriceStore()
+        self.news_fetcher = news_fetcher or NewsFetcher()
+        self.max_workers = max_workers or len(configs)
+        # Per day: (number of portfolios run, seconds)
+        self.day_durations = []
+
+        self.offices = {}
+        self.stores = {}
+        for config in configs:
+            report_dir = os.path.join(report_root, config.name)
+            os.makedirs(report_dir, exist_ok=True)
+            if config.persist:
+                store = self.stores[config.name] = PortfolioStore(os.path.join(report_dir, 'portfolio.db'))
+                portfolio = Portfolio.load(store, config.initial_cash, self.quote_service, clock, report_dir)
+            else:
+                portfolio = Portfolio(config.initial_cash, self.quote_service, clock, report_dir)
+            tracer = Tracer(os.path.join(report_dir, 'traces')) if trace else None
+            self.offices[config.name] = OfficeSimulation(
+                portfolio, self.client, self.response_cache, price_store=self.price_store,
+                news_fetcher=self.news_fetcher, report_dir=report_dir, tracer=tracer,
+                philosophy=config.philosophy, **config.office_options)
+
+    def run_day(self):
+        """
+        Runs one daily cycle of every office concurrently. A failing office does not stop the others.
+
+        :return: Dictionary of {portfolio name: ledger report, or the exception its cycle raised}.
+        """
+        # Every office prices its book from the same fresh snapshot
+        self.quote_service.invalidate()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            # Each cycle runs in its own copy of the caller's context, so the offices' traces stay apart
+            futures = {name: executor.submit(contextvars.copy_context().run, self._run_office, name, office)
+                       for name, office in self.offices.items()}
+        self.day_durations.append((len(self.offices), time.perf_counter() - started))
+        return {name: future.result() for name, future in futures.items()}
+
+    def _run_office(self, name, office):
+        try:
+            ledger_report = office.run_daily_cycle()
+        except Exception as e:
+            print(f"An error occurred in portfolio {name}: {e}")
+            return e
+        if name in self.stores:
+            office.portfolio.checkpoint()
+        return ledger_report
+
+    def portfolios_per_hour(self):
+        """
+        :return: Daily cycles completed per hour of wall-clock time over every run_day so far.
+        """
+        portfolios = sum(count for count, _ in self.day_durations)
+        seconds = sum(duration for _, duration in self.day_durations)
+        return portfolios / seconds * 3600 if seconds else 0.0
+
+    def throughput_report(self):
+        """
+        :return: Per-day duration and overall throughput, plus how many requests the shared caches absorbed.
+        """
+        report = f"{'Day':>4} {'Portfolios':>11} {'Seconds':>9} {'Portfolios/hour':>16}\n"
+        for day, (count, seconds) in enumerate(self.day_durations, 1):
+            report += f"{day:>4} {count:>11} {seconds:>9.2f} {count / seconds * 3600:>16.0f}\n"
+        report += f"Overall: {self.portfolios_per_hour():.0f} portfolios/hour\n"
+        report += f"Shared quote fetches: {self.quote_service.network_fetches}, " \
+                  f"price history fetches: {self.price_store.network_fetches}"
+        if hasattr(self.news_fetcher, 'requests_made'):
+            report += f", news requests: {self.news_fetcher.requests_made} " \
+                      f"({self.news_fetcher.cache_hits} cache hits)"
+        parsers = [office.operator.parser for office in self.offices.values()]
+        parsed = sum(parser.hits + parser.misses for parser in parsers)
+        if parsed:
+            report += f"\nRecommendations parsed without the model: {sum(parser.hits for parser in parsers)}/{parsed}"
+        return report + "\n"
+
+    def close(self):
+        for store in self.stores.values():
+            store.close()
+
+
+# Main execution
+# Runs the value strategy with two amounts of starting cash next to a growth-oriented variant
+if __name__ == "__main__":
+    growth_philosophy = BUFFET_PHILOSOPHY.replace(
+        "follows a value-investing philosophy", "has turned to growth investing").replace(
+        "Your goal is to identify opportunities that align with your value investing principles.",
+        "Your goal is to find companies whose earnings can compound fastest over the next decade.")
+    runner = MultiPortfolioRunner([
+        PortfolioConfig('value'),
+        PortfolioConfig('value_large', initial_cash=1000000.0),
+        PortfolioConfig('growth', philosophy=growth_philosophy),
+    ], trace=True)
+    while True:
+        for name, result in runner.run_day().items():
+            print(f"=== {name} ===\n{result}")
+        print(runner.throughput_report())
+        # Wait for next day (you might want to implement a proper scheduling mechanism)
+        time.sleep(86400)
\ No newline at end of file
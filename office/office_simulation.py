@@ -1,98 +1,211 @@
-import datetime
+import functools
+import os
 from agents.ceo import CEOAgent
-from agents.warren_buffet import WarrenBuffetAgent
+from agents.warren_buffet import WarrenBuffetAgent, BUFFET_PHILOSOPHY
 from agents.analyst import AnalystAgent
 from agents.secretary import SecretaryAgent
 from agents.MarketResearchAgent import MarketResearchAgent
 from agents.operator import OperatorAgent
 from models.portfolio import Portfolio
+from office.stage_graph import Stage, StageGraph
+from database.screener import VALUE_SCREEN, format_shortlist
+from tools import tracing
 import time
 
 class OfficeSimulation:
-    def __init__(self, the_portfolio):
+    def __init__(self, the_portfolio, client=None, response_cache=None, quote_service=None, price_store=None,
+                 news_fetcher=None, clock=None, report_dir=None, screener=None, screen_criteria=None, tracer=None,
+                 max_rounds=6, cycle_deadline=None, philosophy=BUFFET_PHILOSOPHY, recommendation_parser=None,
+                 execute_unapproved=False):
+        """
+        :param the_portfolio: Portfolio the office manages.
+        :param client: Optional OpenAI-compatible client shared by every agent.
+        :param response_cache: Optional ResponseCache shared by every agent. Caching stays opt-in; use
+                               agent.disable_cache() to turn it off for individual agents.
+        :param quote_service: Optional QuoteService used for both the performance report and order execution.
+                              Defaults to the portfolio's.
+        :param price_store: Optional price history source for the research agent (see tools.price_store).
+        :param news_fetcher: Optional callable(search_term) -> news text for the research agent.
+        :param clock: Clock deciding what "today" is. Defaults to the portfolio's clock.
+        :param report_dir: Directory for meeting notes. Defaults to the portfolio's report directory.
+        :param screener: Optional database.screener.Screener. Its ranked shortlist is given to Buffett when he
+                         picks stocks to investigate.
+        :param screen_criteria: Keyword arguments for screener.screen. Defaults to VALUE_SCREEN.
+        :param tracer: Optional tools.tracing.Tracer. Each daily cycle is then traced (rounds, stages, model
+                       calls, yfinance and news requests), written as JSONL and summarized at the end.
+        :param max_rounds: Meeting rounds after which the meeting ends without approval. None for no limit.
+        :param cycle_deadline: Seconds of wall-clock time per daily cycle after which no further revision round
+                               is started and the meeting ends without approval. None for no deadline.
+        :param philosophy: Investment philosophy Buffett follows (see agents.warren_buffet.BUFFET_PHILOSOPHY).
+        :param recommendation_parser: agents.recommendation_parser.RecommendationParser the operator tries
+                                      before asking the model. Defaults to one on the stock database.
+        :param execute_unapproved: When a meeting ends without approval, execute the latest recommendation
+                                   anyway (marked as not approved in the log and the meeting notes). By
+                                   default no orders are placed unless the CEO approves.
+        """
         self.portfolio = the_portfolio
-        self.ceo = CEOAgent()
-        self.buffet = WarrenBuffetAgent()
-        self.analyst = AnalystAgent()
-        self.research_agent = MarketResearchAgent()
-        self.secretary = SecretaryAgent()
-        self.operator = OperatorAgent(self.portfolio)
+        if quote_service is not None:
+            self.portfolio.quote_service = quote_service
+        if clock is not None:
+            self.portfolio.clock = clock
+        self.clock = self.portfolio.clock
+        self.report_dir = report_dir or self.portfolio.report_dir
+        self.screener = screener
+        self.screen_criteria = screen_criteria or VALUE_SCREEN
+        self.tracer = tracer
+        self.max_rounds = max_rounds
+        self.cycle_deadline = cycle_deadline
+        self.execute_unapproved = execute_unapproved
+        self.ceo = CEOAgent(client, response_cache)
+        self.buffet = WarrenBuffetAgent(client, response_cache, philosophy)
+        self.analyst = AnalystAgent(client, response_cache)
+        self.research_agent = MarketResearchAgent(price_store, client, response_cache, news_fetcher, self.clock)
+        self.secretary = SecretaryAgent(client, response_cache)
+        self.operator = OperatorAgent(self.portfolio, client, response_cache, recommendation_parser)
+
+        self.round_graph = self._build_round_graph()
+        # Per-round {stage name: (start, end)} seconds from the start of the round
+        self.stage_timings = []
+        # Per-round names of the stages reused from an earlier round of the same day
+        self.reused_stages = []
+
+    def _build_round_graph(self):
+        """
+        Declares one meeting round as a graph of stages. Stages only wait for the values they consume, so the
+        analyst's report runs alongside Buffett's final decision, and the CEO evaluation and the operator's
+        parsing of the recommendation run together once the recommendation exists. The CEO's decision is
+        available as soon as the score has been streamed; his written feedback, and the meeting notes that
+        need it, follow in the background.
+
+        A revision round keeps the day's tasks and passes the CEO's feedback ('revision') to Buffett's choice of
+        stocks and final decision only. Run with a memo, the market questions and research are then reused,
+        and the price history and analysis too when he sticks with the same tickers.
+        """
+        return StageGraph([
+            # 2. Buffet raises market questions based on the tasks
+            Stage('market_questions', self.buffet.raise_market_questions, ['tasks'], ['market_questions'],
+                  "Buffett is thinking about market information!"),
+            # 3. Research agent fetches market information
+            Stage('market_info', self.research_agent.fetch_market_information, ['market_questions'],
+                  ['market_info'], "Market Research Agent is gathering market information!"),
+            # 4. Buffet reviews market info and decides which stock trends to investigate
+            Stage('stock_trend_request', self.buffet.decide_stocks_for_trend_analysis,
+                  ['market_info', 'shortlist', 'revision'], ['stock_trend_request'],
+                  "Buffett is deciding which stocks to investigate further!"),
+            # 5. Research agent retrieves stock trend data for the tickers Buffett named
+            Stage('tickers', self.research_agent.extract_tickers, ['stock_trend_request'], ['tickers']),
+            Stage('price_trends', self.research_agent.fetch_price_history, ['tickers'],
+                  ['price_trends'], "Market Research Agent is retrieving stock trend data!"),
+            # 6. Analyst agent analyzes the stock price trends and provides a report
+            Stage('analysis_report', self.analyst.analyze_stock_data, ['price_trends'], ['analysis_report'],
+                  "Analyst is analyzing the stock price trends!"),
+            # 7. Buffet makes final decisions (from the price trends; it does not read the analysis report)
+            Stage('recommendations', self.buffet.make_final_decision,
+                  ['performance_review', 'market_questions', 'price_trends', 'stock_trend_request', 'market_info',
+                   'revision'], ['recommendations'], "Buffett is making final decisions based on the stock trends!"),
+            # 8. CEO evaluates recommendations, deciding as soon as the score arrives
+            Stage('evaluation', functools.partial(self.ceo.evaluate_recommendations, stream=True),
+                  ['recommendations', 'performance_review'], ['decision', 'pending_feedback'],
+                  "CEO is evaluating Buffett's recommendations!"),
+            Stage('feedback', lambda pending_feedback: pending_feedback.result(), ['pending_feedback'],
+                  ['feedback']),
+            # 9. Secretary takes notes
+            Stage('meeting_note', self.secretary.generate_meeting_notes,
+                  ['tasks', 'market_questions', 'market_info', 'stock_trend_request', 'analysis_report',
+                   'recommendations', 'feedback'], ['meeting_note'], "Secretary is generating meeting notes!"),
+            # 10. Operator parses the recommendation alongside the evaluation; it only executes on approval
+            Stage('execution', self.operator.parse_recommendation, ['recommendations'], ['execution'],
+                  "Operator is parsing the recommendations!"),
+        ])
+
+    @property
+    def agents(self):
+        return {
+            'ceo': self.ceo,
+            'buffet': self.buffet,
+            'analyst': self.analyst,
+            'research_agent': self.research_agent,
+            'secretary': self.secretary,
+            'operator': self.operator
+        }
+
+    def cache_stats(self):
+        """
+        :return: Dictionary of {agent name: (cache hits, cache misses)}.
+        """
+        return {name: (agent.cache_hits, agent.cache_misses) for name, agent in self.agents.items()}
+
+    def get_shortlist(self):
+        """
+        :return: Today's ranked fundamental screen as prompt text, or None without a screener.
+        """
+        if self.screener is None:
+            return None
+        rows = self.screener.screen(**self.screen_criteria)
+        return format_shortlist(rows) if rows else None
 
     def run_daily_cycle(self):
         """
         Executes the daily cycle of stock investment, logging each step in the process.
         """
+        if self.tracer is None:
+            return self._run_daily_cycle()
 
-        today = datetime.date.today().strftime('%Y-%m-%d')
+        with self.tracer.cycle(self.clock.today().strftime('%Y-%m-%d')):
+            ledger_report = self._run_daily_cycle()
+        print(self.tracer.summary_report())
+        if self.tracer.last_path:
+            print(f"Trace saved as {self.tracer.last_path}")
+        return ledger_report
+
+    def _run_daily_cycle(self):
+        today = self.clock.today().strftime('%Y-%m-%d')
         print(f"""Today is {today}, let's make some money!""")
 
         # 1. CEO reviews performance and outlines tasks
         print("CEO is reviewing portfolio performance and outlining tasks!")
-        performance_review = self.portfolio.get_performance_report()
-        tasks = self.ceo.review_and_assign_tasks(performance_review)
-        meeting_notes = []
+        with tracing.span('stage', 'performance_review'):
+            performance_review = self.portfolio.get_performance_report()
+        with tracing.span('stage', 'tasks'):
+            tasks = self.ceo.review_and_assign_tasks(performance_review)
+        with tracing.span('stage', 'shortlist'):
+            shortlist = self.get_shortlist()
+        # Every round's run; the meeting notes of earlier rounds finish while later rounds are under way
+        rounds = []
+        # Stage inputs and outputs of the day's rounds, so a revision only recomputes what it changes
+        memo = {}
+        revision = None
+        started = time.perf_counter()
 
         while True:
 
-            print(f"\n*** Stock investment meeting round {len(meeting_notes) + 1} ***")
-
-            # 2. Buffet raises market questions based on the tasks
-            print("Buffett is thinking about market information!")
-            market_questions = self.buffet.raise_market_questions(tasks)
-
-            # 3. Research agent fetches market information
-            print("Market Research Agent is gathering market information!")
-            market_info = self.research_agent.fetch_market_information(market_questions)
-
-            # 4. Buffet reviews market info and decides which stock trends to investigate
-            print("Buffett is deciding which stocks to investigate further!")
-            stock_trend_request = self.buffet.decide_stocks_for_trend_analysis(market_info)
+            print(f"\n*** Stock investment meeting round {len(rounds) + 1} ***")
 
-            # 5. Research agent retrieves stock trend data
-            print("Market Research Agent is retrieving stock trend data!")
-            price_trends = self.research_agent.get_stock_price_history(stock_trend_request)
-
-            # 6. Analyst agent analyzes the stock price trends and provides a report
-            print("Analyst is analyzing the stock price trends!")
-            analysis_report = self.analyst.analyze_stock_data(price_trends)
+            with tracing.span('round', f"round {len(rounds) + 1}"):
+                run = self.round_graph.start({'tasks': tasks, 'performance_review': performance_review,
+                                              'shortlist': shortlist, 'revision': revision}, memo)
+                rounds.append(run)
+                values = run.wait_for(['recommendations', 'decision'])
 
-            # 7. Buffet makes final decisions based on the analysis report
-            print("Buffett is making final decisions based on the analysis report!")
-            recommendations = self.buffet.make_final_decision(performance_review, market_questions, price_trends,
-                                                              stock_trend_request, market_info)
-
-            # 8. CEO evaluates recommendations
-            print("CEO is evaluating Buffett's recommendations!")
-            decision, feedback = self.ceo.evaluate_recommendations(recommendations, performance_review)
-
-            # 9. Secretary takes notes
-            print("Secretary is generating meeting notes!")
-            meeting_note = self.secretary.generate_meeting_notes(tasks, market_questions, market_info,
-                                                                 stock_trend_request, analysis_report,
-                                                                 recommendations, feedback)
-            meeting_notes.append(meeting_note)
+            recommendations = values['recommendations']
+            decision = values['decision']
 
             if decision == 'approve':
                 # 10. Update portfolio based on approved recommendations
                 print("CEO approved recommendations!")
-                print("Generating the daily report with all meeting notes!")
-                daily_report = self.generate_daily_report(meeting_notes)
-                print("Operator is executing the approved recommendations!")
-                execution = self.operator.parse_recommendation(recommendations)
-                self.operator.execute_recommendation(execution)
+                self._close_meeting(rounds, approved=True)
+                break
+
+            # A reused evaluation means Buffett repeated the recommendation, so further rounds would only repeat it
+            if 'evaluation' in run.reused or \
+                    (self.max_rounds is not None and len(rounds) >= self.max_rounds) or \
+                    (self.cycle_deadline is not None and time.perf_counter() - started >= self.cycle_deadline):
+                print("Enough time for today's meeting; the CEO did not approve any recommendation!")
+                self._close_meeting(rounds, approved=False)
                 break
 
-            # if len(meeting_notes) > 5:
-            #     # 10. Update portfolio based on approved recommendations
-            #     print("Enough time for today's meeting, let's just go from there!")
-            #     print("Generating the daily report with all meeting notes!")
-            #     daily_report = self.generate_daily_report(meeting_notes)
-            #     execution = self.operator.parse_recommendation(recommendations)
-            #     self.operator.execute_recommendation(execution)
-            #     break
-
-            # Loop with the updated tasks based on meeting notes
-            tasks = f"""
+            # Loop with the CEO's feedback on the recommendation; the day's tasks stay the same
+            revision = f"""
             Your recent stock recommendation has been reviewed by the CEO of the investment firm, 
             and feedback has been provided for revision. 
             You need to change the stock choice/ stock quantity in your portfolio.
@@ -101,23 +214,53 @@ class OfficeSimulation:
             {recommendations}
             
             CEO's Feedback:
-            {feedback}
+            {run.wait_for(['feedback'])['feedback']}
             """
 
         # 11. Generate daily report
-        ledger_report = self.portfolio.generate_ledger_report()
+        with tracing.span('stage', 'ledger_report'):
+            ledger_report = self.portfolio.generate_ledger_report()
         return ledger_report
 
+    def _close_meeting(self, rounds, approved):
+        """
+        Executes the last round's recommendation if the CEO approved it (or execute_unapproved is set), then
+        waits for every round's meeting notes and saves them.
+        """
+        if approved:
+            outcome = "The CEO approved the recommendation; the orders were executed."
+            print("Operator is executing the approved recommendations!")
+        elif self.execute_unapproved:
+            outcome = "NOT APPROVED: the meeting ended without the CEO's approval; the latest recommendation " \
+                      "was executed anyway."
+            print("Operator is executing the latest recommendations, which the CEO did NOT approve!")
+        else:
+            outcome = "The meeting ended without the CEO's approval; no orders were placed."
+            print("No orders are placed today without the CEO's approval.")
+        if approved or self.execute_unapproved:
+            with tracing.span('stage', 'execute'):
+                self.operator.execute_recommendation(rounds[-1].wait_for(['execution'])['execution'])
+        print("Generating the daily report with all meeting notes!")
+        meeting_notes = []
+        for run in rounds:
+            values = run.result()
+            print(self.round_graph.timing_report(run.timings, run.reused))
+            self.stage_timings.append(dict(run.timings))
+            self.reused_stages.append(set(run.reused))
+            meeting_notes.append(values['meeting_note'])
+        meeting_notes.append(f"\nOutcome: {outcome}\n")
+        self.generate_daily_report(meeting_notes)
+
     def generate_daily_report(self, meeting_notes):
         """
         Generate a daily report (meeting notes) and save it to a txt file with today's date.
         :param meeting_notes: The compiled meeting notes (string) from the SecretaryAgent.
         """
         # Get today's date to use in the filename
-        today = datetime.date.today().strftime('%Y-%m-%d')
+        today = self.clock.today().strftime('%Y-%m-%d')
 
         # Define the filename using today's date
-        filename = f"meeting_notes_{today}.txt"
+        filename = os.path.join(self.report_dir, f"meeting_notes_{today}.txt")
 
         # Write the meeting notes to the file
         for meeting_note in meeting_notes:
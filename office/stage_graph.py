@@ -0,0 +1,246 @@
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from tools import tracing
+
+
+class Stage:
+    """
+    One step of a workflow: a callable together with the named values it consumes and produces.
+    """
+
+    def __init__(self, name, func, inputs, outputs, description=None):
+        """
+        :param name: Unique stage name, used for timings.
+        :param func: Callable invoked with the input values as positional arguments, in `inputs` order.
+        :param inputs: Names of the values the stage consumes.
+        :param outputs: Names of the values the stage produces. With more than one output, `func` must return
+                        a tuple in the same order.
+        :param description: Message printed when the stage starts.
+        """
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.description = description
+
+
+class StageRun:
+    """
+    A started StageGraph run. Stages keep running on worker threads, and each value can be read as soon as
+    its producer has finished, before the rest of the graph is done.
+    """
+
+    def __init__(self, initial_values):
+        self.values = dict(initial_values)
+        self.timings = {}
+        # Stages whose outputs were taken from the memo instead of being recomputed
+        self.reused = set()
+        self.condition = threading.Condition()
+        self.error = None
+        self.finished = False
+
+    def _publish(self, name, outputs, timing, reused=False):
+        with self.condition:
+            self.values.update(outputs)
+            self.timings[name] = timing
+            if reused:
+                self.reused.add(name)
+            self.condition.notify_all()
+
+    def _finish(self, error=None):
+        with self.condition:
+            self.error = error
+            self.finished = True
+            self.condition.notify_all()
+
+    def wait_for(self, names):
+        """
+        Blocks until every value in `names` is available.
+
+        :return: Dictionary of the values produced so far.
+        :raises: The exception of a failed stage, or KeyError when the run ended without producing a value.
+        """
+        with self.condition:
+            self.condition.wait_for(lambda: self.finished or all(name in self.values for name in names))
+            if self.error is not None:
+                raise self.error
+            missing = [name for name in names if name not in self.values]
+            if missing:
+                raise KeyError(f"The run finished without producing {missing}.")
+            return dict(self.values)
+
+    def result(self):
+        """
+        Blocks until every stage has finished.
+
+        :return: Dictionary of the initial values plus every stage output.
+        """
+        with self.condition:
+            self.condition.wait_for(lambda: self.finished)
+            if self.error is not None:
+                raise self.error
+            return dict(self.values)
+
+
+def _same_inputs(current, previous):
+    """
+    Whether a stage's inputs match those of its memoized run. Text and other plain values compare by value.
+    Anything else (price frames, futures) only matches when it is the very object produced before, i.e. when
+    its own producer was reused too.
+    """
+    if len(current) != len(previous):
+        return False
+    for value, old in zip(current, previous):
+        if value is old:
+            continue
+        if type(value) is not type(old) or not isinstance(value, (str, int, float, tuple, frozenset)):
+            return False
+        if value != old:
+            return False
+    return True
+
+
+class StageGraph:
+    """
+    Runs a set of stages as a dependency graph: each stage is started on a worker thread as soon as all of its
+    inputs are available, so independent stages overlap. Start and end times of every stage are recorded so
+    the critical path of a run can be inspected, and each stage runs in a 'stage' span (see tools.tracing).
+    """
+
+    def __init__(self, stages, max_workers=None):
+        self.stages = {stage.name: stage for stage in stages}
+        self.producers = {}
+        for stage in stages:
+            for output in stage.outputs:
+                if output in self.producers:
+                    raise ValueError(f"Value '{output}' is produced by both '{self.producers[output]}' "
+                                     f"and '{stage.name}'.")
+                self.producers[output] = stage.name
+        self.max_workers = max_workers or len(stages)
+        self.timings = {}
+
+    def run(self, initial_values, memo=None):
+        """
+        Executes every stage once.
+
+        :param initial_values: Dictionary of values available before any stage runs.
+        :param memo: Optional memo shared between runs (see start).
+        :return: Dictionary of the initial values plus every stage output.
+        """
+        return self.start(initial_values, memo).result()
+
+    def start(self, initial_values, memo=None):
+        """
+        Starts executing every stage once and returns without waiting for them. Several runs of the same
+        graph may be in flight at once.
+
+        :param initial_values: Dictionary of values available before any stage runs.
+        :param memo: Optional dictionary shared between runs of the graph, e.g. the rounds of one meeting. Each
+                     stage records its inputs and result in it, and a later run reuses the result of a stage
+                     whose inputs have not changed instead of running it again, waiting for it if the earlier
+                     run is still computing it.
+        :return: StageRun to read values from as they are produced.
+        """
+        for stage in self.stages.values():
+            missing = [name for name in stage.inputs if name not in initial_values and name not in self.producers]
+            if missing:
+                raise ValueError(f"Stage '{stage.name}' needs {missing}, which nothing provides.")
+
+        run = StageRun(initial_values)
+        # The scheduler runs in the caller's context, so stage spans nest under the caller's open span
+        scheduler = threading.Thread(target=contextvars.copy_context().run, args=(self._schedule, run, memo),
+                                     daemon=True)
+        scheduler.start()
+        return run
+
+    def _schedule(self, run, memo):
+        values = dict(run.values)
+        pending = dict(self.stages)
+        running = {}
+        started = time.perf_counter()
+
+        def run_stage(stage, args):
+            if stage.description:
+                print(stage.description)
+            stage_start = time.perf_counter() - started
+            with tracing.span('stage', stage.name):
+                result = stage.func(*args)
+            return result, stage_start, time.perf_counter() - started
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                while pending or running:
+                    for name, stage in list(pending.items()):
+                        if not all(value in values for value in stage.inputs):
+                            continue
+                        del pending[name]
+                        args = [values[value] for value in stage.inputs]
+                        if memo is not None and name in memo and _same_inputs(args, memo[name][0]):
+                            # Reuses the earlier run's result, or waits for it if that run is still computing it
+                            future = memo[name][1]
+                            running[future] = stage, time.perf_counter() - started, True
+                            continue
+                        # Worker threads do not inherit the caller's context, which holds the open span
+                        context = contextvars.copy_context()
+                        future = executor.submit(context.run, run_stage, stage, args)
+                        running[future] = stage, None, False
+                        if memo is not None:
+                            memo[name] = (args, future)
+
+                    if not running:
+                        raise RuntimeError(f"Stages {list(pending)} can never run: their inputs form a cycle.")
+
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        stage, reuse_start, reused = running.pop(future)
+                        # Re-raises the stage's exception; the executor waits for in-flight stages on exit
+                        result, stage_start, stage_end = future.result()
+                        if reused:
+                            stage_start, stage_end = reuse_start, time.perf_counter() - started
+                        if len(stage.outputs) == 1:
+                            result = (result,)
+                        outputs = dict(zip(stage.outputs, result))
+                        values.update(outputs)
+                        run._publish(stage.name, outputs, (stage_start, stage_end), reused)
+        except BaseException as e:
+            run._finish(e)
+            return
+        self.timings = dict(run.timings)
+        run._finish()
+
+    def critical_path(self, timings=None):
+        """
+        :param timings: {stage name: (start, end)} of a run; the last finished run by default.
+        :return: Stage names on the critical path of the run, in execution order. Starting from the stage
+                 that finished last, each step goes to the input producer that finished latest.
+        """
+        timings = self.timings if timings is None else timings
+        if not timings:
+            return []
+        path = []
+        name = max(timings, key=lambda stage_name: timings[stage_name][1])
+        while name is not None:
+            path.append(name)
+            producers = {self.producers[value] for value in self.stages[name].inputs if value in self.producers}
+            name = max(producers, key=lambda stage_name: timings[stage_name][1]) if producers else None
+        return path[::-1]
+
+    def timing_report(self, timings=None, reused=()):
+        """
+        :param timings: {stage name: (start, end)} of a run; the last finished run by default.
+        :param reused: Names of stages whose outputs were reused from an earlier run (see StageRun.reused).
+        :return: Table of stage start, end and duration (seconds), marking the critical path.
+        """
+        timings = self.timings if timings is None else timings
+        critical = set(self.critical_path(timings))
+        report = f"{'Stage':<22} {'Start':>8} {'End':>8} {'Duration':>9}\n"
+        for name, (start, end) in sorted(timings.items(), key=lambda item: item[1][0]):
+            marker = " *" if name in critical else ""
+            if name in reused:
+                marker += " (reused)"
+            report += f"{name:<22} {start:>8.2f} {end:>8.2f} {end - start:>9.2f}{marker}\n"
+        report += "(* critical path)\n"
+        return report
\ No newline at end of file
@@ -0,0 +1,38 @@
+import datetime
+
+
+class SystemClock:
+    """
+    Wall-clock time. Components ask their clock for the date instead of calling datetime directly,
+    so a backtest can substitute a SimulatedClock.
+    """
+
+    def today(self):
+        return datetime.date.today()
+
+    def now(self):
+        return datetime.datetime.now()
+
+
+class SimulatedClock:
+    """
+    Clock that only moves when told to, used to replay past trading days.
+    """
+
+    # Daily bars are complete once the market has closed
+    MARKET_CLOSE = datetime.time(16, 0)
+
+    def __init__(self, current_date):
+        self.current_date = current_date
+
+    def today(self):
+        return self.current_date
+
+    def now(self):
+        return datetime.datetime.combine(self.current_date, self.MARKET_CLOSE)
+
+    def set(self, current_date):
+        self.current_date = current_date
+
+
+system_clock = SystemClock()
\ No newline at end of file
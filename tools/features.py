@@ -0,0 +1,136 @@
+import numpy as np
+from tools.stockretriever import from_daily_rows, to_daily_rows
+
+TRADING_DAYS_PER_YEAR = 252
+# Rough size of an English/numeric token, used to keep prompts within a budget without a tokenizer
+CHARS_PER_TOKEN = 4
+DEFAULT_TOKEN_BUDGET = 300
+MIN_SKETCH_POINTS = 4
+
+
+def estimate_tokens(text):
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def _as_columns(history):
+    if isinstance(history, dict):
+        return history
+    return from_daily_rows(to_daily_rows('', history))
+
+
+def _trailing_return(close, days):
+    if len(close) <= days:
+        return None
+    return close[-1] / close[-days - 1] - 1
+
+
+def _moving_average(close, window):
+    if len(close) < window:
+        return None
+    return close[-window:].mean()
+
+
+def compute_features(history):
+    """
+    Computes summary statistics of one symbol's price history with vectorized NumPy operations.
+
+    :param history: Price history in either get_historical_info return mode.
+    :return: Dictionary of features, or None when the history is empty. Features that need more days than
+             the history has are None.
+    """
+    columns = _as_columns(history)
+    close = np.asarray(columns['Close'], dtype=np.float64)
+    if len(close) == 0:
+        return None
+    volume = np.asarray(columns['Volume'], dtype=np.float64)
+    log_returns = np.diff(np.log(close))
+
+    running_max = np.maximum.accumulate(close)
+    drawdowns = close / running_max - 1
+
+    recent_volume = volume[-20:].mean()
+    earlier_volume = volume[:-20].mean() if len(volume) > 20 else None
+
+    return {
+        'start_date': str(columns['Date'][0]),
+        'end_date': str(columns['Date'][-1]),
+        'days': len(close),
+        'last_close': close[-1],
+        'period_return': close[-1] / close[0] - 1,
+        'return_5d': _trailing_return(close, 5),
+        'return_20d': _trailing_return(close, 20),
+        'return_60d': _trailing_return(close, 60),
+        'volatility': log_returns.std(ddof=1) * np.sqrt(TRADING_DAYS_PER_YEAR) if len(log_returns) > 1 else None,
+        'volatility_20d': (log_returns[-20:].std(ddof=1) * np.sqrt(TRADING_DAYS_PER_YEAR)
+                           if len(log_returns) > 20 else None),
+        'sma_20': _moving_average(close, 20),
+        'sma_50': _moving_average(close, 50),
+        'high': np.max(columns['High']),
+        'low': np.min(columns['Low']),
+        'max_drawdown': drawdowns.min(),
+        'current_drawdown': drawdowns[-1],
+        'average_volume': volume.mean(),
+        # Last 20 days' average volume relative to the days before them
+        'volume_trend': recent_volume / earlier_volume - 1 if earlier_volume else None,
+        'dates': columns['Date'],
+        'close': close,
+    }
+
+
+def price_sketch(dates, close, points):
+    """
+    Downsamples a close series to about `points` evenly spaced days, always keeping the first and last day.
+    :return: Compact "date:close" text.
+    """
+    if len(close) > points:
+        index = np.unique(np.linspace(0, len(close) - 1, points).round().astype(np.int64))
+        dates, close = dates[index], close[index]
+    return " ".join(f"{date[5:]}:{price:.2f}" for date, price in zip(dates, close))
+
+
+def _percent(value, signed=True):
+    if value is None:
+        return "n/a"
+    return f"{value * 100:+.1f}%" if signed else f"{value * 100:.1f}%"
+
+
+def _price(value):
+    return "n/a" if value is None else f"{value:.2f}"
+
+
+def summarize_history(history, token_budget=DEFAULT_TOKEN_BUDGET):
+    """
+    Renders the features of one symbol's price history as prompt text that fits in `token_budget` tokens
+    (estimated). The statistics are always included; whatever budget they leave goes to the downsampled price
+    sketch.
+
+    :param history: Price history in either get_historical_info return mode.
+    :param token_budget: Approximate maximum number of tokens of the returned text.
+    :return: The summary text.
+    """
+    f = compute_features(history)
+    if f is None:
+        return "No price data available."
+
+    lines = [
+        f"Period: {f['start_date']} to {f['end_date']} ({f['days']} trading days)",
+        f"Last close: {f['last_close']:.2f}; range {f['low']:.2f}-{f['high']:.2f}",
+        f"Returns: period {_percent(f['period_return'])}, 5d {_percent(f['return_5d'])}, "
+        f"20d {_percent(f['return_20d'])}, 60d {_percent(f['return_60d'])}",
+        f"Annualized volatility: {_percent(f['volatility'], False)} (20d {_percent(f['volatility_20d'], False)})",
+        f"SMA20: {_price(f['sma_20'])}, SMA50: {_price(f['sma_50'])}",
+        f"Max drawdown: {_percent(f['max_drawdown'])}, current drawdown: {_percent(f['current_drawdown'])}",
+        f"Average volume: {f['average_volume']:,.0f}; last 20d vs earlier: {_percent(f['volume_trend'])}",
+    ]
+    summary = "\n".join(lines)
+
+    # Each sketch point ("MM-DD:123.45 ") costs about 3 tokens
+    sketch_label = "\nClose sketch (MM-DD:close): "
+    remaining = token_budget - estimate_tokens(summary + sketch_label)
+    points = min(len(f['close']), remaining * CHARS_PER_TOKEN // 13)
+    while points >= MIN_SKETCH_POINTS:
+        sketch = price_sketch(f['dates'], f['close'], points)
+        if estimate_tokens(summary + sketch_label + sketch) <= token_budget:
+            return summary + sketch_label + sketch
+        points -= 1
+    return summary
\ No newline at end of file
@@ -0,0 +1,23 @@
+import threading
+
+
+class KeyedLock:
+    """
+    One lock per key (a symbol, a news query), created on first use. Threads working on the same key take
+    turns, so a cache miss shared by several callers is fetched once and the others read the cached result,
+    while work on different keys proceeds in parallel.
+
+        with self.symbol_locks(symbol):
+            ...
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.locks = {}
+
+    def __call__(self, key):
+        with self.lock:
+            lock = self.locks.get(key)
+            if lock is None:
+                lock = self.locks[key] = threading.Lock()
+        return lock
\ No newline at end of file
@@ -0,0 +1,207 @@
+import contextvars
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from tools import tracing
+from tools.keyed_lock import KeyedLock
+
+NEWS_API_KEY = 'YourNewsAPIKey'
+NEWS_API_URL = "https://newsapi.org/v2/everything"
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+NEWS_CACHE_PATH = os.path.join(BASE_DIR, 'cache', 'news.db')
+
+# List markers and quotes the model puts around generated search strings
+_QUERY_DECORATION = re.compile(r'^\s*(?:\d+[.)]|[-*•])\s*')
+
+
+def normalize_query(search_term):
+    """
+    Canonical form of a search string, used both as the request and as the cache key:
+    "1. \"Apple  Earnings\"" -> "apple earnings".
+    """
+    query = _QUERY_DECORATION.sub('', search_term)
+    query = query.strip().strip('"\'`').strip()
+    return " ".join(query.lower().split())
+
+
+class NewsCache:
+    """
+    On-disk cache of NewsAPI articles per normalized query, so revision rounds and reruns on the same day do
+    not query the API again. Entries expire after `ttl_seconds`.
+    """
+
+    def __init__(self, path=NEWS_CACHE_PATH, ttl_seconds=6 * 3600):
+        """
+        :param path: SQLite file holding the cache. Its directory is created if missing.
+        :param ttl_seconds: Age after which a query is fetched again.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self.conn:
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS news (
+                    query TEXT PRIMARY KEY,
+                    articles TEXT,
+                    fetched_at REAL
+                )
+            ''')
+
+    def get(self, query):
+        """
+        :return: List of cached article dictionaries, or None when the query is missing or expired.
+        """
+        with self.lock:
+            row = self.conn.execute('SELECT articles, fetched_at FROM news WHERE query = ?', (query,)).fetchone()
+        if row is None or time.time() - row[1] > self.ttl_seconds:
+            return None
+        return json.loads(row[0])
+
+    def put(self, query, articles):
+        with self.lock, self.conn:
+            self.conn.execute('INSERT OR REPLACE INTO news VALUES (?, ?, ?)',
+                              (query, json.dumps(articles, ensure_ascii=False), time.time()))
+            self.conn.execute('DELETE FROM news WHERE fetched_at < ?', (time.time() - self.ttl_seconds,))
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute('SELECT COUNT(*) FROM news').fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+
+class NewsFetcher:
+    """
+    NewsAPI client for the research agent. Requests share one pooled HTTP session with a timeout. At most
+    `max_concurrency` requests are in flight, however many threads call in. Results are cached per normalized
+    query (see NewsCache). fetch_many drops articles already returned for an earlier term of the same batch,
+    so one story does not reach the summarizer twice.
+
+    Called with a single search term it returns that term's news text, matching the news_fetcher interface
+    of MarketResearchAgent.
+    """
+
+    def __init__(self, api_key=NEWS_API_KEY, cache=None, max_concurrency=4, timeout=10, page_size=5,
+                 session=None):
+        """
+        :param api_key: NewsAPI key.
+        :param cache: NewsCache to read through. One on NEWS_CACHE_PATH is created if not given.
+        :param max_concurrency: Maximum number of NewsAPI requests in flight.
+        :param timeout: Seconds before a request is abandoned (connect and read).
+        :param page_size: Articles requested per query.
+        :param session: Optional requests.Session, e.g. one with a mocked transport.
+        """
+        self.api_key = api_key
+        self.cache = cache if cache is not None else NewsCache()
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.page_size = page_size
+        self.session = session or requests.Session()
+        if session is None:
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency)
+            self.session.mount('https://', adapter)
+            self.session.mount('http://', adapter)
+        self.slots = threading.BoundedSemaphore(max_concurrency)
+        # Callers asking for the same query at once (e.g. offices sharing this fetcher) make one request
+        self.query_locks = KeyedLock()
+        self.requests_made = 0
+        self.cache_hits = 0
+
+    def get_articles(self, search_term):
+        """
+        :return: List of article dictionaries (title, description, url) for one search term.
+        :raises requests.RequestException: When the request fails; failures are not cached.
+        """
+        query = normalize_query(search_term)
+        if not query:
+            return []
+        with self.query_locks(query):
+            return self._get_articles(query)
+
+    def _get_articles(self, query):
+        articles = self.cache.get(query)
+        if articles is not None:
+            self.cache_hits += 1
+            return articles
+
+        params = {
+            'q': query + " public traded company",
+            'apiKey': self.api_key,
+            'language': 'en',
+            'sortBy': 'relevancy',
+            'pageSize': self.page_size
+        }
+        with self.slots, tracing.span('news', 'newsapi', query=query) as span:
+            self.requests_made += 1
+            response = self.session.get(NEWS_API_URL, params=params, timeout=self.timeout)
+            span.set(status=response.status_code)
+            response.raise_for_status()
+            payload = response.json()
+        articles = [{'title': article.get('title'), 'description': article.get('description'),
+                     'url': article.get('url')} for article in payload.get('articles', [])]
+        self.cache.put(query, articles)
+        return articles
+
+    def fetch_many(self, search_terms):
+        """
+        Fetches every term concurrently (bounded by max_concurrency) and removes articles whose URL was
+        already returned for an earlier term.
+
+        :return: List of news texts in the same order as `search_terms`.
+        """
+        search_terms = list(search_terms)
+        # A term repeated in the batch is requested once
+        queries = list(dict.fromkeys(normalize_query(term) for term in search_terms))
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            # Each worker runs in a copy of the caller's context, so request spans nest under its span
+            futures = {query: executor.submit(contextvars.copy_context().run, self._articles_or_error, query)
+                       for query in queries}
+        results = [futures[normalize_query(term)].result() for term in search_terms]
+
+        seen = set()
+        texts = []
+        for search_term, result in zip(search_terms, results):
+            if isinstance(result, Exception):
+                texts.append(f"Error fetching news for {search_term.strip()}: {result}")
+                continue
+            fresh = [article for article in result if article['url'] not in seen]
+            seen.update(article['url'] for article in fresh)
+            texts.append(self._format(search_term, fresh, duplicates=len(result) - len(fresh)))
+        return texts
+
+    def _articles_or_error(self, search_term):
+        try:
+            return self.get_articles(search_term)
+        except requests.RequestException as e:
+            return e
+
+    @staticmethod
+    def _format(search_term, articles, duplicates=0):
+        if not articles:
+            if duplicates:
+                return f"No further articles for {search_term.strip()}; its results are listed above."
+            return f"No relevant articles found for {search_term.strip()}."
+        return "\n\n".join(f"Title: {article['title']}\nDescription: {article['description']}\n"
+                           f"URL: {article['url']}\n" for article in articles)
+
+    def __call__(self, search_term):
+        result = self._articles_or_error(search_term)
+        if isinstance(result, Exception):
+            return f"Error fetching news for {search_term.strip()}: {result}"
+        return self._format(search_term, result)
+
+    def close(self):
+        self.session.close()
+        self.cache.close()
\ No newline at end of file
@@ -0,0 +1,124 @@
+import threading
+from datetime import datetime, date, timedelta
+
+from database.db_manager import DatabaseManager
+from tools import stockretriever
+from tools.keyed_lock import KeyedLock
+
+DATE_FORMAT = '%Y-%m-%d'
+
+# An empty fetch over a longer window is more likely a failed request than a market holiday,
+# so it is not recorded as covered and will be retried on the next read
+MAX_EMPTY_GAP_DAYS = 7
+
+
+def _as_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(value, DATE_FORMAT).date()
+
+
+class PriceStore:
+    """
+    Read-through price layer over the daily_data table. Ranges are served from the local database and only
+    the missing edges (days before or after what has already been fetched) go to the network; the fetched
+    rows are written back so later reads are served from disk.
+    """
+
+    def __init__(self, db_manager=None, data_source=stockretriever):
+        """
+        :param db_manager: DatabaseManager to read from and write to. Defaults to the project database.
+        :param data_source: Module or object providing get_historical_info (tools.stockretriever by default).
+        """
+        # Agents may call in from worker threads, so share one connection behind a lock
+        self.db = db_manager or DatabaseManager(check_same_thread=False)
+        self.db.create_price_tables()
+        self.data_source = data_source
+        self.lock = threading.Lock()
+        # Concurrent reads of one symbol fetch its missing range once
+        self.symbol_locks = KeyedLock()
+        self.network_fetches = 0
+
+    def _coverage(self, symbol):
+        coverage = self.db.get_coverage(symbol)
+        if coverage:
+            return _as_date(coverage[0]), _as_date(coverage[1])
+        # Symbols loaded by build_database have rows but no coverage record yet
+        min_date, max_date = self.db.get_symbol_date_range(symbol)
+        if min_date:
+            return _as_date(min_date), _as_date(max_date) + timedelta(days=1)
+        return None
+
+    def _missing_ranges(self, coverage, start, end):
+        if coverage is None:
+            return [(start, end)]
+        covered_start, covered_end = coverage
+        if end <= covered_start or start >= covered_end:
+            # Disjoint request: fetch the whole range plus the hole between it and the covered block,
+            # so coverage stays one contiguous range
+            return [(min(start, covered_end), max(end, covered_start))]
+        missing = []
+        if start < covered_start:
+            missing.append((start, covered_start))
+        if end > covered_end:
+            missing.append((covered_end, end))
+        return missing
+
+    def get_history(self, symbol, start_date, end_date):
+        """
+        Returns daily prices for `symbol` in [start_date, end_date) as columnar history
+        (see tools.stockretriever.get_historical_info with columnar=True).
+
+        :param symbol: Stock ticker symbol.
+        :param start_date: First day of the range (date, datetime or 'YYYY-MM-DD').
+        :param end_date: Day after the last day of the range, matching yfinance's exclusive end.
+        """
+        start = _as_date(start_date)
+        end = _as_date(end_date)
+        with self.symbol_locks(symbol):
+            return self._get_history(symbol, start, end)
+
+    def _get_history(self, symbol, start, end):
+        with self.lock:
+            coverage = self._coverage(symbol)
+        missing = self._missing_ranges(coverage, start, end)
+
+        # Network requests run outside the lock so other symbols are not held up
+        fetched = []
+        for gap_start, gap_end in missing:
+            with self.lock:
+                self.network_fetches += 1
+            try:
+                history = self.data_source.get_historical_info(symbol, gap_start, gap_end, columnar=True,
+                                                               raise_errors=True)
+            except Exception as e:
+                # Not recorded as covered, so the range is fetched again on the next read
+                print(f"Error fetching historical data for {symbol} from {gap_start} to {gap_end}: {e}")
+                continue
+            rows = stockretriever.to_daily_rows(symbol, history)
+            # Today's session may still be trading, so coverage stops before it and today is fetched again
+            covered_end = min(gap_end, date.today())
+            if not rows and (covered_end - gap_start).days > MAX_EMPTY_GAP_DAYS:
+                covered_end = gap_start
+            fetched.append((gap_start, covered_end, rows))
+
+        with self.lock:
+            extended = False
+            for gap_start, covered_end, rows in fetched:
+                if rows:
+                    self.db.insert_daily_data(rows)
+                if covered_end <= gap_start:
+                    continue
+                extended = True
+                if coverage is None:
+                    coverage = (gap_start, covered_end)
+                else:
+                    coverage = (min(coverage[0], gap_start), max(coverage[1], covered_end))
+            if extended:
+                self.db.set_coverage(symbol, coverage[0].strftime(DATE_FORMAT), coverage[1].strftime(DATE_FORMAT))
+
+            rows = self.db.get_stock_data(symbol, start.strftime(DATE_FORMAT),
+                                          (end - timedelta(days=1)).strftime(DATE_FORMAT))
+        return stockretriever.from_daily_rows(rows)
\ No newline at end of file
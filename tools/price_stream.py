@@ -0,0 +1,300 @@
+"""
+Event-driven mark-to-market. A price stream is any iterable of PriceTick in time order; DailyDataReplay and
+FileReplay replay stored prices at any speed. MarkToMarket keeps a portfolio's market value, NAV and
+per-holding P&L current with O(1) work per tick and per transaction, instead of re-pricing the whole book
+the way Portfolio.get_performance_report does. MoveTrigger calls back (e.g. to run the daily cycle) when NAV
+or a single holding moves more than a threshold.
+
+    engine = MarkToMarket(portfolio)
+    trigger = MoveTrigger(engine, lambda reason: office.run_daily_cycle(), nav_threshold=0.02)
+    engine.consume(DailyDataReplay(symbols=list(portfolio.holdings), start='2024-01-02', speed=86400))
+"""
+import csv
+import datetime
+import json
+import os
+import threading
+import time
+
+from database.db_manager import DATABASE_PATH, connect, from_day, to_day
+from models.portfolio import format_cents, to_cents
+
+
+class PriceTick:
+    """
+    One price update.
+    """
+    __slots__ = ('symbol', 'price', 'timestamp')
+
+    def __init__(self, symbol: str, price: float, timestamp: datetime.datetime):
+        self.symbol = symbol
+        self.price = price
+        self.timestamp = timestamp
+
+    def __repr__(self):
+        return f"PriceTick({self.symbol!r}, {self.price}, {self.timestamp.isoformat()})"
+
+
+class _Replay:
+    """
+    Paces a stored series of ticks: with `speed`, ticks are released at `speed` simulated seconds per
+    wall-clock second; without it, as fast as they are read.
+    """
+
+    def __init__(self, speed=None):
+        """
+        :param speed: Simulated seconds per real second, e.g. 86400 replays one calendar day per second.
+                      None replays without waiting.
+        """
+        self.speed = speed
+
+    def _ticks(self):
+        raise NotImplementedError
+
+    def __iter__(self):
+        origin = None
+        for tick in self._ticks():
+            if self.speed:
+                if origin is None:
+                    origin = (tick.timestamp, time.monotonic())
+                due = origin[1] + (tick.timestamp - origin[0]).total_seconds() / self.speed
+                delay = due - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            yield tick
+
+
+class DailyDataReplay(_Replay):
+    """
+    Replays closes (or another price column) from the daily_data table, day by day.
+    """
+
+    def __init__(self, database_path=DATABASE_PATH, symbols=None, start=None, end=None, field='close',
+                 speed=None):
+        """
+        :param symbols: Symbols to replay; every symbol by default.
+        :param start: First day (date or 'YYYY-MM-DD'), inclusive.
+        :param end: Last day, inclusive.
+        :param field: Price column to replay: open, high, low or close.
+        """
+        super().__init__(speed)
+        if field not in ('open', 'high', 'low', 'close'):
+            raise ValueError(f"Unknown price field: {field}")
+        self.database_path = database_path
+        self.symbols = list(symbols) if symbols is not None else None
+        self.start = start
+        self.end = end
+        self.field = field
+
+    def _ticks(self):
+        query = f'SELECT day, symbol, {self.field} FROM daily_data WHERE {self.field} IS NOT NULL'
+        params = []
+        if self.start is not None:
+            query += ' AND day >= ?'
+            params.append(to_day(self.start))
+        if self.end is not None:
+            query += ' AND day <= ?'
+            params.append(to_day(self.end))
+        if self.symbols is not None:
+            query += f" AND symbol IN ({', '.join('?' * len(self.symbols))})"
+            params.extend(self.symbols)
+        query += ' ORDER BY day, symbol'
+
+        conn = connect(self.database_path)
+        try:
+            timestamps = {}
+            for day, symbol, price in conn.execute(query, params):
+                timestamp = timestamps.get(day)
+                if timestamp is None:
+                    timestamp = timestamps[day] = datetime.datetime.fromisoformat(from_day(day))
+                yield PriceTick(symbol, price, timestamp)
+        finally:
+            conn.close()
+
+
+class FileReplay(_Replay):
+    """
+    Replays ticks from a CSV file with a header row or a JSONL file, one tick per row or line, with the
+    fields timestamp (ISO format), symbol and price. Rows must be in time order.
+    """
+
+    def __init__(self, path, speed=None):
+        super().__init__(speed)
+        self.path = path
+
+    def _ticks(self):
+        with open(self.path, newline='', encoding='utf-8') as file:
+            if os.path.splitext(self.path)[1].lower() == '.csv':
+                rows = csv.DictReader(file)
+            else:
+                rows = (json.loads(line) for line in file if line.strip())
+            for row in rows:
+                yield PriceTick(row['symbol'], float(row['price']),
+                                datetime.datetime.fromisoformat(row['timestamp']))
+
+
+class MarkToMarket:
+    """
+    Incremental valuation of a Portfolio. The market value of the book is kept as a running total in integer
+    cents: a tick for a held symbol adds quantity x price change, and a transaction (reported through
+    Portfolio.add_listener) adds the value of the quantity bought or sold, so NAV and P&L are O(1) at any
+    time. Quantities and cash are the engine's own copies, changed only by on_transaction under the lock: the
+    portfolio updates its holdings before its listeners run, and a tick in between must not see the new
+    quantity before the transaction has been booked. Cost basis is read from the portfolio. A holding without
+    a tick yet is marked at its cost basis, as in the performance report.
+    """
+
+    def __init__(self, portfolio, prices=None):
+        """
+        :param portfolio: Portfolio to value. The engine registers itself as a listener of its transactions.
+        :param prices: Optional {symbol: price} to start from, e.g. QuoteService.get_quotes(holdings).
+        """
+        self.portfolio = portfolio
+        self.lock = threading.Lock()
+        self.marks = {symbol: to_cents(price) for symbol, price in (prices or {}).items()}
+        self.quantities = {}
+        self.cash_cents = portfolio.cash_cents
+        self.market_value_cents = 0
+        for symbol, holding in portfolio.holdings.items():
+            if symbol not in self.marks:
+                self.marks[symbol] = holding.cost_cents // holding.quantity
+            self.quantities[symbol] = holding.quantity
+            self.market_value_cents += holding.quantity * self.marks[symbol]
+        self.last_timestamp = None
+        self.tick_count = 0
+        self.listeners = []
+        portfolio.add_listener(self.on_transaction)
+
+    def add_listener(self, listener):
+        """
+        :param listener: Callable(engine, tick) run after every tick has been applied.
+        """
+        self.listeners.append(listener)
+
+    def on_tick(self, tick):
+        price_cents = to_cents(tick.price)
+        with self.lock:
+            quantity = self.quantities.get(tick.symbol)
+            if quantity is not None:
+                self.market_value_cents += quantity * (price_cents - self.marks[tick.symbol])
+            self.marks[tick.symbol] = price_cents
+            self.last_timestamp = tick.timestamp
+            self.tick_count += 1
+        for listener in self.listeners:
+            listener(self, tick)
+
+    def on_transaction(self, transaction):
+        """
+        Portfolio listener: moves the traded quantity in or out of the marked book.
+        """
+        with self.lock:
+            mark = self.marks.setdefault(transaction.symbol, transaction.price_cents)
+            quantity = transaction.quantity if transaction.type == 'buy' else -transaction.quantity
+            self.market_value_cents += quantity * mark
+            self.cash_cents -= quantity * transaction.price_cents
+            held = self.quantities.get(transaction.symbol, 0) + quantity
+            if held:
+                self.quantities[transaction.symbol] = held
+            else:
+                self.quantities.pop(transaction.symbol, None)
+
+    def consume(self, stream, stop=None):
+        """
+        Applies every tick of `stream`.
+
+        :param stop: Optional threading.Event; the replay ends once it is set.
+        :return: Number of ticks applied.
+        """
+        applied = 0
+        for tick in stream:
+            if stop is not None and stop.is_set():
+                break
+            self.on_tick(tick)
+            applied += 1
+        return applied
+
+    def nav_cents(self):
+        return self.cash_cents + self.market_value_cents
+
+    def holding_pnl_cents(self, symbol):
+        """
+        :return: Unrealized P&L of one holding at its latest mark, or 0 when it is not held.
+        """
+        with self.lock:
+            quantity = self.quantities.get(symbol)
+            holding = self.portfolio.holdings.get(symbol)
+            if quantity is None or holding is None:
+                return 0
+            return quantity * self.marks[symbol] - holding.cost_cents
+
+    def exposure(self):
+        """
+        :return: {symbol: share of NAV} at the latest marks.
+        """
+        with self.lock:
+            nav = self.nav_cents()
+            return {symbol: quantity * self.marks[symbol] / nav if nav else 0.0
+                    for symbol, quantity in self.quantities.items()}
+
+    def report(self):
+        """
+        :return: NAV, cash and per-holding marks and P&L at the latest tick.
+        """
+        with self.lock:
+            nav = self.nav_cents()
+            lines = [f"Mark-to-market as of {self.last_timestamp or 'start'} ({self.tick_count} ticks)",
+                     f"NAV: ${format_cents(nav)} (cash ${format_cents(self.cash_cents)}, "
+                     f"market value ${format_cents(self.market_value_cents)})",
+                     f"{'Symbol':<8} {'Quantity':>9} {'Mark':>11} {'Value':>14} {'P&L':>13} {'Exposure':>9}"]
+            for symbol, quantity in sorted(self.quantities.items()):
+                value = quantity * self.marks[symbol]
+                holding = self.portfolio.holdings.get(symbol)
+                pnl = format_cents(value - holding.cost_cents) if holding is not None else '-'
+                lines.append(f"{symbol:<8} {quantity:>9} {format_cents(self.marks[symbol]):>11} "
+                             f"{format_cents(value):>14} {pnl:>13} {value / nav if nav else 0.0:>9.1%}")
+        return "\n".join(lines) + "\n"
+
+
+class MoveTrigger:
+    """
+    Calls `action` when NAV moves more than `nav_threshold`, or a holding's mark more than `symbol_threshold`,
+    away from its reference level. References are reset when the action runs, so one move triggers once.
+    """
+
+    def __init__(self, engine, action, nav_threshold=0.02, symbol_threshold=None):
+        """
+        :param engine: MarkToMarket to watch.
+        :param action: Callable(reason text), e.g. lambda reason: office.run_daily_cycle().
+        :param nav_threshold: Relative NAV move that triggers, e.g. 0.02 for 2%. None to ignore NAV.
+        :param symbol_threshold: Relative move of a held symbol's price that triggers. None to ignore.
+        """
+        self.engine = engine
+        self.action = action
+        self.nav_threshold = nav_threshold
+        self.symbol_threshold = symbol_threshold
+        self.triggered = 0
+        self._reset()
+        engine.add_listener(self._on_tick)
+
+    def _reset(self):
+        self.reference_nav = self.engine.nav_cents()
+        self.reference_marks = dict(self.engine.marks)
+
+    def _on_tick(self, engine, tick):
+        reason = None
+        if self.nav_threshold is not None and self.reference_nav:
+            move = engine.nav_cents() / self.reference_nav - 1
+            if abs(move) >= self.nav_threshold:
+                reason = f"NAV moved {move:+.2%} to ${format_cents(engine.nav_cents())}"
+        if reason is None and self.symbol_threshold is not None and tick.symbol in engine.quantities:
+            reference = self.reference_marks.setdefault(tick.symbol, engine.marks[tick.symbol])
+            move = engine.marks[tick.symbol] / reference - 1 if reference else 0.0
+            if abs(move) >= self.symbol_threshold:
+                reason = f"{tick.symbol} moved {move:+.2%} to ${format_cents(engine.marks[tick.symbol])}"
+        if reason is None:
+            return
+        self.triggered += 1
+        print(f"Large move at {tick.timestamp}: {reason}")
+        self.action(reason)
+        # Measure the next move from where the action left the book
+        self._reset()
\ No newline at end of file
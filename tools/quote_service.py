@@ -0,0 +1,101 @@
+import threading
+import time
+from concurrent.futures import Future
+
+from tools import stockretriever
+
+DEFAULT_TTL_SECONDS = 300
+
+
+class QuoteService:
+    """
+    Current-price snapshots for many symbols at once. Prices are fetched with one batched request and kept
+    in a short-TTL in-memory cache keyed by symbol, so the performance report and order execution within one
+    cycle price the book from the same snapshot instead of making one network call per symbol each.
+    """
+
+    def __init__(self, ttl_seconds=DEFAULT_TTL_SECONDS, data_source=stockretriever):
+        """
+        :param ttl_seconds: How long a fetched price is served from memory.
+        :param data_source: Module or object providing get_current_prices (tools.stockretriever by default).
+        """
+        self.ttl_seconds = ttl_seconds
+        self.data_source = data_source
+        self.quotes = {}  # symbol -> (price, fetched at)
+        self.lock = threading.Lock()
+        # symbol -> Future of the {symbol: price} request in flight for it, so callers missing the same symbol
+        # at once (offices sharing this service) wait for that request, while other symbols are fetched in
+        # parallel
+        self.in_flight = {}
+        self.network_fetches = 0
+
+    def get_quotes(self, symbols):
+        """
+        :param symbols: Iterable of stock symbols.
+        :return: Dictionary mapping each symbol to its price; symbols with no available price are left out.
+        """
+        symbols = list(dict.fromkeys(symbols))
+        snapshot = self._cached(symbols)
+        if len(snapshot) == len(symbols):
+            return snapshot
+
+        missing = [symbol for symbol in symbols if symbol not in snapshot]
+        request = Future()
+        with self.lock:
+            # Symbols another caller is already fetching are waited for; only the rest are requested here
+            waiting = {symbol: self.in_flight[symbol] for symbol in missing if symbol in self.in_flight}
+            own = [symbol for symbol in missing if symbol not in waiting]
+            for symbol in own:
+                self.in_flight[symbol] = request
+
+        if own:
+            try:
+                with self.lock:
+                    self.network_fetches += 1
+                fetched = self.data_source.get_current_prices(own)
+                fetched_at = time.monotonic()
+                with self.lock:
+                    for symbol, price in fetched.items():
+                        self.quotes[symbol] = (price, fetched_at)
+                request.set_result(fetched)
+            except BaseException as e:
+                request.set_exception(e)
+                raise
+            finally:
+                with self.lock:
+                    for symbol in own:
+                        self.in_flight.pop(symbol, None)
+            snapshot.update(fetched)
+
+        for symbol, pending in waiting.items():
+            # A symbol whose shared request failed is left out, like one without a price
+            if pending.exception() is None and symbol in pending.result():
+                snapshot[symbol] = pending.result()[symbol]
+        return snapshot
+
+    def _cached(self, symbols):
+        now = time.monotonic()
+        with self.lock:
+            return {symbol: self.quotes[symbol][0] for symbol in symbols
+                    if symbol in self.quotes and now - self.quotes[symbol][1] <= self.ttl_seconds}
+
+    def get_quote(self, symbol):
+        """
+        :return: The price of one symbol, or None when it is unavailable.
+        """
+        return self.get_quotes([symbol]).get(symbol)
+
+    def invalidate(self, symbols=None):
+        """
+        Drops cached prices for `symbols`, or for every symbol when none are given.
+        """
+        with self.lock:
+            if symbols is None:
+                self.quotes.clear()
+            else:
+                for symbol in symbols:
+                    self.quotes.pop(symbol, None)
+
+
+# Shared by Portfolio and OperatorAgent unless they are given their own service
+default_quote_service = QuoteService()
\ No newline at end of file
@@ -0,0 +1,36 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket shared by every worker that talks to the same rate-limited API.
+    """
+
+    def __init__(self, rate, capacity=None):
+        """
+        :param rate: Tokens added per second (the sustained request rate).
+        :param capacity: Maximum burst size. Defaults to one second worth of tokens.
+        """
+        if rate <= 0:
+            raise ValueError("Token bucket rate must be positive.")
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity is not None else max(1.0, self.rate)
+        self.tokens = self.capacity
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """
+        Blocks until the requested number of tokens is available, then consumes them.
+        """
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+                self.last_refill = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
\ No newline at end of file
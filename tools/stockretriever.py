@@ -1,6 +1,13 @@
 import yfinance as yf
+import numpy as np
+import pandas as pd
+from itertools import repeat
 from datetime import datetime, timedelta
 
+from tools import tracing
+
+PRICE_FIELDS = ('Open', 'High', 'Low', 'Close')
+
 
 def get_current_info(symbols):
     """
@@ -13,7 +20,8 @@ def get_current_info(symbols):
     for symbol in symbols:
         try:
             ticker = yf.Ticker(symbol)
-            info = ticker.info
+            with tracing.span('yfinance', 'info', symbol=symbol):
+                info = ticker.info
             results.append({
                 'symbol': symbol,
                 'longName': info.get('longName', 'N/A'),
@@ -31,31 +39,181 @@ def get_current_info(symbols):
     return results
 
 
-def get_historical_info(symbol, start_date, end_date):
+def get_current_prices(symbols):
+    """
+    Fetch the latest traded price of many symbols with a single multi-ticker download.
+
+    :param symbols: List of stock symbols
+    :return: Dictionary mapping each symbol to its latest price; symbols without a price are left out
+    """
+    prices = {}
+    if not symbols:
+        return prices
+    try:
+        # The current session's bar is included while the market is open, so its Close is the live price
+        with tracing.span('yfinance', 'current_prices', symbols=len(symbols)):
+            frame = yf.download(list(symbols), period='5d', interval='1d', group_by='ticker', auto_adjust=False,
+                                progress=False)
+    except Exception as e:
+        print(f"Error fetching current prices for {symbols}: {e}")
+        return prices
+
+    for symbol in symbols:
+        try:
+            closes = (frame[symbol] if isinstance(frame.columns, pd.MultiIndex) else frame)['Close'].dropna()
+        except KeyError:
+            continue
+        if len(closes):
+            prices[symbol] = float(closes.iloc[-1])
+    return prices
+
+
+def _frame_to_records(hist):
+    """
+    Convert a yfinance history DataFrame into a list of per-day dictionaries.
+    """
+    return [{
+        'Date': index.strftime('%Y-%m-%d'),
+        'Open': row['Open'],
+        'High': row['High'],
+        'Low': row['Low'],
+        'Close': row['Close'],
+        'Volume': row['Volume']
+    } for index, row in hist.iterrows()]
+
+
+def _frame_to_columns(hist):
+    """
+    Convert a yfinance history DataFrame into a dictionary of NumPy arrays, one per field.
+    Dates are formatted in a single vectorized cast and prices stay unboxed float64.
+    """
+    index = hist.index
+    if getattr(index, 'tz', None) is not None:
+        # Drop the exchange timezone but keep its wall-clock date
+        index = index.tz_localize(None)
+    # datetime64[D] -> str is vectorized in NumPy and much cheaper than DatetimeIndex.strftime
+    columns = {'Date': index.to_numpy(dtype='datetime64[ns]').astype('datetime64[D]').astype('U10')}
+    for field in PRICE_FIELDS:
+        columns[field] = hist[field].to_numpy(dtype=np.float64)
+    columns['Volume'] = hist['Volume'].fillna(0).to_numpy(dtype=np.int64)
+    return columns
+
+
+def empty_columns():
+    """
+    Columnar history with no rows, returned when a fetch fails in columnar mode.
+    """
+    columns = {'Date': np.empty(0, dtype='U10')}
+    for field in PRICE_FIELDS:
+        columns[field] = np.empty(0, dtype=np.float64)
+    columns['Volume'] = np.empty(0, dtype=np.int64)
+    return columns
+
+
+def to_daily_rows(symbol, history):
+    """
+    Flatten one symbol's history (either return mode) into daily_data tuples
+    (date, symbol, open, high, low, close, volume).
+    """
+    if isinstance(history, dict):
+        # tolist() unboxes whole columns in C and yields the native types sqlite3 accepts
+        dates = history['Date'].tolist()
+        return list(zip(dates, repeat(symbol, len(dates)), history['Open'].tolist(), history['High'].tolist(),
+                        history['Low'].tolist(), history['Close'].tolist(), history['Volume'].tolist()))
+    return [(data['Date'], symbol, data['Open'], data['High'], data['Low'], data['Close'], data['Volume'])
+            for data in history]
+
+
+def from_daily_rows(rows):
+    """
+    Inverse of to_daily_rows: build columnar history from daily_data tuples
+    (date, symbol, open, high, low, close, volume).
+    """
+    if not rows:
+        return empty_columns()
+    dates, _, opens, highs, lows, closes, volumes = zip(*rows)
+    return {
+        'Date': np.array(dates, dtype='U10'),
+        'Open': np.array(opens, dtype=np.float64),
+        'High': np.array(highs, dtype=np.float64),
+        'Low': np.array(lows, dtype=np.float64),
+        'Close': np.array(closes, dtype=np.float64),
+        'Volume': np.array(volumes, dtype=np.int64)
+    }
+
+
+def format_history(history):
+    """
+    Render one symbol's history (either return mode) as a compact CSV table for prompts.
+    """
+    lines = ["Date,Open,High,Low,Close,Volume"]
+    lines.extend(f"{date},{open_:.2f},{high:.2f},{low:.2f},{close:.2f},{volume}"
+                 for date, _, open_, high, low, close, volume in to_daily_rows('', history))
+    return "\n".join(lines)
+
+
+def get_historical_info(symbol, start_date, end_date, columnar=False, raise_errors=False):
     """
     Fetch historical stock data for a given symbol and date range.
 
     :param symbol: Stock symbol
     :param start_date: Start date for historical data
     :param end_date: End date for historical data
-    :return: List of dictionaries containing historical stock data
+    :param columnar: Return a dictionary of NumPy arrays keyed by field instead of a list of per-day dictionaries
+    :param raise_errors: Re-raise a failed request instead of returning empty history, so callers that record
+                         what they have fetched can tell a failure from a range without trading days
+    :return: List of dictionaries containing historical stock data, or a dictionary of arrays when columnar
     """
     try:
         ticker = yf.Ticker(symbol)
-        hist = ticker.history(start=start_date, end=end_date)
-
-        return [{
-            'Date': index.strftime('%Y-%m-%d'),
-            'Open': row['Open'],
-            'High': row['High'],
-            'Low': row['Low'],
-            'Close': row['Close'],
-            'Volume': row['Volume']
-        } for index, row in hist.iterrows()]
+        with tracing.span('yfinance', 'history', symbol=symbol):
+            hist = ticker.history(start=start_date, end=end_date, raise_errors=raise_errors)
+
+        return _frame_to_columns(hist) if columnar else _frame_to_records(hist)
     except Exception as e:
+        if raise_errors:
+            raise
         print(f"Error fetching historical data for {symbol}: {e}")
-        return []
+        return empty_columns() if columnar else []
+
 
+def get_historical_info_batch(symbols, start_date, end_date, columnar=False, raise_errors=False):
+    """
+    Fetch historical stock data for several symbols with a single multi-ticker download.
+
+    :param symbols: List of stock symbols
+    :param start_date: Start date for historical data
+    :param end_date: End date for historical data
+    :param columnar: Return each symbol's history as a dictionary of NumPy arrays
+    :param raise_errors: Re-raise a failed download instead of returning an empty dictionary. Symbols the
+                         download could not fetch individually still come back with empty history.
+    :return: Dictionary mapping each symbol to its historical stock data
+    """
+    results = {}
+    if not symbols:
+        return results
+
+    try:
+        # threads=False: callers run their own worker pool, so don't multiply the connection count
+        with tracing.span('yfinance', 'history_batch', symbols=len(symbols)):
+            frame = yf.download(list(symbols), start=start_date, end=end_date, group_by='ticker',
+                                auto_adjust=True, threads=False, progress=False)
+    except Exception as e:
+        if raise_errors:
+            raise
+        print(f"Error fetching historical data for {symbols}: {e}")
+        return results
+
+    convert = _frame_to_columns if columnar else _frame_to_records
+    for symbol in symbols:
+        try:
+            hist = frame[symbol] if isinstance(frame.columns, pd.MultiIndex) else frame
+        except KeyError:
+            results[symbol] = empty_columns() if columnar else []
+            continue
+        # The download aligns every ticker on a shared date index, so drop the padding rows
+        results[symbol] = convert(hist.dropna(subset=['Close']))
+    return results
 
 if __name__ == "__main__":
     # Test the functions
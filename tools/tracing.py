@@ -0,0 +1,250 @@
+"""
+Nested timing spans for the daily cycle. A Tracer collects the spans opened while one of its cycles is
+active and writes them as JSONL, one file per cycle. Instrumented code calls the module-level span(), which
+is a no-op unless a cycle is active, so components do not need a tracer handed to them:
+
+    tracer = Tracer()
+    with tracer.cycle('2024-10-05'):
+        with span('stage', 'market_info') as current:
+            current.set(terms=3)
+    print(tracer.summary_report())
+
+The active span is kept in a context variable, so spans nest across asyncio tasks and asyncio.to_thread.
+Code handing work to other threads must run it in a copy of the context (see StageGraph).
+"""
+import contextvars
+import glob
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TRACE_DIR = os.path.join(BASE_DIR, 'traces')
+
+# (tracer, innermost open span) of the current context
+_active = contextvars.ContextVar('tracing_active', default=(None, None))
+
+
+class Span:
+    """
+    One timed operation. Attributes set while the span is open are written with it.
+    """
+
+    __slots__ = ('tracer', 'span_id', 'parent_id', 'kind', 'name', 'attributes', 'start', 'duration', 'error',
+                 'thread', '_started', '_token')
+
+    def __init__(self, tracer, parent, kind, name, attributes):
+        self.tracer = tracer
+        self.span_id = next(tracer.span_ids)
+        self.parent_id = parent.span_id if parent is not None else None
+        self.kind = kind
+        self.name = name
+        self.attributes = attributes
+        self.error = None
+        self.duration = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def __enter__(self):
+        self._token = _active.set((self.tracer, self))
+        self.thread = threading.current_thread().name
+        self.start = time.time()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.duration = time.perf_counter() - self._started
+        if exc is not None:
+            self.error = repr(exc)
+        _active.reset(self._token)
+        self.tracer._finish(self)
+        return False
+
+    def to_dict(self):
+        return {
+            'trace_id': self.tracer.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'kind': self.kind,
+            'name': self.name,
+            'start': self.start,
+            'duration_ms': self.duration * 1000,
+            'thread': self.thread,
+            'attributes': self.attributes,
+            'error': self.error
+        }
+
+
+class _NullSpan:
+    """
+    Returned by span() when no cycle is being traced.
+    """
+
+    def set(self, **attributes):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+def span(kind, name, **attributes):
+    """
+    Opens a span under the current one, for use as a context manager.
+
+    :param kind: Category used to group spans in the summary, e.g. 'stage', 'llm', 'yfinance', 'news'.
+    :param name: What is being timed, e.g. the stage name or the request type.
+    :param attributes: JSON-serializable details recorded with the span.
+    """
+    tracer, parent = _active.get()
+    if tracer is None:
+        return NULL_SPAN
+    return Span(tracer, parent, kind, name, attributes)
+
+
+class Tracer:
+    """
+    Collects the spans of one daily cycle at a time and writes each cycle to
+    <trace_dir>/trace_<name>_<trace id>.jsonl.
+    """
+
+    def __init__(self, trace_dir=TRACE_DIR):
+        """
+        :param trace_dir: Directory for the JSONL files; None keeps spans in memory only.
+        """
+        self.trace_dir = trace_dir
+        self.lock = threading.Lock()
+        self.span_ids = itertools.count(1)
+        self.trace_id = None
+        self.spans = []
+        self.last_path = None
+
+    def _finish(self, finished):
+        with self.lock:
+            self.spans.append(finished.to_dict())
+
+    def cycle(self, name, **attributes):
+        """
+        Starts a new trace. Spans opened inside it are written when it closes, to a file named after `name`.
+        """
+        return _Cycle(self, name, attributes)
+
+    def write(self, name):
+        """
+        Writes the spans of the last cycle, in start order.
+
+        :return: Path of the JSONL file, or None without a trace_dir.
+        """
+        if self.trace_dir is None:
+            return None
+        os.makedirs(self.trace_dir, exist_ok=True)
+        path = os.path.join(self.trace_dir, f"trace_{name}_{self.trace_id[:8]}.jsonl")
+        with self.lock, open(path, 'w', encoding='utf-8') as file:
+            for record in sorted(self.spans, key=lambda record: record['start']):
+                file.write(json.dumps(record, default=str) + "\n")
+        self.last_path = path
+        return path
+
+    def summary_report(self):
+        """
+        :return: p50/p95 latency table of the last cycle (see summary_report()).
+        """
+        with self.lock:
+            return summary_report(list(self.spans))
+
+
+class _Cycle:
+    def __init__(self, tracer, name, attributes):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+
+    def __enter__(self):
+        with self.tracer.lock:
+            self.tracer.trace_id = uuid.uuid4().hex
+            self.tracer.spans = []
+        self._token = _active.set((self.tracer, None))
+        # One root name for every cycle, so cycles are comparable in the summary
+        self.root = Span(self.tracer, None, 'cycle', 'cycle', dict(self.attributes, name=self.name))
+        self.root.__enter__()
+        return self.root
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.root.__exit__(exc_type, exc, traceback)
+        _active.reset(self._token)
+        self.tracer.write(self.name)
+        return False
+
+
+def _group(record):
+    """
+    Summary row of a span: stages by name, model calls by agent, everything else by kind and name.
+    """
+    if record['kind'] == 'llm':
+        return 'llm', record['attributes'].get('agent', record['name'])
+    return record['kind'], record['name']
+
+
+def summarize(records):
+    """
+    :param records: Span dictionaries, as written to the JSONL files.
+    :return: {(kind, name): {'count', 'p50_ms', 'p95_ms', 'total_ms', 'prompt_tokens', 'completion_tokens'}}
+    """
+    groups = {}
+    for record in records:
+        groups.setdefault(_group(record), []).append(record)
+    summary = {}
+    for key, members in groups.items():
+        durations = np.array([record['duration_ms'] for record in members])
+        summary[key] = {
+            'count': len(members),
+            'p50_ms': float(np.percentile(durations, 50)),
+            'p95_ms': float(np.percentile(durations, 95)),
+            'total_ms': float(durations.sum()),
+            'prompt_tokens': sum(record['attributes'].get('prompt_tokens', 0) for record in members),
+            'completion_tokens': sum(record['attributes'].get('completion_tokens', 0) for record in members)
+        }
+    return summary
+
+
+def summary_report(records):
+    """
+    :return: Table of count, p50, p95 and total latency per stage, per agent's model calls and per request
+             type, slowest total first. Token columns are only filled for model calls.
+    """
+    summary = summarize(records)
+    report = (f"{'Kind':<9} {'Name':<26} {'Count':>6} {'p50 ms':>9} {'p95 ms':>9} {'Total ms':>10} "
+              f"{'Prompt tok':>11} {'Compl tok':>10}\n")
+    for (kind, name), row in sorted(summary.items(), key=lambda item: -item[1]['total_ms']):
+        tokens = (f"{row['prompt_tokens']:>11} {row['completion_tokens']:>10}" if kind == 'llm'
+                  else f"{'':>11} {'':>10}")
+        report += (f"{kind:<9} {name[:26]:<26} {row['count']:>6} {row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f} "
+                   f"{row['total_ms']:>10.1f} {tokens}\n")
+    return report
+
+
+def read_traces(paths):
+    records = []
+    for path in paths:
+        with open(path, encoding='utf-8') as file:
+            records.extend(json.loads(line) for line in file if line.strip())
+    return records
+
+
+if __name__ == "__main__":
+    # Summarize the given trace files (all of TRACE_DIR by default) across cycles
+    paths = sys.argv[1:] or sorted(glob.glob(os.path.join(TRACE_DIR, 'trace_*.jsonl')))
+    print(f"{len(paths)} trace file(s)")
+    print(summary_report(read_traces(paths)))
\ No newline at end of file